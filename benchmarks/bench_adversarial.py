@@ -0,0 +1,128 @@
+"""Benchmark: adversarial inputs that used to make the regexes backtrack
+
+Part 1 times the rewritten patterns against the old ones on near-miss
+inputs (kept small - the old ones grow exponentially or quadratically).
+
+Part 2 runs every level on a corpus of adversarial files (minified code,
+long lines of modifiers, near-miss paths, unclosed comments and calls,
+deep nesting) plus seeded random fuzz built from the tokens the patterns
+care about. Each file must finish within the bound (seconds, also used
+as the engine's per-action time budget); the exit status is 1 otherwise.
+
+Usage: python benchmarks/bench_adversarial.py [bound] [size]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codeblur.engine import (  # noqa: E402
+    CS_PROPERTY, TS_METHOD, UNIX_ABS_PATH, ActionTimeout, Engine, load_known_words,
+)
+
+
+# The patterns as they were
+OLD_UNIX_ABS_PATH = re.compile(r'\/(?:[a-zA-Z0-9_\-./]+)+')
+OLD_CS_PROPERTY = re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:virtual\s+)?(?:override\s+)?(?:abstract\s+)?(?:[\w<>\[\],\?\s]+\s+)(\w+)\s*(?:\{|=>)')
+OLD_TS_METHOD = re.compile(r'(?:public|private|protected)?\s*(?:static\s+)?(?:async\s+)?(\w+)\s*\([^)]*\)\s*(?::\s*[^{]+)?\s*\{')
+
+PATTERN_CASES = [
+    ("unix path, near miss", "/" + "a" * 22 + "!", lambda pattern, text: pattern.fullmatch(text),
+     OLD_UNIX_ABS_PATH, UNIX_ABS_PATH),
+    ("C# modifier soup", "public a " * 2000, lambda pattern, text: list(pattern.finditer(text)),
+     OLD_CS_PROPERTY, CS_PROPERTY),
+    ("TS minified f(a):", "f(a): " * 3000, lambda pattern, text: list(pattern.finditer(text)),
+     OLD_TS_METHOD, TS_METHOD),
+    ("TS long blank run", "f(x)" + " " * 5000, lambda pattern, text: list(pattern.finditer(text)),
+     OLD_TS_METHOD, TS_METHOD),
+]
+
+# Tokens the fuzzer strings together
+FUZZ_TOKENS = [
+    "public ", "private ", "static ", "async ", "a", "Name", "List<", ">", ", ", "(", ")", ":", "?",
+    ";", "{", "}", "/", "./", "C:\\", "\\\\", "http://", " ", "\n", "\n\n\n", '"', "'", "`",
+    "/*", "*/", "//", "#", "--", "=>", "=", "where ", "class ", "0", "-",
+]
+
+
+def adversarial_corpus(size):
+    """(label, language, text) of inputs aimed at the regexes, each about size characters"""
+    def repeat(unit, prefix="", suffix=""):
+        return prefix + unit * max(1, size // len(unit)) + suffix
+
+    rng = random.Random(1)
+    corpus = [
+        ("unix path, near miss", "typescript", repeat('const p = "/' + "a" * 40 + '!";\n')),
+        ("path of slashes", "typescript", repeat('const p = "a' + "/" * 40 + '!";\n')),
+        ("minified ternaries", "typescript", repeat("x?f(a):", "var r=", ";\n")),
+        ("minified f(a):", "typescript", repeat("f(a): ")),
+        ("unclosed calls", "typescript", repeat("a(")),
+        ("C# modifier soup", "csharp", repeat("public a ", "class C {\n", "\n}\n")),
+        ("long generic type list", "csharp", repeat("List<int>, ", "public Dictionary<", "\n")),
+        ("whitespace runs", None, "\n" + " " * (size // 2) + "\n" + " " * (size // 2) + "x"),
+        ("unclosed block comments", None, repeat("/* x ")),
+        ("unclosed C# comments", "csharp", repeat("/* x ", "class C {\n")),
+        ("unclosed HTML comments", "html", repeat("<!-- x ")),
+        ("unclosed Lua comments", None, repeat("--[[ x ")),
+        ("commented-out block", "typescript", repeat("x = f(a) ", "/*\n", "*/\nf(x)\n")),
+        ("deep nesting", "csharp", "void f() {" * (size // 20) + "x;" + "}" * (size // 20)),
+        ("one oversized line", "csharp", repeat("public int a = f(b) ? c : d; ")),
+    ]
+    for index in range(5):
+        tokens = []
+        length = 0
+        while length < size:
+            token = rng.choice(FUZZ_TOKENS)
+            tokens.append(token)
+            length += len(token)
+        corpus.append((f"fuzz #{index + 1}", rng.choice(["csharp", "typescript", None]), "".join(tokens)))
+    return corpus
+
+
+def run_all_levels(engine, text):
+    """Every level in turn, like clicking AUTO-OBFUSCATE through them"""
+    for level in sorted(Engine.OBFUSCATION_LEVELS):
+        text, _ = engine.run_level(level, text)
+
+
+def main():
+    bound = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    print(f"{'pattern':<28} {'old':>10}  {'new':>10}")
+    for label, text, run, old, new in PATTERN_CASES:
+        times = []
+        for pattern in (old, new):
+            start = time.perf_counter()
+            run(pattern, text)
+            times.append(time.perf_counter() - start)
+        print(f"{label:<28} {times[0] * 1000:>7.1f} ms  {times[1] * 1000:>7.1f} ms")
+
+    print(f"\nall levels, bound {bound:g} s")
+    known_words = load_known_words()
+    failed = 0
+    for label, language, text in adversarial_corpus(size):
+        engine = Engine({}, known_words, language=language)
+        engine.rng = random.Random(1)
+        engine.time_budget = bound
+        start = time.perf_counter()
+        try:
+            run_all_levels(engine, text)
+            status = "ok"
+        except ActionTimeout as timeout:
+            status = f"TIMEOUT ({timeout.action_name})"
+        seconds = time.perf_counter() - start
+        if status != "ok" or seconds > bound:
+            failed += 1
+            status = status if status != "ok" else "TOO SLOW"
+        print(f"{label:<28} {len(text) // 1024:>5} KB  {seconds * 1000:>8.0f} ms  {status}")
+
+    if failed:
+        raise SystemExit(f"{failed} input(s) over the bound")
+
+
+if __name__ == "__main__":
+    main()
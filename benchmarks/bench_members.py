@@ -0,0 +1,81 @@
+"""Benchmark: anonymize_members on a large C# class, one re.sub per name vs one pass
+
+Generates a C# class with a few thousand methods, properties and fields,
+then times the replacement step the way it used to run (a whole-word
+re.sub over the text per discovered name) against the single trie-regex
+pass the engine makes now, and checks both give the same text.
+
+Usage: python benchmarks/bench_members.py [members]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codeblur.engine import Engine, load_known_words  # noqa: E402
+from codeblur.trie import trie_pattern  # noqa: E402
+
+
+def build_class(members):
+    """C# class with members/3 each of methods, properties and fields, all cross-referenced"""
+    count = members // 3
+    lines = ["namespace Shop.Orders", "{", "    public class OrderRepository", "    {"]
+    for i in range(count):
+        lines.append(f"        private int _cacheSlot{i};")
+        lines.append(f"        public string CustomerLabel{i} {{ get; set; }}")
+    for i in range(count):
+        lines.append(f"        public int LoadOrderBatch{i}(int customerId)")
+        lines.append("        {")
+        lines.append(f"            _cacheSlot{i} = customerId + _cacheSlot{(i + 1) % count};")
+        lines.append(f"            CustomerLabel{i} = CustomerLabel{(i + 7) % count};")
+        lines.append(f"            return LoadOrderBatch{(i + 3) % count}(_cacheSlot{i});")
+        lines.append("        }")
+    lines += ["    }", "}", ""]
+    return "\n".join(lines)
+
+
+def old_replace(text, placeholders):
+    """Replacement as it was: one whole-word re.sub over the text per name"""
+    for name, placeholder in placeholders.items():
+        text = re.sub(r'\b' + re.escape(name) + r'\b', placeholder, text)
+    return text
+
+
+def new_replace(text, placeholders):
+    """Replacement as it is now: every name in one trie regex, dict lookup per match"""
+    pattern = re.compile(r'\b(?:' + trie_pattern(placeholders) + r')\b')
+    return pattern.sub(lambda match: placeholders[match.group(0)], text)
+
+
+def timed(func, *args):
+    """Result and seconds of one call"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    text = build_class(members)
+
+    # The names and placeholders the action discovers on this text
+    random.seed(1)
+    engine = Engine({}, load_known_words(), language="csharp")
+    (result, _), seconds = timed(engine.run_action, "anonymize_members", text)
+    placeholders = {name: engine.mappings[name] for name in engine.mappings}
+    print(f"{len(placeholders)} members, {len(text) // 1024} KB of C#")
+    print(f"anonymize_members (whole action): {seconds * 1000:9.1f} ms")
+
+    old, old_seconds = timed(old_replace, text, placeholders)
+    new, new_seconds = timed(new_replace, text, placeholders)
+    if old != new or new != result:
+        raise SystemExit("results differ")
+    print(f"replacement, re.sub per name:     {old_seconds * 1000:9.1f} ms")
+    print(f"replacement, one trie pass:       {new_seconds * 1000:9.1f} ms  ({old_seconds / new_seconds:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
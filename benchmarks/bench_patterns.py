@@ -0,0 +1,123 @@
+"""Micro-benchmark: call-time regexes vs the precompiled module patterns
+
+Times the per-token checks the passes make (placeholder recognition,
+comment placeholder check, camelCase split) the way they used to run
+(import re + pattern string per call) against the compiled patterns in
+codeblur.engine, and one full BLUR..SKELETON run for scale.
+
+Usage: python benchmarks/bench_patterns.py [iterations]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codeblur.engine import (  # noqa: E402
+    CAMEL_CASE_PARTS, COMMENT_PLACEHOLDER, PLACEHOLDER, Engine, load_known_words,
+)
+
+
+# Words as the identifier pass sees them (mostly not placeholders)
+WORDS = ["customerId", "ENTITY042", "getHttpResponse", "PERSON001", "x", "OrderLineItem", "FIELD003", "userName"]
+
+# Comment tokens as remove_comments sees them
+COMMENTS = ["// Load the order lines", "/* COMMENT001 */", "# retry on timeout", "-- COMMENT012", "/// <summary>"]
+
+SAMPLE = '''using System;
+
+namespace Shop.Orders
+{
+    // Loads orders for a customer
+    public class OrderService
+    {
+        private readonly ILogger<OrderService> _logger;
+        public string ConnectionString { get; set; }
+
+        public async Task<Order> LoadOrderAsync(int customerId)
+        {
+            /* Retry once on timeout */
+            var path = "/var/data/orders";
+            var id = "3f2504e0-4f89-11d3-9a0c-0305e82c3301";
+            return await _repository.FindAsync(customerId, path, id);
+        }
+    }
+}
+'''
+
+
+def old_is_obfuscated_identifier(word):
+    """Placeholder check as it was: pattern built and looked up per call"""
+    import re
+    categories = ['PERSON', 'ENTITY', 'ORG', 'ITEM', 'NAME', 'ID', 'REF', 'GUID', 'COMMENT', 'BODY', 'PATH', 'FUNC', 'PROP', 'FIELD']
+    pattern = r'^(' + '|'.join(categories) + r')\d+$'
+    return bool(re.match(pattern, word))
+
+
+def old_is_comment_placeholder(comment_text):
+    """Comment placeholder check as it was: one re.match per comment style"""
+    import re
+    return bool(
+        re.match(r'^/\*\s*COMMENT\d+\s*\*/$', comment_text)
+        or re.match(r'^//\s*COMMENT\d+\s*$', comment_text)
+        or re.match(r'^#\s*COMMENT\d+\s*$', comment_text)
+        or re.match(r'^///\s*COMMENT\d+\s*$', comment_text)
+        or re.match(r'^--\s*COMMENT\d+\s*$', comment_text)
+        or re.match(r'^<!--\s*COMMENT\d+\s*-->$', comment_text)
+        or re.match(r"^'\s*COMMENT\d+\s*$", comment_text)
+        or re.match(r'^REM\s+COMMENT\d+\s*$', comment_text, re.IGNORECASE)
+    )
+
+
+def old_split_camel_case(word):
+    """camelCase split as it was: module-level re.findall with a pattern string"""
+    import re
+    return re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z][a-z]|\d|\W|$)|\d+', word)
+
+
+def per_call_ns(func, items, iterations):
+    """Average nanoseconds per call of func over items"""
+    seconds = timeit.timeit(lambda: [func(item) for item in items], number=iterations)
+    return seconds * 1e9 / (iterations * len(items))
+
+
+def compare(label, old, new, items, iterations):
+    """Check old and new agree, then print both timings"""
+    for item in items:
+        if bool(old(item)) != bool(new(item)):
+            raise SystemExit(f"{label}: results differ for {item!r}")
+    old_ns = per_call_ns(old, items, iterations)
+    new_ns = per_call_ns(new, items, iterations)
+    print(f"{label:<28} {old_ns:9.0f} ns  {new_ns:9.0f} ns  {old_ns / new_ns:6.1f}x")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print(f"{'per token':<28} {'per call':>12}  {'compiled':>12}  speedup")
+    compare("placeholder recognizer", old_is_obfuscated_identifier,
+            lambda word: PLACEHOLDER.fullmatch(word), WORDS, iterations)
+    compare("comment placeholder check", old_is_comment_placeholder,
+            lambda text: COMMENT_PLACEHOLDER.fullmatch(text), COMMENTS, iterations)
+    compare("camelCase split", old_split_camel_case,
+            CAMEL_CASE_PARTS.findall, WORDS, iterations)
+
+    # Whole pipeline on a small file, for scale
+    known_words = load_known_words()
+    text = SAMPLE * 50
+
+    def run_all_levels():
+        random.seed(1)
+        engine = Engine({}, known_words)
+        result = text
+        for level in sorted(Engine.OBFUSCATION_LEVELS):
+            result, _ = engine.run_level(level, result)
+
+    runs = 5
+    seconds = timeit.timeit(run_all_levels, number=runs) / runs
+    print(f"\nlevels 1-5 on {len(text) // 1024} KB: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
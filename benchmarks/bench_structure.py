@@ -0,0 +1,125 @@
+"""Benchmark: declaration regexes vs the tree-sitter backend on large C# / TypeScript files
+
+Times finding the declarations alone (the four declaration regexes over
+the code view vs one parse + query), then anonymize_members and
+remove_function_bodies end to end with the regexes
+(Engine.use_tree_sitter = False) and with tree-sitter, with the number
+of names / bodies each found.
+
+tree-sitter is optional: pip install tree-sitter tree-sitter-c-sharp
+tree-sitter-typescript. Without it only the regex timings are printed.
+
+Usage: python benchmarks/bench_structure.py [classes]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codeblur.engine import CS_FIELD, CS_METHOD, CS_PROPERTY, TS_METHOD, Engine, load_known_words  # noqa: E402
+from codeblur.languages import create_lexer  # noqa: E402
+from codeblur.structure import available, find_members  # noqa: E402
+
+
+CS_CLASS = '''public class OrderService{i} : IOrderService
+{{
+    private readonly ILogger<OrderService{i}> _logger{i};
+    private int _retryCount{i} = 3;
+    public string CustomerName{i} {{ get; set; }}
+
+    public async Task<List<Order>> LoadOrders{i}(Guid customerId, string region)
+    {{
+        foreach (var order in _repository.Find(customerId))
+        {{
+            if (order.Region == region) {{ _retryCount{i}++; }}
+        }}
+        return await _repository.FindAsync(customerId, "/api/orders/{{id}}");
+    }}
+
+    private static decimal ComputeTotal{i}(IEnumerable<Order> orders) where T : class
+    {{
+        return orders.Sum(o => o.Amount);
+    }}
+}}
+
+'''
+
+TS_CLASS = '''export class OrderStore{i} {{
+    private cache{i}: Map<string, Order> = new Map();
+
+    async loadOrders{i}(customerId: string, region: string): Promise<Order[]> {{
+        for (const order of await this.api.find(customerId)) {{
+            if (order.region === region) {{ this.cache{i}.set(order.id, order); }}
+        }}
+        return [...this.cache{i}.values()];
+    }}
+
+    static computeTotal{i}(orders: Order[]): number {{
+        return orders.reduce((sum, o) => sum + o.amount, 0);
+    }}
+}}
+
+export function formatOrder{i}(order: Order): string {{
+    return `${{order.id}}: ${{order.amount}}`;
+}}
+
+'''
+
+
+def timed(func, *args):
+    """Result and seconds of one call"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def regex_members(text, language):
+    """Declaration regex matches over the code view, as anonymize_members runs them"""
+    code = create_lexer(language).code_view(text)
+    return [match.group(1) for pattern in (CS_METHOD, CS_PROPERTY, CS_FIELD, TS_METHOD)
+            for match in pattern.finditer(code)]
+
+
+def run(language, text, use_tree_sitter):
+    """Seconds and (names, bodies) found by anonymize_members + remove_function_bodies"""
+    engine = Engine({}, load_known_words(), language=language)
+    engine.use_tree_sitter = use_tree_sitter
+    start = time.perf_counter()
+    text, members = engine.run_action("anonymize_members", text)
+    _, bodies = engine.run_action("remove_function_bodies", text)
+    return time.perf_counter() - start, len(members), len(bodies)
+
+
+def report(label, text, backend, seconds, found=""):
+    """One result row"""
+    print(f"{label:<28} {len(text) // 1024:>5} KB  {backend:<12} {seconds * 1000:>7.0f} ms  {found}")
+
+
+def main():
+    classes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cases = [
+        ("C#", "csharp", "".join(CS_CLASS.format(i=i) for i in range(classes))),
+        ("TypeScript", "typescript", "".join(TS_CLASS.format(i=i) for i in range(classes))),
+    ]
+
+    for label, language, text in cases:
+        has_tree_sitter = available(language)
+
+        matches, seconds = timed(regex_members, text, language)
+        report(f"{label} declarations", text, "regex", seconds, f"{len(matches)} matches")
+        if has_tree_sitter:
+            members, seconds = timed(find_members, text, language)
+            report(f"{label} declarations", text, "tree-sitter", seconds, f"{len(members)} names")
+
+        for backend, use_tree_sitter in [("regex", False)] + [("tree-sitter", True)] * has_tree_sitter:
+            seconds, names, bodies = run(language, text, use_tree_sitter)
+            report(f"{label} members + bodies", text, backend, seconds, f"{names} names, {bodies} bodies")
+
+        if not has_tree_sitter:
+            print(f"  (tree-sitter grammar for {language} not installed)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
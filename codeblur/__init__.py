@@ -2,8 +2,14 @@
 CodeBlur - A powerful GUI tool for obfuscating and deobfuscating code strings
 """
 
-from .codeblur import main
+from .engine import Engine
 
 __version__ = "1.0.1"
 __author__ = "CodeBlur Team"
-__all__ = ["main"]
+__all__ = ["main", "Engine"]
+
+
+def main():
+    """Launch the CodeBlur GUI (Tk is only imported when the GUI is used)"""
+    from .codeblur import main as gui_main
+    gui_main()
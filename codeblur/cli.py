@@ -0,0 +1,268 @@
+import argparse
+import os
+import random
+import sys
+
+from .engine import Engine, get_app_data_dir, load_known_words
+from .languages import LANGUAGES, detect_language
+from .mappings import MappingConflict, load_mappings, save_mappings
+
+
+def parse_level(value):
+    """Turn a level name (PHANTOM) or number (3) into a level number"""
+    levels = Engine.OBFUSCATION_LEVELS
+    if value.isdigit() and int(value) in levels:
+        return int(value)
+    for number, config in levels.items():
+        if config["name"].lower() == value.lower():
+            return number
+    names = ", ".join(config["name"] for config in levels.values())
+    raise argparse.ArgumentTypeError(f"unknown level '{value}' (choose from {names} or 1-{max(levels)})")
+
+
+def default_mappings_file():
+    """Mappings file shared with the GUI"""
+    return os.path.join(get_app_data_dir(), "obfuscation_mappings.db")
+
+
+def iter_input_files(paths):
+    """Yield (path, relative_path) for every file under the given paths"""
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                # Skip hidden directories (.git, .venv, ...)
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+                for filename in sorted(filenames):
+                    full_path = os.path.join(dirpath, filename)
+                    yield full_path, os.path.relpath(full_path, path)
+        else:
+            yield path, os.path.basename(path)
+
+
+def read_text(path):
+    """Read a text file (None for binary/undecodable files)"""
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        return None
+
+
+def write_text(path, text):
+    """Write a text file, creating parent directories"""
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def is_stdin(args):
+    """Check if the input is stdin (no paths or '-')"""
+    return not args.paths or args.paths == ['-']
+
+
+def is_single_file(args):
+    """Check if the input is exactly one file"""
+    return len(args.paths) == 1 and os.path.isfile(args.paths[0])
+
+
+def check_output(args):
+    """Exit status 2 (after printing why) if several inputs have no output directory"""
+    if not is_stdin(args) and not is_single_file(args) and not args.output:
+        print("codeblur: an output directory (-o) is required for several files or a directory", file=sys.stderr)
+        return 2
+    return 0
+
+
+def iter_jobs(args):
+    """Yield (input path, relative path, output path) for the CLI inputs (None = stdin/stdout)"""
+    # stdin -> stdout
+    if is_stdin(args):
+        yield None, None, args.output
+        return
+
+    single_file = is_single_file(args)
+    for path, relative_path in iter_input_files(args.paths):
+        if single_file and args.output and not os.path.isdir(args.output):
+            yield path, relative_path, args.output
+        elif args.output:
+            yield path, relative_path, os.path.join(args.output, relative_path)
+        else:
+            yield path, relative_path, None
+
+
+def process(args, transform):
+    """Run transform over stdin or files/trees and write the results"""
+    status = check_output(args)
+    if status:
+        return status
+
+    for path, relative_path, output_path in iter_jobs(args):
+        if path is None:
+            text = sys.stdin.read()
+        else:
+            text = read_text(path)
+            if text is None:
+                print(f"codeblur: skipping binary file {path}", file=sys.stderr)
+                continue
+
+        text = transform(text, path)
+
+        if output_path:
+            write_text(output_path, text)
+        else:
+            sys.stdout.write(text)
+    return 0
+
+
+def process_streams(args, transform):
+    """Run transform(source, write, path) over stdin or files/trees without loading whole files"""
+    status = check_output(args)
+    if status:
+        return status
+
+    for path, relative_path, output_path in iter_jobs(args):
+        source = sys.stdin if path is None else open(path, 'r', encoding='utf-8', newline='')
+        target = sys.stdout
+        if output_path:
+            parent = os.path.dirname(output_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            target = open(output_path, 'w', encoding='utf-8', newline='')
+        try:
+            transform(source, target.write, path)
+        except UnicodeDecodeError:
+            print(f"codeblur: skipping binary file {path}", file=sys.stderr)
+            if output_path:
+                target.close()
+                os.remove(output_path)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if target is not sys.stdout:
+                target.close()
+    return 0
+
+
+def create_engine(args):
+    """Engine with the persistent mappings and known words"""
+    known_words = load_known_words(user_words_file=os.path.join(get_app_data_dir(), "custom_words.json"))
+    return Engine(load_mappings(args.mappings), known_words)
+
+
+def store_mappings(args, engine):
+    """Save the engine's mappings; rows another process already took are reported (status 1)"""
+    try:
+        save_mappings(args.mappings, engine.mappings)
+    except MappingConflict as error:
+        print(f"codeblur: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_obfuscate(args):
+    """codeblur obfuscate: run levels 1..N on every input"""
+    engine = create_engine(args)
+    engine.use_tree_sitter = args.tree_sitter
+
+    # Chunked processing for inputs too large to hold in memory
+    if args.stream:
+        from .stream import StreamObfuscator
+        status = process_streams(args, lambda source, write, path: StreamObfuscator(
+            engine, args.level, language=args.language).run(source, write, path))
+        return store_mappings(args, engine) or status
+
+    # Many files go through the per-file pipeline of the process pool whatever the
+    # worker count (-j 1 runs it in this process), so numbering never depends on -j
+    if args.output and not is_stdin(args) and not is_single_file(args):
+        from .parallel import obfuscate_parallel
+        log = lambda message: print(message, file=sys.stderr)
+        stats = obfuscate_parallel(engine, args.paths, args.output, args.level, args.jobs or None, log, args.language)
+        status = store_mappings(args, engine)
+        if args.jobs == 1:
+            return status
+        log(f"codeblur: {stats['files']} files, {stats['bytes'] / (1024 * 1024):.1f} MB in {stats['seconds']:.2f}s "
+            f"({stats['files_per_second']:.1f} files/s, {stats['mb_per_second']:.2f} MB/s)")
+        return status
+
+    def transform(text, path):
+        original = text
+        # Comment/string syntax from --language, the extension or the content
+        engine.language = args.language or detect_language(text, path)
+        # Categories depend only on the file name, as in a tree run
+        engine.rng = random.Random(os.path.basename(path) if path else "")
+        # Levels are cumulative, same as clicking the GUI button N times
+        for level in range(1, args.level + 1):
+            text, _ = engine.run_level(level, text)
+        # Files keep their final newline (STEALTH strips trailing blank lines)
+        if original.endswith('\n') and not text.endswith('\n'):
+            text += '\n'
+        return text
+
+    status = process(args, transform)
+    return store_mappings(args, engine) or status
+
+
+def cmd_deobfuscate(args):
+    """codeblur deobfuscate: restore every placeholder in the inputs"""
+    engine = create_engine(args)
+    if args.stream:
+        from .stream import restore_stream
+        return process_streams(args, lambda source, write, path: restore_stream(engine, source, write))
+    return process(args, lambda text, path: engine.deobfuscate(text))
+
+
+def build_parser():
+    """Argument parser for the codeblur command"""
+    parser = argparse.ArgumentParser(
+        prog="codeblur",
+        description="Obfuscate and deobfuscate code. Run without a command to open the GUI.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_io_arguments(subparser):
+        subparser.add_argument("paths", nargs="*", help="files or directories (default: stdin)")
+        subparser.add_argument("-o", "--output", help="output file or directory (default: stdout)")
+        subparser.add_argument("--mappings", default=default_mappings_file(),
+                               help="mappings file (default: the GUI's mappings file)")
+        subparser.add_argument("--stream", action="store_true",
+                               help="process in chunks with bounded memory (for very large files)")
+
+    obfuscate = subparsers.add_parser("obfuscate", help="obfuscate files, trees or stdin")
+    add_io_arguments(obfuscate)
+    obfuscate.add_argument("--level", type=parse_level, default=1,
+                           help="last level to apply: BLUR, STEALTH, PHANTOM, ANON, SKELETON or 1-5 (default: BLUR)")
+    obfuscate.add_argument("--language", choices=sorted(LANGUAGES),
+                           help="comment/string syntax to use (default: from the extension or content)")
+    obfuscate.add_argument("--tree-sitter", action="store_true",
+                           help="find C#/TypeScript members and bodies with tree-sitter, if installed")
+    obfuscate.add_argument("-j", "--jobs", type=int, default=1,
+                           help="worker processes for directories/many files (0 = one per CPU, default: 1)")
+    obfuscate.set_defaults(func=cmd_obfuscate)
+
+    deobfuscate = subparsers.add_parser("deobfuscate", help="restore obfuscated files, trees or stdin")
+    add_io_arguments(deobfuscate)
+    deobfuscate.set_defaults(func=cmd_deobfuscate)
+
+    return parser
+
+
+def main(argv=None):
+    """Entry point for the codeblur console script"""
+    args = build_parser().parse_args(argv)
+
+    # No command: open the GUI as before
+    if args.command is None:
+        from .codeblur import main as gui_main
+        gui_main()
+        return 0
+
+    mappings_dir = os.path.dirname(args.mappings)
+    if mappings_dir:
+        os.makedirs(mappings_dir, exist_ok=True)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import pyperclip
-import json
 import os
-import random
 import string
 import threading
 
+from .highlight import Highlighter
+from .history import UndoHistory
+from .languages import detect_language
+from .engine import (
+    DEFAULT_WORD_FILES,
+    ActionTimeout,
+    Cancelled,
+    Engine,
+    get_app_data_dir,
+    get_default_known_words,
+    load_known_words,
+)
+from .mappings import MappingOverlay, MappingSaver, load_mappings
+
 class CodeBlur:
-    # =========================================================================
-    # OBFUSCATION LEVELS CONFIGURATION
-    # =========================================================================
-    # Each level defines what actions to perform when AUTO-OBFUSCATE is clicked.
-    # Levels are cumulative - clicking again advances to the next level.
-    # After all levels are done, clicking again resets to level 0 (no action).
-    #
-    # To add a new level: add an entry here and implement the action method.
-    # Action methods must exist as instance methods (e.g., self._action_obfuscate_identifiers)
-    # =========================================================================
-    OBFUSCATION_LEVELS = {
-        1: {
-            "name": "BLUR",
-            "description": "Obfuscate unknown identifiers (variables, functions, classes)",
-            "actions": ["obfuscate_identifiers"],
-        },
-        2: {
-            "name": "STEALTH",
-            "description": "Replace comments with placeholders and collapse empty lines",
-            "actions": ["remove_comments", "remove_empty_lines"],
-        },
-        3: {
-            "name": "PHANTOM",
-            "description": "Obfuscate string contents, GUIDs, and paths",
-            "actions": ["obfuscate_strings", "obfuscate_guids", "obfuscate_paths"],
-        },
-        4: {
-            "name": "ANON",
-            "description": "Anonymize function names, property names, and field names",
-            "actions": ["anonymize_members"],
-        },
-        5: {
-            "name": "SKELETON",
-            "description": "Remove function/method bodies, keep only signatures",
-            "actions": ["remove_function_bodies"],
-        },
-    }
+    # Obfuscation levels live on the headless Engine (see engine.py);
+    # the GUI just walks through them one click at a time.
+    OBFUSCATION_LEVELS = Engine.OBFUSCATION_LEVELS
+
+    # Seconds one action of a level may take before the level is stopped and rolled back
+    ACTION_TIME_BUDGET = 30
 
     def __init__(self, root):
         self.root = root
@@ -54,7 +35,8 @@ class CodeBlur:
         # Track current obfuscation level (0 = not started)
         self.current_obfuscation_level = 0
 
-        # Loading state for async obfuscation
+        # Loading state for async obfuscation (the running level owns the text
+        # and mappings until it completes - editing actions are ignored meanwhile)
         self.is_obfuscating = False
 
         # Neubrutalist monochrome with blue accent color scheme
@@ -72,34 +54,29 @@ class CodeBlur:
         self.app_data_dir = self.get_app_data_dir()
         os.makedirs(self.app_data_dir, exist_ok=True)
 
-        # Storage file for mappings (in user data dir)
-        self.mappings_file = os.path.join(self.app_data_dir, "obfuscation_mappings.json")
-        self.mappings = self.load_mappings()
+        # Storage database for mappings (in user data dir; an existing
+        # obfuscation_mappings.json is imported on first start)
+        self.mappings_file = os.path.join(self.app_data_dir, "obfuscation_mappings.db")
 
+        # Saves are written on a background thread, rapid ones coalesced
+        self.mappings_saver = MappingSaver(self.mappings_file)
 
         # Known words dictionary (language-agnostic)
         # Multiple word files are merged together
-        package_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # Array of word files to load and merge (in package directory)
-        self.word_files = [
-            os.path.join(package_dir, "known_words.json"),      # Common programming words
-            os.path.join(package_dir, "brand_words.json"),      # Brand/IT company names
-            os.path.join(package_dir, "package_words.json"),    # NuGet/npm package names
-        ]
+        self.word_files = list(DEFAULT_WORD_FILES)
 
         # User can also add custom words in app data dir
         self.user_words_file = os.path.join(self.app_data_dir, "custom_words.json")
 
-        self.known_words = self.load_all_known_words()
+        # Headless engine owns mappings and known words and runs every pass
+        self.engine = Engine(self.load_mappings(), self.load_all_known_words())
 
         # State tracking for 3-state button (CLEAR -> CONFIRM -> CLOSE)
         self.clear_button_state = 0  # 0=clear, 1=confirm, 2=close
         self.clear_button = None
 
-        # Undo history - stores (text_content, mappings) tuples
-        self.undo_stack = []
-        self.max_undo_levels = 20
+        # Undo/redo history - text diffs and mapping deltas, capped by count and bytes
+        self.history = UndoHistory()
 
         # Create UI
         self.create_widgets()
@@ -107,133 +84,50 @@ class CodeBlur:
         # Load clipboard on startup
         self.load_clipboard()
 
-    def get_app_data_dir(self):
-        """Get cross-platform app data directory"""
-        import platform
-        system = platform.system()
+        # Closing the window writes any queued save first
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
-        if system == "Windows":
-            base = os.environ.get("APPDATA", os.path.expanduser("~"))
-        elif system == "Darwin":  # macOS
-            base = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
-        else:  # Linux and others
-            base = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+    @property
+    def mappings(self):
+        """Current original -> placeholder mappings (owned by the engine)"""
+        return self.engine.mappings
 
-        return os.path.join(base, "codeblur")
+    @mappings.setter
+    def mappings(self, value):
+        self.engine.mappings = value
+
+    @property
+    def known_words(self):
+        """Known words dictionary (owned by the engine)"""
+        return self.engine.known_words
+
+    @known_words.setter
+    def known_words(self, value):
+        self.engine.known_words = value
+
+    def get_app_data_dir(self):
+        """Get cross-platform app data directory"""
+        return get_app_data_dir()
 
     def load_mappings(self):
-        """Load existing mappings from JSON file"""
-        if os.path.exists(self.mappings_file):
-            try:
-                with open(self.mappings_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        """Load existing mappings from the mappings database"""
+        return load_mappings(self.mappings_file)
 
     def save_mappings(self):
-        """Save mappings to JSON file"""
-        with open(self.mappings_file, 'w', encoding='utf-8') as f:
-            json.dump(self.mappings, f, indent=2, ensure_ascii=False)
+        """Queue a save of the changed mappings (written in the background)"""
+        self.mappings_saver.save(self.mappings)
 
     def load_all_known_words(self):
         """Load and merge all known words from multiple files"""
-        all_words = set()
-
-        # Load from each word file in the array
-        for word_file in self.word_files:
-            if os.path.exists(word_file):
-                try:
-                    with open(word_file, 'r', encoding='utf-8') as f:
-                        words = json.load(f)
-                        all_words.update(words)
-                except:
-                    pass
-
-        # Load user's custom words if exists
-        if os.path.exists(self.user_words_file):
-            try:
-                with open(self.user_words_file, 'r', encoding='utf-8') as f:
-                    words = json.load(f)
-                    all_words.update(words)
-            except:
-                pass
-
-        # If no words loaded, use hardcoded defaults
-        if not all_words:
-            all_words = self.get_default_known_words()
-
-        return all_words
+        return load_known_words(self.word_files, self.user_words_file)
 
     def get_default_known_words(self):
         """Return default set of known words (generic, language-agnostic)"""
-        return {
-            # Common programming verbs
-            "get", "set", "is", "has", "can", "should", "will", "did",
-            "on", "off", "add", "remove", "create", "delete", "update",
-            "find", "fetch", "load", "save", "send", "receive",
-            "start", "stop", "init", "reset", "clear", "close", "open",
-            "show", "hide", "toggle", "enable", "disable",
-            "click", "change", "submit", "focus", "blur",
-            "render", "mount", "unmount", "destroy",
-            "push", "pop", "shift", "slice", "splice", "concat",
-            "join", "split", "trim", "replace", "match", "test", "search",
-            "parse", "stringify", "encode", "decode",
-            "extend", "implement", "override",
-            # Common nouns
-            "data", "info", "list", "item", "items", "array", "object",
-            "error", "success", "fail", "complete", "pending",
-            "event", "handler", "listener", "callback",
-            "request", "response", "status", "message",
-            "id", "key", "value", "index", "length", "size", "count",
-            "name", "type", "state", "config", "options",
-            "result", "output", "input", "params", "args",
-            "url", "path", "route", "query", "body", "header",
-            "text", "font", "style", "display", "position",
-            "component", "module", "service", "controller", "model", "view",
-            "min", "max", "sum", "avg", "total", "current", "next", "prev",
-            "first", "last", "before", "after",
-            "timeout", "interval", "delay", "wait",
-            # Common prepositions/connectors
-            "to", "from", "by", "with", "in", "out", "up", "down",
-            "all", "any", "some", "none", "each", "every",
-            # Common suffixes/prefixes
-            "async", "sync", "Async", "Sync",
-            "local", "global", "public", "private", "static",
-            # Common keywords (multi-language)
-            "true", "false", "null", "new", "this", "self",
-            "if", "else", "for", "while", "do", "switch", "case",
-            "try", "catch", "finally", "throw", "return",
-            "function", "class", "const", "let", "var",
-            "import", "export", "default", "require",
-        }
+        return get_default_known_words()
 
     def generate_ai_identifier(self, original_word):
         """Generate AI-like identifier for anonymization"""
-        # Check if we already have a mapping
-        if original_word in self.mappings:
-            return self.mappings[original_word]
-
-        # Generate patterns like: PERSON001, ENTITY042, etc. (no underscores)
-        categories = ['PERSON', 'ENTITY', 'ORG', 'ITEM', 'NAME', 'ID', 'REF']
-        category = random.choice(categories)
-
-        # Find next available number for this category
-        existing_nums = []
-        for mapped_value in self.mappings.values():
-            if mapped_value.startswith(category) and len(mapped_value) > len(category):
-                try:
-                    # Extract number after category name
-                    num_part = mapped_value[len(category):]
-                    if num_part.isdigit():
-                        existing_nums.append(int(num_part))
-                except:
-                    pass
-
-        next_num = max(existing_nums) + 1 if existing_nums else 1
-        new_identifier = f"{category}{next_num:03d}"
-
-        return new_identifier
+        return self.engine.generate_ai_identifier(original_word)
 
     def create_neubrutalist_button(self, parent, text, command, bg_color):
         """Create a Neubrutalist style button with thick border and solid shadow"""
@@ -317,7 +211,7 @@ class CodeBlur:
         self.text_area = tk.Text(
             text_border_frame,
             wrap=tk.WORD,
-            yscrollcommand=scrollbar.set,
+            yscrollcommand=lambda first, last: self.on_text_scrolled(scrollbar, first, last),
             font=("Consolas", 11),
             bg="#FFFFFF",
             fg=self.text_color,
@@ -340,8 +234,10 @@ class CodeBlur:
         # Bind mouse click event
         self.text_area.bind("<Button-1>", self.on_text_clicked)
 
-        # Bind Ctrl+Z for undo
+        # Bind Ctrl+Z for undo, Ctrl+Y / Ctrl+Shift+Z for redo
         self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())
 
         # Bind Ctrl+V to load clipboard
         self.root.bind("<Control-v>", lambda e: self.load_clipboard())
@@ -371,67 +267,100 @@ class CodeBlur:
             borderwidth=1
         )
 
+        # Highlighting only tags the visible lines (re-tagged on scroll/resize/typing)
+        self.highlighter = Highlighter(self.text_area, self.is_mapped_placeholder)
+        self.text_area.bind("<Configure>", lambda e: self.highlighter.schedule_refresh())
+        self.text_area.bind("<KeyRelease>", self.on_text_edited)
+
+    def is_mapped_placeholder(self, word):
+        """Check if a word is one of the current placeholders (O(1) reverse index lookup)"""
+        return self.mappings.has_placeholder(word)
+
+    def on_text_scrolled(self, scrollbar, first, last):
+        """Keep the scrollbar in sync and tag newly visible lines"""
+        scrollbar.set(first, last)
+        if hasattr(self, "highlighter"):
+            self.highlighter.schedule_refresh()
+
+    def on_text_edited(self, event):
+        """Re-highlight the line being typed on"""
+        line = int(self.text_area.index(tk.INSERT).split('.')[0])
+        self.highlighter.mark_dirty(line)
+
     def save_state(self):
-        """Save current state to undo stack"""
-        text_content = self.text_area.get(1.0, "end-1c")
-        mappings_copy = dict(self.mappings)
-        self.undo_stack.append((text_content, mappings_copy))
+        """Start an undo step for the action about to run"""
+        self.history.begin(self.text_area.get(1.0, "end-1c"), self.mappings)
+
+    def rollback_state(self):
+        """Return to the last save_state point and drop its step (the action was abandoned)"""
+        text_content = self.history.discard()
 
-        # Limit undo stack size
-        if len(self.undo_stack) > self.max_undo_levels:
-            self.undo_stack.pop(0)
+        # Only the text may differ (typing while the action ran)
+        if text_content is not None and self.text_area.get(1.0, "end-1c") != text_content:
+            self.replace_text(text_content)
 
     def undo(self):
         """Undo last action"""
-        if not self.undo_stack:
+        if self.is_obfuscating:
             return
 
-        # Get previous state
-        text_content, mappings = self.undo_stack.pop()
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
+        # Mappings are put back in place (counters kept, so undone numbers are not reused)
+        text_content = self.history.undo(self.text_area.get(1.0, "end-1c"), self.mappings)
+        if text_content is None:
+            return
 
-        # Restore previous state
-        self.mappings = mappings
         self.save_mappings()
+        self.replace_text(text_content)
 
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
+    def redo(self):
+        """Redo the last undone action"""
+        if self.is_obfuscating:
+            return
 
-        # Restore scroll position
-        self.text_area.yview_moveto(scroll_position[0])
+        text_content = self.history.redo(self.text_area.get(1.0, "end-1c"), self.mappings)
+        if text_content is None:
+            return
 
-        # Re-highlight
-        self.highlight_obfuscated_text()
+        self.save_mappings()
+        self.replace_text(text_content)
 
     def load_clipboard(self):
         """Load text from clipboard"""
+        if self.is_obfuscating:
+            return
+
         try:
             clipboard_text = pyperclip.paste()
             if clipboard_text:
                 self.save_state()
                 self.text_area.delete(1.0, tk.END)
                 self.text_area.insert(1.0, clipboard_text)
+                # Sniff the language once per paste (comment/string syntax for every level)
+                self.engine.language = detect_language(clipboard_text)
                 self.apply_existing_mappings()
                 # Always start at level 0
                 self.reset_obfuscation_level()
         except Exception as e:
             pass
 
-    def apply_existing_mappings(self):
-        """Apply existing mappings to the loaded text (camelCase-aware)"""
-        import re
-        text_content = self.text_area.get(1.0, "end-1c")
+    def replace_text(self, text_content):
+        """Replace the text area content, keeping scroll position and highlights"""
+        # Save current scroll position
+        scroll_position = self.text_area.yview()
 
-        # Find all identifiers and apply mappings through camelCase splitting
-        identifier_pattern = r'\b[a-zA-Z_][a-zA-Z0-9_]*\b'
+        self.text_area.delete(1.0, tk.END)
+        self.text_area.insert(1.0, text_content)
 
-        def replace_with_mappings(match):
-            word = match.group(0)
-            return self.apply_mappings_to_word(word)
+        # Restore scroll position
+        self.text_area.yview_moveto(scroll_position[0])
 
-        text_content = re.sub(identifier_pattern, replace_with_mappings, text_content)
+        # Highlight obfuscated text
+        self.highlight_obfuscated_text()
+
+    def apply_existing_mappings(self):
+        """Apply existing mappings to the loaded text (camelCase-aware)"""
+        text_content = self.text_area.get(1.0, "end-1c")
+        text_content = self.engine.apply_existing_mappings(text_content)
 
         self.text_area.delete(1.0, tk.END)
         self.text_area.insert(1.0, text_content)
@@ -439,52 +368,12 @@ class CodeBlur:
 
     def apply_mappings_to_word(self, word):
         """Apply existing mappings to a word (camelCase-aware, no new mappings created)"""
-        # Check if whole word is already obfuscated
-        if word in self.mappings.values():
-            return word
-
-        # Check if whole word has a mapping
-        if word in self.mappings:
-            return self.mappings[word]
-
-        # Check if it's an obfuscated identifier pattern
-        if self.is_obfuscated_identifier(word):
-            return word
-
-        # Split into camelCase parts
-        parts = self.split_camel_case(word)
-
-        if len(parts) <= 1:
-            # Single word - check if it has a mapping
-            if word in self.mappings:
-                return self.mappings[word]
-            return word
-
-        # Process composite word - apply existing mappings to parts
-        result_parts = []
-        for part in parts:
-            if self.is_obfuscated_identifier(part):
-                result_parts.append(part)
-            elif part.isdigit():
-                result_parts.append(part)
-            elif part in self.mappings:
-                result_parts.append(self.mappings[part])
-            else:
-                result_parts.append(part)
-
-        return ''.join(result_parts)
+        return self.engine.apply_mappings_to_word(word)
 
     def highlight_obfuscated_text(self):
         """Highlight all obfuscated text in the text area"""
-        for obfuscated in self.mappings.values():
-            start = "1.0"
-            while True:
-                start = self.text_area.search(obfuscated, start, tk.END)
-                if not start:
-                    break
-                end = f"{start}+{len(obfuscated)}c"
-                self.text_area.tag_add("obfuscated", start, end)
-                start = end
+        # Text or mappings changed - drop old tags and re-tag the viewport
+        self.highlighter.invalidate()
         # Update clear button count
         self.update_clear_button_text()
 
@@ -518,17 +407,13 @@ class CodeBlur:
 
     def on_text_clicked(self, event):
         """Handle text click event - obfuscate or deobfuscate word"""
+        if self.is_obfuscating:
+            return
+
         word = self.get_word_at_click(event)
         if word and len(word) > 0:
-            # Check if the word is already obfuscated
-            is_obfuscated = False
-            for original, obfuscated in self.mappings.items():
-                if obfuscated == word:
-                    is_obfuscated = True
-                    break
-
             # If word is already obfuscated, deobfuscate it
-            if is_obfuscated:
+            if self.mappings.has_placeholder(word):
                 self.deobfuscate_word(word)
             else:
                 self.obfuscate_word(word)
@@ -538,285 +423,152 @@ class CodeBlur:
         # Save state before making changes
         self.save_state()
 
-        # Generate identifier
-        identifier = self.generate_ai_identifier(word)
-
-        # Store mapping
-        self.mappings[word] = identifier
-        self.save_mappings()
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Replace in text and count occurrences
         text_content = self.text_area.get(1.0, "end-1c")
-        count = text_content.count(word)
-        text_content = text_content.replace(word, identifier)
-
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-
-        # Restore scroll position
-        self.text_area.yview_moveto(scroll_position[0])
+        text_content = self.engine.obfuscate_word(text_content, word)
+        self.save_mappings()
 
-        # Highlight obfuscated text
-        self.highlight_obfuscated_text()
+        self.replace_text(text_content)
 
     def auto_obfuscate_strings(self):
         """Auto-obfuscate all string contents (text within quotes)"""
-        import re
+        if self.is_obfuscating:
+            return
 
         # Save state before making changes
         self.save_state()
 
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Find all comment regions to exclude from obfuscation
-        comment_ranges = []
-
-        # Multi-line comments (/* ... */)
-        for match in re.finditer(r'/\*.*?\*/', text_content, re.DOTALL):
-            comment_ranges.append((match.start(), match.end()))
-
-        # Single-line comments (// and ///)
-        for match in re.finditer(r'//[^\n]*', text_content):
-            comment_ranges.append((match.start(), match.end()))
-
-        # Python comments (#)
-        for match in re.finditer(r'#[^\n]*', text_content):
-            comment_ranges.append((match.start(), match.end()))
-
-        def is_in_comment(pos):
-            """Check if a position is within any comment range"""
-            return any(start <= pos < end for start, end in comment_ranges)
-
-        def has_interpolation(content):
-            """Check if string has interpolation syntax like {variable}"""
-            return '{' in content and '}' in content
-
-        # Find all strings within quotes (both single and double quotes)
-        # Pattern matches strings with proper escape handling
-        # Matches: "string content" or 'string content' including escaped quotes
-        # Important: [^"\\\n\r] prevents matching across line breaks
-        double_quote_pattern = r'"(?:[^"\\\n\r]|\\[^\n\r])*"'
-        single_quote_pattern = r"'(?:[^'\\\n\r]|\\[^\n\r])*'"
-
-        strings_to_replace = []
-
-        # Find double-quoted strings
-        for match in re.finditer(double_quote_pattern, text_content):
-            # Skip if string is inside a comment
-            if is_in_comment(match.start()):
-                continue
-
-            full_string = match.group(0)
-            string_content = full_string[1:-1]  # Remove quotes
-
-            # Skip empty strings, already obfuscated strings, and interpolated strings
-            if (string_content and
-                not any(string_content == obf for obf in self.mappings.values()) and
-                not has_interpolation(string_content)):
-                strings_to_replace.append((match.start(), match.end(), full_string, string_content, '"'))
-
-        # Find single-quoted strings
-        for match in re.finditer(single_quote_pattern, text_content):
-            # Skip if string is inside a comment
-            if is_in_comment(match.start()):
-                continue
-
-            full_string = match.group(0)
-            string_content = full_string[1:-1]  # Remove quotes
-
-            # Skip empty strings, already obfuscated strings, and interpolated strings
-            if (string_content and
-                not any(string_content == obf for obf in self.mappings.values()) and
-                not has_interpolation(string_content)):
-                strings_to_replace.append((match.start(), match.end(), full_string, string_content, "'"))
-
-        if not strings_to_replace:
+        original_text = self.text_area.get(1.0, "end-1c")
+        text_content, delta = self.engine.run_action("obfuscate_strings", original_text)
+        if text_content == original_text:
             return
 
-        # Sort by position (reverse order to replace from end to start, avoiding position shifts)
-        strings_to_replace.sort(key=lambda x: x[0], reverse=True)
-
-        # Obfuscate each string
-        obfuscated_count = 0
-        for start, end, full_string, string_content, quote_char in strings_to_replace:
-            # Check if this string content is already mapped
-            if string_content not in self.mappings:
-                identifier = self.generate_ai_identifier(string_content)
-                self.mappings[string_content] = identifier
-                obfuscated_count += 1
-            else:
-                identifier = self.mappings[string_content]
-
-            # Replace the string content in the text
-            new_string = f"{quote_char}{identifier}{quote_char}"
-            text_content = text_content[:start] + new_string + text_content[end:]
-
         # Save mappings
         self.save_mappings()
 
-        # Update text area
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-
-        # Restore scroll position
-        self.text_area.yview_moveto(scroll_position[0])
-
-        # Highlight obfuscated text
-        self.highlight_obfuscated_text()
+        self.replace_text(text_content)
 
     def split_camel_case(self, word):
         """Split camelCase or PascalCase word into parts"""
-        import re
-        # Split on transitions: lowercase->uppercase, or before sequences of uppercase followed by lowercase
-        parts = re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z][a-z]|\d|\W|$)|\d+', word)
-        return parts if parts else [word]
+        return self.engine.split_camel_case(word)
 
     def is_obfuscated_identifier(self, word):
         """Check if word matches our obfuscated identifier pattern (e.g., ENTITY001, PERSON042, GUID001)"""
-        import re
-        # Match pattern: CATEGORY + NUMBERS (e.g., PERSON001, ENTITY042, ORG003, GUID001, COMMENT001, BODY001, PATH001, FUNC001, PROP001, FIELD001)
-        categories = ['PERSON', 'ENTITY', 'ORG', 'ITEM', 'NAME', 'ID', 'REF', 'GUID', 'COMMENT', 'BODY', 'PATH', 'FUNC', 'PROP', 'FIELD']
-        pattern = r'^(' + '|'.join(categories) + r')\d+$'
-        return bool(re.match(pattern, word))
+        return self.engine.is_obfuscated_identifier(word)
 
     def auto_obfuscate_word(self, word):
         """Obfuscate a single word for auto-obfuscate, preserving known parts"""
-        # Check if word matches our obfuscated identifier pattern (idempotent)
-        if self.is_obfuscated_identifier(word):
-            return word
-
-        # Check if word is already an obfuscated value (idempotent - don't re-obfuscate)
-        if word in self.mappings.values():
-            return word
-
-        # Check if the whole word is known (case-insensitive check)
-        if word in self.known_words or word.lower() in {w.lower() for w in self.known_words}:
-            return word
-
-        # Split into camelCase parts
-        parts = self.split_camel_case(word)
-
-        if len(parts) <= 1:
-            # Single word, not in dictionary - obfuscate it
-            if word not in self.mappings:
-                identifier = self.generate_ai_identifier(word)
-                self.mappings[word] = identifier
-            return self.mappings[word]
-
-        # Process composite word - keep known parts, obfuscate unknown
-        result_parts = []
-        unknown_sequence = []
-
-        for part in parts:
-            # Check if this part is an obfuscated identifier (e.g., ENTITY001)
-            if self.is_obfuscated_identifier(part):
-                # Flush any unknown sequence first
-                if unknown_sequence:
-                    unknown_combined = ''.join(unknown_sequence)
-                    if unknown_combined not in self.mappings:
-                        identifier = self.generate_ai_identifier(unknown_combined)
-                        self.mappings[unknown_combined] = identifier
-                    result_parts.append(self.mappings[unknown_combined])
-                    unknown_sequence = []
-                result_parts.append(part)
-                continue
-
-            # Check if this part is pure digits (part of obfuscated identifier like "001" in "ID001")
-            if part.isdigit():
-                # Flush any unknown sequence first
-                if unknown_sequence:
-                    unknown_combined = ''.join(unknown_sequence)
-                    if unknown_combined not in self.mappings:
-                        identifier = self.generate_ai_identifier(unknown_combined)
-                        self.mappings[unknown_combined] = identifier
-                    result_parts.append(self.mappings[unknown_combined])
-                    unknown_sequence = []
-                result_parts.append(part)
-                continue
-
-            # Check if this part is known (case-insensitive)
-            is_known = part in self.known_words or part.lower() in {w.lower() for w in self.known_words}
-
-            if is_known:
-                # If we have accumulated unknown parts, obfuscate them as a group
-                if unknown_sequence:
-                    unknown_combined = ''.join(unknown_sequence)
-                    if unknown_combined not in self.mappings:
-                        identifier = self.generate_ai_identifier(unknown_combined)
-                        self.mappings[unknown_combined] = identifier
-                    result_parts.append(self.mappings[unknown_combined])
-                    unknown_sequence = []
-                result_parts.append(part)
-            else:
-                unknown_sequence.append(part)
-
-        # Handle any remaining unknown parts at the end
-        if unknown_sequence:
-            unknown_combined = ''.join(unknown_sequence)
-            if unknown_combined not in self.mappings:
-                identifier = self.generate_ai_identifier(unknown_combined)
-                self.mappings[unknown_combined] = identifier
-            result_parts.append(self.mappings[unknown_combined])
-
-        return ''.join(result_parts)
+        return self.engine.auto_obfuscate_word(word)
 
     def obfuscate_all(self):
-        """Execute next obfuscation level (each level is idempotent) - async"""
-        # Prevent multiple clicks while processing
+        """Execute next obfuscation level (each level is idempotent) - async
+
+        Clicking again while a level runs cancels it.
+        """
+        # A click while processing cancels the running level
         if self.is_obfuscating:
+            self.cancel_obfuscation()
             return
 
         self.is_obfuscating = True
         max_level = max(self.OBFUSCATION_LEVELS.keys())
+        previous_level = self.current_obfuscation_level
 
         # Advance to next level (cycle back to 1 if at max)
         self.current_obfuscation_level += 1
         if self.current_obfuscation_level > max_level:
             self.current_obfuscation_level = 1
 
-        # Disable button while processing
-        self.set_obfuscate_button_enabled(False)
+        # Button shows progress (and cancels) while processing
+        self.set_obfuscate_button_busy(True)
 
         # Save state before making changes
         self.save_state()
 
-        # Run obfuscation in background thread
-        def do_obfuscation():
-            level_config = self.OBFUSCATION_LEVELS[self.current_obfuscation_level]
-            for action_name in level_config["actions"]:
-                action_method = getattr(self, f"_action_{action_name}", None)
-                if action_method:
-                    action_method()
+        # The worker gets a snapshot: the text, and an overlay that collects new
+        # mappings without touching the live store (the highlighter keeps reading it)
+        text_content = self.text_area.get(1.0, "end-1c")
+        worker = self.engine.fork(MappingOverlay(self.mappings))
+        level = self.current_obfuscation_level
+        level_name = self.OBFUSCATION_LEVELS[level]["name"]
+
+        self.obfuscation_cancel = threading.Event()
+        worker.cancel_event = self.obfuscation_cancel
+        worker.time_budget = self.ACTION_TIME_BUDGET
 
-            # Schedule UI update on main thread
-            self.root.after(0, self.on_obfuscation_complete)
+        # Progress is posted to the main thread once per percent, not per report
+        last_percent = [-1]
+
+        def report(action_name, fraction):
+            percent = int(fraction * 100)
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.root.after(0, self.show_obfuscation_progress, level_name, percent)
+
+        worker.progress = report
+
+        # Run obfuscation in background thread - pure string work, no Tk calls
+        def do_obfuscation():
+            result = None
+            timeout = None
+            try:
+                result, delta = worker.run_level(level, text_content)
+            except ActionTimeout as error:
+                timeout = error
+            except Cancelled:
+                pass
+            finally:
+                # Tk is only touched from the main thread
+                self.root.after(0, self.on_obfuscation_complete, result, worker.mappings, previous_level, timeout)
 
         thread = threading.Thread(target=do_obfuscation, daemon=True)
         thread.start()
 
-    def on_obfuscation_complete(self):
-        """Called when obfuscation is done - update UI"""
+    def cancel_obfuscation(self):
+        """Ask the running level to stop (it rolls back when the worker notices)"""
+        self.obfuscation_cancel.set()
+        self.set_obfuscate_button_text("CANCELLING")
+
+    def on_obfuscation_complete(self, text_content=None, new_mappings=None, previous_level=0, timeout=None):
+        """Called on the main thread when obfuscation is done - apply the result or roll back"""
+        if text_content is not None:
+            # New mappings in creation order (keeps the numbering the worker allocated)
+            for original, placeholder in new_mappings.items():
+                self.mappings[original] = placeholder
+            self.save_mappings()
+
+            # One text + tag update
+            self.replace_text(text_content)
+        else:
+            # Cancelled (or failed): the overlay is dropped, back to the save_state snapshot
+            self.rollback_state()
+            self.current_obfuscation_level = previous_level
+
         self.is_obfuscating = False
 
         # Re-enable and update button text
-        self.set_obfuscate_button_enabled(True)
+        self.set_obfuscate_button_busy(False)
         self.update_obfuscate_button_text()
 
-    def set_obfuscate_button_enabled(self, enabled):
-        """Enable or disable the obfuscate button"""
+        if timeout is not None:
+            messagebox.showwarning("CODEBLUR", f"Stopped: {timeout}. The text was left unchanged.")
+
+    def show_obfuscation_progress(self, level_name, percent):
+        """Show the running level's progress on the obfuscate button"""
+        if self.is_obfuscating and not self.obfuscation_cancel.is_set():
+            self.set_obfuscate_button_text(f"{level_name} {percent}% - CANCEL")
+
+    def set_obfuscate_button_busy(self, busy):
+        """Grey the obfuscate button while a level runs (it stays clickable to cancel)"""
         for widget in self.obfuscate_button.winfo_children():
             if isinstance(widget, tk.Button):
-                if enabled:
-                    widget.config(state=tk.NORMAL, bg="#FF6600")
-                else:
-                    widget.config(state=tk.DISABLED, bg="#CCCCCC")
+                widget.config(bg="#CCCCCC" if busy else "#FF6600")
+                break
+
+    def set_obfuscate_button_text(self, text):
+        """Set the obfuscate button label"""
+        for widget in self.obfuscate_button.winfo_children():
+            if isinstance(widget, tk.Button):
+                widget.config(text=text)
                 break
 
     def update_obfuscate_button_text(self):
@@ -838,932 +590,50 @@ class CodeBlur:
         self.current_obfuscation_level = 0
         self.update_obfuscate_button_text()
 
-    # =========================================================================
-    # OBFUSCATION LEVEL ACTIONS
-    # =========================================================================
-    # Each action method must be named _action_<action_name> where action_name
-    # matches what's in OBFUSCATION_LEVELS config.
-    # =========================================================================
-
-    def _action_obfuscate_identifiers(self):
-        """Action: Obfuscate all unknown identifiers"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Find all identifiers (words starting with letter or underscore)
-        identifier_pattern = r'\b[a-zA-Z_][a-zA-Z0-9_]*\b'
-
-        def replace_identifier(match):
-            word = match.group(0)
-            return self.auto_obfuscate_word(word)
-
-        # Replace all identifiers
-        text_content = re.sub(identifier_pattern, replace_identifier, text_content)
-
-        # Save mappings
-        self.save_mappings()
-
-        # Update text area
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-
-        # Restore scroll position
-        self.text_area.yview_moveto(scroll_position[0])
-
-        # Highlight obfuscated text
-        self.highlight_obfuscated_text()
-
-    def _action_remove_comments(self):
-        """Action: Replace all comments with placeholders (can be deobfuscated)"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Collect all comments with their positions
-        # Order matters: check multi-line before single-line to avoid partial matches
-        comments_to_replace = []
-
-        # Multi-line comments /* ... */ (C, C++, C#, Java, JS, Go, Rust, etc.)
-        for match in re.finditer(r'/\*.*?\*/', text_content, flags=re.DOTALL):
-            comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        # XML/HTML comments <!-- ... -->
-        for match in re.finditer(r'<!--.*?-->', text_content, flags=re.DOTALL):
-            comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        # Lua multi-line comments --[[ ... ]]
-        for match in re.finditer(r'--\[\[.*?\]\]', text_content, flags=re.DOTALL):
-            comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        # C# XML documentation comments /// (must check before //)
-        for match in re.finditer(r'///[^\n]*', text_content):
-            # Check not already covered by multi-line
-            if not any(s <= match.start() < e for s, e, _ in comments_to_replace):
-                comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        # Single-line comments // (C, C++, C#, Java, JS, Go, Rust, etc.)
-        for match in re.finditer(r'//[^\n]*', text_content):
-            # Check not already covered
-            if not any(s <= match.start() < e for s, e, _ in comments_to_replace):
-                comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        # Python/Shell/Ruby comments #
-        # Be careful: # in C# is preprocessor, but usually at line start
-        for match in re.finditer(r'#[^\n]*', text_content):
-            if not any(s <= match.start() < e for s, e, _ in comments_to_replace):
-                comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        # SQL single-line comments -- (but not --[[ which is Lua)
-        for match in re.finditer(r'--(?!\[\[)[^\n]*', text_content):
-            if not any(s <= match.start() < e for s, e, _ in comments_to_replace):
-                comments_to_replace.append((match.start(), match.end(), match.group(0)))
-
-        if not comments_to_replace:
-            return
-
-        # Sort by position (reverse to avoid position shifts)
-        comments_to_replace.sort(key=lambda x: x[0], reverse=True)
-
-        # Replace each comment with placeholder
-        for start, end, comment_text in comments_to_replace:
-            # Skip if already a placeholder
-            if re.match(r'^/\*\s*COMMENT\d+\s*\*/$', comment_text):
-                continue
-            if re.match(r'^//\s*COMMENT\d+\s*$', comment_text):
-                continue
-            if re.match(r'^#\s*COMMENT\d+\s*$', comment_text):
-                continue
-            if re.match(r'^///\s*COMMENT\d+\s*$', comment_text):
-                continue
-            if re.match(r'^--\s*COMMENT\d+\s*$', comment_text):
-                continue
-            if re.match(r'^<!--\s*COMMENT\d+\s*-->$', comment_text):
-                continue
-
-            # Extract just the content (without comment markers)
-            # This way deobfuscate replaces COMMENT001 with just the content
-            if comment_text.startswith('/*') and comment_text.endswith('*/'):
-                comment_content = comment_text[2:-2].strip()
-                comment_style = 'block'
-            elif comment_text.startswith('<!--') and comment_text.endswith('-->'):
-                comment_content = comment_text[4:-3].strip()
-                comment_style = 'html'
-            elif comment_text.startswith('--[[') and comment_text.endswith(']]'):
-                comment_content = comment_text[4:-2].strip()
-                comment_style = 'lua'
-            elif comment_text.startswith('///'):
-                comment_content = comment_text[3:].strip()
-                comment_style = 'xmldoc'
-            elif comment_text.startswith('//'):
-                comment_content = comment_text[2:].strip()
-                comment_style = 'line'
-            elif comment_text.startswith('#'):
-                comment_content = comment_text[1:].strip()
-                comment_style = 'hash'
-            elif comment_text.startswith('--'):
-                comment_content = comment_text[2:].strip()
-                comment_style = 'sql'
-            else:
-                comment_content = comment_text
-                comment_style = 'block'
-
-            # Skip empty comments
-            if not comment_content:
-                continue
-
-            # Skip if content already mapped
-            if comment_content in self.mappings.values():
-                continue
-
-            # Generate or reuse mapping for the CONTENT only
-            if comment_content not in self.mappings:
-                existing_nums = []
-                for mapped_value in self.mappings.values():
-                    if mapped_value.startswith('COMMENT') and len(mapped_value) > 7:
-                        try:
-                            num_part = mapped_value[7:]
-                            if num_part.isdigit():
-                                existing_nums.append(int(num_part))
-                        except:
-                            pass
-                next_num = max(existing_nums) + 1 if existing_nums else 1
-                placeholder = f"COMMENT{next_num:03d}"
-                self.mappings[comment_content] = placeholder
-
-            placeholder = self.mappings[comment_content]
-
-            # Determine comment style for placeholder
-            if comment_style == 'block':
-                replacement = f"/* {placeholder} */"
-            elif comment_style == 'html':
-                replacement = f"<!-- {placeholder} -->"
-            elif comment_style == 'lua':
-                replacement = f"--[[ {placeholder} ]]"
-            elif comment_style == 'xmldoc':
-                replacement = f"/// {placeholder}"
-            elif comment_style == 'line':
-                replacement = f"// {placeholder}"
-            elif comment_style == 'hash':
-                replacement = f"# {placeholder}"
-            elif comment_style == 'sql':
-                replacement = f"-- {placeholder}"
-            else:
-                replacement = f"/* {placeholder} */"
-
-            text_content = text_content[:start] + replacement + text_content[end:]
-
-        self.save_mappings()
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-        self.text_area.yview_moveto(scroll_position[0])
-        self.highlight_obfuscated_text()
-
-    def _action_remove_empty_lines(self):
-        """Action: Remove excessive empty lines and whitespace-only lines"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Remove lines that are only whitespace
-        lines = text_content.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            stripped = line.rstrip()
-            if stripped:
-                cleaned_lines.append(stripped)
-            elif cleaned_lines and cleaned_lines[-1]:
-                # Preserve single blank line between code blocks
-                cleaned_lines.append('')
-
-        text_content = '\n'.join(cleaned_lines)
-
-        # Remove excessive blank lines (more than 1 consecutive)
-        text_content = re.sub(r'\n\s*\n\s*\n+', '\n\n', text_content)
-
-        # Remove trailing empty lines
-        text_content = text_content.rstrip('\n')
-
-        # Update text area
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-
-        # Restore scroll position
-        self.text_area.yview_moveto(scroll_position[0])
-
-        # Re-highlight obfuscated text if any
-        self.highlight_obfuscated_text()
-
-    def _action_obfuscate_strings(self):
-        """Action: Obfuscate string contents"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Find all comment regions to exclude from obfuscation
-        comment_ranges = []
-        for match in re.finditer(r'/\*.*?\*/', text_content, re.DOTALL):
-            comment_ranges.append((match.start(), match.end()))
-        for match in re.finditer(r'//[^\n]*', text_content):
-            comment_ranges.append((match.start(), match.end()))
-        for match in re.finditer(r'#[^\n]*', text_content):
-            comment_ranges.append((match.start(), match.end()))
-
-        def is_in_comment(pos):
-            return any(start <= pos < end for start, end in comment_ranges)
-
-        def has_interpolation(content):
-            return '{' in content and '}' in content
-
-        # Find strings (double and single quotes)
-        double_quote_pattern = r'"(?:[^"\\\n\r]|\\[^\n\r])*"'
-        single_quote_pattern = r"'(?:[^'\\\n\r]|\\[^\n\r])*'"
-
-        strings_to_replace = []
-
-        for match in re.finditer(double_quote_pattern, text_content):
-            if is_in_comment(match.start()):
-                continue
-            full_string = match.group(0)
-            string_content = full_string[1:-1]
-            if (string_content and
-                not any(string_content == obf for obf in self.mappings.values()) and
-                not has_interpolation(string_content)):
-                strings_to_replace.append((match.start(), match.end(), full_string, string_content, '"'))
-
-        for match in re.finditer(single_quote_pattern, text_content):
-            if is_in_comment(match.start()):
-                continue
-            full_string = match.group(0)
-            string_content = full_string[1:-1]
-            if (string_content and
-                not any(string_content == obf for obf in self.mappings.values()) and
-                not has_interpolation(string_content)):
-                strings_to_replace.append((match.start(), match.end(), full_string, string_content, "'"))
-
-        if not strings_to_replace:
-            return
-
-        # Sort by position (reverse to avoid position shifts)
-        strings_to_replace.sort(key=lambda x: x[0], reverse=True)
-
-        for start, end, full_string, string_content, quote_char in strings_to_replace:
-            if string_content not in self.mappings:
-                identifier = self.generate_ai_identifier(string_content)
-                self.mappings[string_content] = identifier
-            else:
-                identifier = self.mappings[string_content]
-            new_string = f"{quote_char}{identifier}{quote_char}"
-            text_content = text_content[:start] + new_string + text_content[end:]
-
-        self.save_mappings()
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-        self.text_area.yview_moveto(scroll_position[0])
-        self.highlight_obfuscated_text()
-
-    def _action_obfuscate_guids(self):
-        """Action: Obfuscate GUIDs/UUIDs with placeholders"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # GUID patterns:
-        # Standard: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
-        # With braces: {xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx}
-        # Without dashes: xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx (32 hex chars)
-        guid_pattern = r'\{?[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\}?'
-
-        guids_found = list(re.finditer(guid_pattern, text_content))
-
-        if not guids_found:
-            return
-
-        # Process in reverse order to avoid position shifts
-        for match in reversed(guids_found):
-            guid = match.group(0)
-
-            # Skip if already obfuscated (is a placeholder)
-            if guid in self.mappings.values():
-                continue
-
-            # Generate or reuse mapping
-            if guid not in self.mappings:
-                # Generate GUID placeholder like GUID001, GUID002
-                existing_nums = []
-                for mapped_value in self.mappings.values():
-                    if mapped_value.startswith('GUID') and len(mapped_value) > 4:
-                        try:
-                            num_part = mapped_value[4:]
-                            if num_part.isdigit():
-                                existing_nums.append(int(num_part))
-                        except:
-                            pass
-                next_num = max(existing_nums) + 1 if existing_nums else 1
-                placeholder = f"GUID{next_num:03d}"
-                self.mappings[guid] = placeholder
-
-            placeholder = self.mappings[guid]
-            text_content = text_content[:match.start()] + placeholder + text_content[match.end():]
-
-        self.save_mappings()
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-        self.text_area.yview_moveto(scroll_position[0])
-        self.highlight_obfuscated_text()
-
-    def _action_obfuscate_paths(self):
-        """Action: Obfuscate file paths, URLs, and API routes"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Get next PATH number
-        existing_nums = []
-        for mapped_value in self.mappings.values():
-            if mapped_value.startswith('PATH') and len(mapped_value) > 4:
-                try:
-                    num_part = mapped_value[4:]
-                    if num_part.isdigit():
-                        existing_nums.append(int(num_part))
-                except:
-                    pass
-        path_counter = max(existing_nums) + 1 if existing_nums else 1
-
-        paths_to_replace = []
-
-        # Pattern for various path formats:
-        # 1. Windows paths: C:\Users\..., \\server\share, ..\folder
-        # 2. Unix paths: /usr/local/..., ./folder, ../folder
-        # 3. URLs: http://, https://, ftp://, file://
-        # 4. API routes: /api/v1/users, /users/{id}
-        # 5. Relative paths: folder/subfolder, ./src/components
-
-        # URLs (http, https, ftp, file, ws, wss)
-        url_pattern = r'(?:https?|ftp|file|wss?)://[^\s\'"<>)}\]]+'
-
-        # Windows absolute paths (C:\, D:\, etc.) - in strings
-        windows_abs_pattern = r'[A-Za-z]:\\(?:[^\\/:*?"<>|\s\'"]|\\)+'
-
-        # UNC paths (\\server\share)
-        unc_pattern = r'\\\\[^\s\'"<>]+'
-
-        # Unix absolute paths (/usr, /home, /var, etc.)
-        unix_abs_pattern = r'(?<=["\'])\/(?:[a-zA-Z0-9_\-./]+)+(?=["\'])'
-
-        # API routes and relative paths starting with /
-        api_route_pattern = r'(?<=["\'])/[a-zA-Z0-9_\-{}./:\[\]@]+(?=["\'])'
-
-        # Relative paths with ./ or ../
-        relative_pattern = r'\.\.?/[a-zA-Z0-9_\-./]+'
-
-        # Generic path-like patterns (folder/file.ext)
-        generic_path_pattern = r'(?<=["\'])[a-zA-Z0-9_\-]+(?:/[a-zA-Z0-9_\-./]+)+(?=["\'])'
-
-        # Find URLs
-        for match in re.finditer(url_pattern, text_content):
-            path = match.group(0)
-            if path and not path.startswith('PATH') and path not in self.mappings.values():
-                paths_to_replace.append((match.start(), match.end(), path))
-
-        # Find Windows paths
-        for match in re.finditer(windows_abs_pattern, text_content):
-            path = match.group(0)
-            if path and not path.startswith('PATH') and path not in self.mappings.values():
-                paths_to_replace.append((match.start(), match.end(), path))
-
-        # Find UNC paths
-        for match in re.finditer(unc_pattern, text_content):
-            path = match.group(0)
-            if path and not path.startswith('PATH') and path not in self.mappings.values():
-                paths_to_replace.append((match.start(), match.end(), path))
-
-        # Find Unix paths (lookbehind for quote)
-        for match in re.finditer(unix_abs_pattern, text_content):
-            path = match.group(0)
-            if path and len(path) > 1 and not path.startswith('PATH') and path not in self.mappings.values():
-                paths_to_replace.append((match.start(), match.end(), path))
-
-        # Find API routes
-        for match in re.finditer(api_route_pattern, text_content):
-            path = match.group(0)
-            if path and len(path) > 1 and not path.startswith('PATH') and path not in self.mappings.values():
-                paths_to_replace.append((match.start(), match.end(), path))
-
-        # Find relative paths
-        for match in re.finditer(relative_pattern, text_content):
-            path = match.group(0)
-            if path and not path.startswith('PATH') and path not in self.mappings.values():
-                paths_to_replace.append((match.start(), match.end(), path))
-
-        # Find generic paths
-        for match in re.finditer(generic_path_pattern, text_content):
-            path = match.group(0)
-            if path and len(path) > 3 and not path.startswith('PATH') and path not in self.mappings.values():
-                # Skip if looks like a version number or simple ratio
-                if not re.match(r'^[0-9.]+$', path):
-                    paths_to_replace.append((match.start(), match.end(), path))
-
-        if not paths_to_replace:
-            return
-
-        # Remove duplicates and sort by position (reverse)
-        seen = set()
-        unique_paths = []
-        for item in paths_to_replace:
-            key = (item[0], item[1])
-            if key not in seen:
-                seen.add(key)
-                unique_paths.append(item)
-
-        unique_paths.sort(key=lambda x: x[0], reverse=True)
-
-        # Replace paths with placeholders
-        for start, end, path in unique_paths:
-            # Skip if already obfuscated
-            if path in self.mappings.values():
-                continue
-
-            # Generate or reuse mapping
-            if path not in self.mappings:
-                placeholder = f"PATH{path_counter:03d}"
-                self.mappings[path] = placeholder
-                path_counter += 1
-            else:
-                placeholder = self.mappings[path]
-
-            text_content = text_content[:start] + placeholder + text_content[end:]
-
-        self.save_mappings()
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-        self.text_area.yview_moveto(scroll_position[0])
-        self.highlight_obfuscated_text()
-
-    def _action_anonymize_members(self):
-        """Action: Anonymize function names, property names, and field names (C#, TS)"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Get next numbers for each category
-        def get_next_num(prefix):
-            existing_nums = []
-            for mapped_value in self.mappings.values():
-                if mapped_value.startswith(prefix) and len(mapped_value) > len(prefix):
-                    try:
-                        num_part = mapped_value[len(prefix):]
-                        if num_part.isdigit():
-                            existing_nums.append(int(num_part))
-                    except:
-                        pass
-            return max(existing_nums) + 1 if existing_nums else 1
-
-        func_counter = get_next_num('FUNC')
-        prop_counter = get_next_num('PROP')
-        field_counter = get_next_num('FIELD')
-
-        # Track replacements to do them all at once
-        replacements = {}  # name -> placeholder
-
-        # C# method patterns:
-        # public void MethodName(...)
-        # private async Task<T> MethodName(...)
-        # protected override string MethodName(...)
-        # internal static int MethodName(...)
-        cs_method_pattern = r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:virtual\s+)?(?:override\s+)?(?:abstract\s+)?(?:sealed\s+)?(?:async\s+)?(?:[\w<>\[\],\?\s]+\s+)(\w+)\s*(?:<[^>]+>)?\s*\('
-
-        # C# property patterns:
-        # public string PropertyName { get; set; }
-        # private int PropertyName => value;
-        # public List<T> PropertyName { get; }
-        cs_property_pattern = r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:virtual\s+)?(?:override\s+)?(?:abstract\s+)?(?:[\w<>\[\],\?\s]+\s+)(\w+)\s*(?:\{|=>)'
-
-        # C# field patterns:
-        # private readonly string _fieldName;
-        # public static int FieldName = 0;
-        # private ILogger<T> _logger;
-        cs_field_pattern = r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:readonly\s+)?(?:const\s+)?(?:[\w<>\[\],\?\s]+\s+)(\w+)\s*[;=]'
-
-        # TypeScript/JavaScript method patterns:
-        # async methodName(...)
-        # public methodName(...)
-        # private static methodName(...)
-        ts_method_pattern = r'(?:public|private|protected)?\s*(?:static\s+)?(?:async\s+)?(\w+)\s*\([^)]*\)\s*(?::\s*[^{]+)?\s*\{'
-
-        # TypeScript property patterns:
-        # public propertyName: Type;
-        # private propertyName = value;
-        # readonly propertyName: Type;
-        ts_property_pattern = r'(?:public|private|protected)?\s*(?:static\s+)?(?:readonly\s+)?(\w+)\s*[:\?]\s*[\w<>\[\]|&\s]+'
-
-        # Skip these common names that shouldn't be anonymized
-        skip_names = {
-            'constructor', 'get', 'set', 'async', 'await', 'return', 'if', 'else',
-            'for', 'while', 'switch', 'case', 'break', 'continue', 'try', 'catch',
-            'finally', 'throw', 'new', 'this', 'super', 'class', 'interface',
-            'extends', 'implements', 'import', 'export', 'default', 'from',
-            'const', 'let', 'var', 'function', 'void', 'null', 'undefined',
-            'true', 'false', 'string', 'number', 'boolean', 'object', 'any',
-            'never', 'unknown', 'readonly', 'static', 'public', 'private',
-            'protected', 'abstract', 'override', 'virtual', 'sealed', 'partial',
-            'internal', 'extern', 'volatile', 'unsafe', 'fixed', 'sizeof',
-            'typeof', 'nameof', 'is', 'as', 'in', 'out', 'ref', 'params',
-            'Main', 'ToString', 'Equals', 'GetHashCode', 'Dispose', 'Configure',
-            'ConfigureServices', 'Build', 'Run', 'CreateBuilder', 'AddScoped',
-            'AddSingleton', 'AddTransient', 'UseRouting', 'UseEndpoints',
-            'MapControllers', 'MapGet', 'MapPost', 'MapPut', 'MapDelete',
-            'OnConnectedAsync', 'OnDisconnectedAsync', 'SendAsync', 'InvokeAsync',
-            'Task', 'Action', 'Func', 'ILogger', 'IConfiguration', 'IServiceCollection',
-            'DbContext', 'DbSet', 'Entity', 'Key', 'Required', 'MaxLength',
-            'length', 'push', 'pop', 'map', 'filter', 'reduce', 'forEach',
-            'find', 'findIndex', 'includes', 'indexOf', 'slice', 'splice',
-            'concat', 'join', 'split', 'trim', 'toLowerCase', 'toUpperCase',
-            'toString', 'valueOf', 'hasOwnProperty', 'prototype', 'apply',
-            'call', 'bind', 'then', 'catch', 'finally', 'resolve', 'reject',
-            'Promise', 'Observable', 'Subject', 'subscribe', 'unsubscribe',
-            'next', 'error', 'complete', 'pipe', 'tap', 'switchMap', 'mergeMap',
-            'useState', 'useEffect', 'useContext', 'useReducer', 'useCallback',
-            'useMemo', 'useRef', 'useLayoutEffect', 'render', 'componentDidMount',
-            'componentWillUnmount', 'componentDidUpdate', 'setState', 'props',
-            'state', 'context', 'children', 'key', 'ref', 'value', 'onChange',
-            'onClick', 'onSubmit', 'onError', 'onSuccess', 'onComplete',
-        }
-
-        # Also skip already obfuscated identifiers
-        def should_skip(name):
-            if name in skip_names:
-                return True
-            if self.is_obfuscated_identifier(name):
-                return True
-            if name in self.mappings.values():
-                return True
-            # Skip names that are all uppercase (constants)
-            if name.isupper() and len(name) > 1:
-                return True
-            # Skip single character names
-            if len(name) <= 1:
-                return True
-            # Skip names starting with underscore followed by lowercase (private convention)
-            # but still anonymize them
-            return False
-
-        # Find C# methods
-        for match in re.finditer(cs_method_pattern, text_content):
-            name = match.group(1)
-            if not should_skip(name) and name not in replacements:
-                replacements[name] = ('FUNC', func_counter)
-                func_counter += 1
-
-        # Find C# properties (but not methods - check no '(' after)
-        for match in re.finditer(cs_property_pattern, text_content):
-            name = match.group(1)
-            # Make sure this isn't a method (no opening paren)
-            end_pos = match.end()
-            if end_pos < len(text_content) and text_content[end_pos-1] != '(':
-                if not should_skip(name) and name not in replacements:
-                    replacements[name] = ('PROP', prop_counter)
-                    prop_counter += 1
-
-        # Find C# fields
-        for match in re.finditer(cs_field_pattern, text_content):
-            name = match.group(1)
-            # Skip if it looks like a property or method (already captured)
-            if not should_skip(name) and name not in replacements:
-                # Check if this is followed by { (property) or ( (method)
-                remaining = text_content[match.end()-1:match.end()+5]
-                if not remaining.startswith('{') and not remaining.startswith('('):
-                    replacements[name] = ('FIELD', field_counter)
-                    field_counter += 1
-
-        # Find TS methods (in class context - has { after )
-        for match in re.finditer(ts_method_pattern, text_content):
-            name = match.group(1)
-            if not should_skip(name) and name not in replacements:
-                replacements[name] = ('FUNC', func_counter)
-                func_counter += 1
-
-        if not replacements:
-            return
-
-        # Create actual mappings and replace
-        for name, (prefix, num) in replacements.items():
-            placeholder = f"{prefix}{num:03d}"
-            self.mappings[name] = placeholder
-
-        # Replace all occurrences (whole word only)
-        for name, (prefix, num) in replacements.items():
-            placeholder = self.mappings[name]
-            # Use word boundary to replace only whole words
-            text_content = re.sub(r'\b' + re.escape(name) + r'\b', placeholder, text_content)
-
-        self.save_mappings()
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-        self.text_area.yview_moveto(scroll_position[0])
-        self.highlight_obfuscated_text()
-
-    def _action_remove_function_bodies(self):
-        """Action: Remove function/method bodies, keep only signatures (C#, JS, TS)"""
-        import re
-
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
-        # Get next available BODY number
-        existing_nums = []
-        for mapped_value in self.mappings.values():
-            if mapped_value.startswith('BODY') and len(mapped_value) > 4:
-                try:
-                    num_part = mapped_value[4:]
-                    if num_part.isdigit():
-                        existing_nums.append(int(num_part))
-                except:
-                    pass
-        body_counter = max(existing_nums) + 1 if existing_nums else 1
-
-        def find_matching_brace(text, start_pos):
-            """Find the closing brace position"""
-            if start_pos >= len(text) or text[start_pos] != '{':
-                return -1
-
-            depth = 1
-            i = start_pos + 1
-
-            while i < len(text) and depth > 0:
-                char = text[i]
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                elif char == '"' or char == "'" or char == '`':
-                    # Skip string content
-                    quote = char
-                    i += 1
-                    while i < len(text):
-                        if text[i] == '\\' and i + 1 < len(text):
-                            i += 2
-                            continue
-                        if text[i] == quote:
-                            break
-                        i += 1
-                i += 1
-
-            return i - 1 if depth == 0 else -1
-
-        # Find all opening braces and check if they follow a function signature pattern
-        # Work character by character to find ")" followed by optional whitespace/type annotation then "{"
-
-        result = text_content
-        offset = 0  # Track position shifts due to replacements
-
-        # Find all potential function signatures: pattern is )...{ where ... is whitespace or return type hints
-        i = 0
-        while i < len(result):
-            # Find next opening brace
-            brace_pos = result.find('{', i)
-            if brace_pos == -1:
-                break
-
-            # Look backwards from brace to find if there's a ) before it (function signature)
-            # Check up to 200 chars back for the closing paren of signature
-            search_start = max(0, brace_pos - 200)
-            segment = result[search_start:brace_pos]
-
-            # Find the last ) in this segment
-            paren_pos = segment.rfind(')')
-
-            if paren_pos != -1:
-                # Check what's between ) and { - should be whitespace, type annotations, or keywords
-                between = segment[paren_pos + 1:]
-                # Allow: whitespace, :, type names, async, =>, where clauses
-                between_stripped = between.strip()
-
-                # Valid patterns between ) and {:
-                # - empty or whitespace only
-                # - : ReturnType (TypeScript)
-                # - where T : constraint (C#)
-                # - => (but not arrow function expression - those start with = before ()
-                is_valid_function = False
-
-                if not between_stripped:
-                    is_valid_function = True
-                elif re.match(r'^:\s*[\w<>\[\],\s\?|&]+$', between_stripped):
-                    # TypeScript return type
-                    is_valid_function = True
-                elif re.match(r'^where\s+', between_stripped):
-                    # C# generic constraint
-                    is_valid_function = True
-
-                if is_valid_function:
-                    # Now find the start of the signature (go back to find the line start or previous statement)
-                    # Find the start of this line
-                    line_start = result.rfind('\n', 0, search_start + paren_pos)
-                    if line_start == -1:
-                        line_start = 0
-                    else:
-                        line_start += 1
-
-                    # Get the full signature
-                    signature = result[line_start:brace_pos].rstrip()
-
-                    # Skip if this looks like a control structure (if, while, for, etc.)
-                    sig_stripped = signature.strip()
-                    control_keywords = ['if', 'else', 'while', 'for', 'foreach', 'switch', 'catch', 'finally', 'lock', 'using', 'try']
-                    is_control = False
-                    for kw in control_keywords:
-                        if sig_stripped == kw or sig_stripped.startswith(kw + ' ') or sig_stripped.startswith(kw + '('):
-                            is_control = True
-                            break
-
-                    # Also skip class/interface/struct/namespace/enum declarations
-                    declaration_keywords = ['class', 'interface', 'struct', 'namespace', 'enum', 'record']
-                    for kw in declaration_keywords:
-                        if kw + ' ' in sig_stripped or sig_stripped.endswith(kw):
-                            is_control = True
-                            break
-
-                    if not is_control:
-                        # Find matching closing brace
-                        close_pos = find_matching_brace(result, brace_pos)
-
-                        if close_pos != -1 and close_pos > brace_pos + 1:
-                            # Extract body content
-                            body_content = result[brace_pos + 1:close_pos].strip()
-
-                            # Skip if empty or already a placeholder
-                            if body_content and not re.match(r'^BODY\d+$', body_content):
-                                # Generate placeholder
-                                if body_content not in self.mappings:
-                                    placeholder = f"BODY{body_counter:03d}"
-                                    self.mappings[body_content] = placeholder
-                                    body_counter += 1
-                                else:
-                                    placeholder = self.mappings[body_content]
-
-                                # Replace body with placeholder
-                                new_block = f"{{ {placeholder} }}"
-                                result = result[:brace_pos] + new_block + result[close_pos + 1:]
-
-                                # Continue from after the replacement
-                                i = brace_pos + len(new_block)
-                                continue
-
-            i = brace_pos + 1
-
-        self.save_mappings()
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, result)
-        self.text_area.yview_moveto(scroll_position[0])
-        self.highlight_obfuscated_text()
-
     def remove_all_comments(self):
         """Remove all comments from code (supports multiple languages)"""
-        import re
+        if self.is_obfuscating:
+            return
 
         # Save state before making changes
         self.save_state()
 
-        # Save current scroll position
-        scroll_position = self.text_area.yview()
-
-        # Get current text content
         text_content = self.text_area.get(1.0, "end-1c")
+        text_content = self.engine.remove_all_comments(text_content)
 
-        # Remove multi-line comments (/* ... */)
-        # Used in: C, C++, C#, Java, JavaScript, Go, Rust, etc.
-        text_content = re.sub(r'/\*.*?\*/', '', text_content, flags=re.DOTALL)
-
-        # Remove single-line comments starting with //
-        # Used in: C, C++, C#, Java, JavaScript, Go, Rust, Swift, Kotlin, etc.
-        text_content = re.sub(r'//[^\n]*', '', text_content)
-
-        # Remove single-line comments starting with #
-        # Used in: Python, Ruby, Perl, Shell scripts, etc.
-        text_content = re.sub(r'#[^\n]*', '', text_content)
-
-        # Remove XML/HTML comments (<!-- ... -->)
-        text_content = re.sub(r'<!--.*?-->', '', text_content, flags=re.DOTALL)
-
-        # Remove SQL comments (-- ...)
-        text_content = re.sub(r'--[^\n]*', '', text_content)
-
-        # Remove Lua comments (-- ... and --[[ ... ]])
-        text_content = re.sub(r'--\[\[.*?\]\]', '', text_content, flags=re.DOTALL)
-
-        # Remove Visual Basic comments (' ...)
-        text_content = re.sub(r"'[^\n]*", '', text_content)
-
-        # Remove triple-slash XML documentation comments (/// ...)
-        # Already handled by // pattern above
-
-        # Remove lines that become empty after comment removal
-        lines = text_content.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            stripped = line.rstrip()
-            # Keep the line if it has content or is an intentional blank line
-            if stripped or (not stripped and line == '\n'):
-                cleaned_lines.append(line)
-            elif not stripped and cleaned_lines and cleaned_lines[-1].strip():
-                # Preserve single blank lines between code blocks
-                cleaned_lines.append('')
-
-        text_content = '\n'.join(cleaned_lines)
-
-        # Remove excessive blank lines (more than 2 consecutive)
-        text_content = re.sub(r'\n\s*\n\s*\n+', '\n\n', text_content)
-
-        # Update text area
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(1.0, text_content)
-
-        # Restore scroll position
-        self.text_area.yview_moveto(scroll_position[0])
-
-        # Re-highlight obfuscated text if any
-        self.highlight_obfuscated_text()
+        self.replace_text(text_content)
 
     def deobfuscate_word(self, obfuscated_word):
         """Deobfuscate the clicked obfuscated word back to original"""
-        # Find the original word for this obfuscated identifier
-        original_word = None
-        for original, obfuscated in self.mappings.items():
-            if obfuscated == obfuscated_word:
-                original_word = original
-                break
-
-        if original_word:
-            # Save state before making changes
-            self.save_state()
-
-            # Save current scroll position
-            scroll_position = self.text_area.yview()
-
-            # Replace obfuscated text back to original
-            text_content = self.text_area.get(1.0, "end-1c")
-            count = text_content.count(obfuscated_word)
-            text_content = text_content.replace(obfuscated_word, original_word)
-
-            self.text_area.delete(1.0, tk.END)
-            self.text_area.insert(1.0, text_content)
+        # Only known identifiers can be restored
+        if not self.mappings.has_placeholder(obfuscated_word):
+            return
 
-            # Restore scroll position
-            self.text_area.yview_moveto(scroll_position[0])
+        # Save state before making changes
+        self.save_state()
 
-            # Remove from mappings
-            del self.mappings[original_word]
-            self.save_mappings()
+        # Replace obfuscated text back to original and drop the mapping
+        text_content = self.text_area.get(1.0, "end-1c")
+        restored = self.engine.deobfuscate_word(text_content, obfuscated_word)
+        self.save_mappings()
 
-            # Re-highlight remaining obfuscated text
-            self.highlight_obfuscated_text()
+        # Re-highlight remaining obfuscated text
+        self.replace_text(restored)
 
     def deobfuscate_and_show(self):
         """Deobfuscate text and show in UI (also copy to clipboard)"""
+        if self.is_obfuscating:
+            return
+
         # Save state before making changes
         self.save_state()
 
         # Save current scroll position
         scroll_position = self.text_area.yview()
 
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
         # Reverse all mappings to restore original text
-        deobfuscated_text = text_content
-        for original, obfuscated in self.mappings.items():
-            deobfuscated_text = deobfuscated_text.replace(obfuscated, original)
+        text_content = self.text_area.get(1.0, "end-1c")
+        deobfuscated_text = self.engine.deobfuscate(text_content)
 
         # Copy to clipboard
         if deobfuscated_text:
@@ -1777,7 +647,7 @@ class CodeBlur:
         self.text_area.yview_moveto(scroll_position[0])
 
         # Clear highlights since text is now deobfuscated
-        self.text_area.tag_remove("obfuscated", "1.0", tk.END)
+        self.highlighter.clear()
 
         # Reset obfuscation level
         self.reset_obfuscation_level()
@@ -1796,6 +666,11 @@ class CodeBlur:
         text_content = self.text_area.get(1.0, tk.END).strip()
         if text_content:
             pyperclip.copy(text_content)
+        self.close()
+
+    def close(self):
+        """Write queued mapping saves and close the application"""
+        self.mappings_saver.flush()
         self.root.destroy()
 
     def clear_mappings_2state(self):
@@ -1815,7 +690,7 @@ class CodeBlur:
             self.root.after(3000, self.reset_clear_button)
         else:
             # Third click - close app
-            self.root.destroy()
+            self.close()
 
     def update_clear_button_text(self, text=None):
         """Update the clear button text"""
@@ -1840,21 +715,21 @@ class CodeBlur:
 
     def clear_mappings(self):
         """Clear all mappings and restore original text"""
+        if self.is_obfuscating:
+            return
+
         # Save state before making changes
         self.save_state()
 
         # Save current scroll position
         scroll_position = self.text_area.yview()
 
-        # Get current text content
-        text_content = self.text_area.get(1.0, "end-1c")
-
         # Reverse all mappings to restore original text
-        for original, obfuscated in self.mappings.items():
-            text_content = text_content.replace(obfuscated, original)
+        text_content = self.text_area.get(1.0, "end-1c")
+        text_content = self.engine.deobfuscate(text_content)
 
         # Clear mappings
-        self.mappings = {}
+        self.mappings.clear()
         self.save_mappings()
 
         # Update text area with deobfuscated text
@@ -1865,7 +740,7 @@ class CodeBlur:
         self.text_area.yview_moveto(scroll_position[0])
 
         # Clear highlights
-        self.text_area.tag_remove("obfuscated", "1.0", tk.END)
+        self.highlighter.clear()
 
         # Reset obfuscation level
         self.reset_obfuscation_level()
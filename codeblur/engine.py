@@ -0,0 +1,1370 @@
+import functools
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import OrderedDict
+
+from .languages import create_lexer, detect_language, language_keywords
+from .lexer import COMMENT, IDENT, STRING, bracket_map, join_tokens, split_string
+from .mappings import MappingStore
+from .rewrite import Rewriter
+from .skeleton import python_body_spans
+from .structure import find_members, function_bodies
+from .trie import trie_pattern
+
+
+# Package directory (word files ship next to this module)
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Array of word files to load and merge (in package directory)
+DEFAULT_WORD_FILES = [
+    os.path.join(PACKAGE_DIR, "known_words.json"),      # Common programming words
+    os.path.join(PACKAGE_DIR, "brand_words.json"),      # Brand/IT company names
+    os.path.join(PACKAGE_DIR, "package_words.json"),    # NuGet/npm package names
+]
+
+# =========================================================================
+# COMPILED PATTERNS
+# =========================================================================
+# Every regex the passes use is compiled once here, at import time. The
+# passes run them per token / per comment / per word, where a call-time
+# re.compile (even one served from the re module cache) costs more than
+# the match itself.
+# =========================================================================
+
+# Placeholder categories made up for identifiers and strings
+IDENTIFIER_CATEGORIES = ['PERSON', 'ENTITY', 'ORG', 'ITEM', 'NAME', 'ID', 'REF']
+
+# Every placeholder category the passes create
+PLACEHOLDER_CATEGORIES = IDENTIFIER_CATEGORIES + ['GUID', 'COMMENT', 'BODY', 'PATH', 'FUNC', 'PROP', 'FIELD']
+
+# Placeholder recognizer: CATEGORY + NUMBERS (PERSON001, GUID042, FIELD003); use fullmatch
+PLACEHOLDER = re.compile(r'(?:' + '|'.join(PLACEHOLDER_CATEGORIES) + r')\d+')
+
+# Comment that already is a placeholder, in any comment style (use fullmatch)
+COMMENT_PLACEHOLDER = re.compile(
+    r'/\*\s*COMMENT\d+\s*\*/'      # /* COMMENT001 */
+    r'|///?\s*COMMENT\d+\s*'        # // and /// COMMENT001
+    r'|\#\s*COMMENT\d+\s*'          # # COMMENT001
+    r'|--\s*COMMENT\d+\s*'          # -- COMMENT001
+    r'|<!--\s*COMMENT\d+\s*-->'     # <!-- COMMENT001 -->
+    r"|'\s*COMMENT\d+\s*"           # ' COMMENT001
+    r'|(?i:REM)\s+COMMENT\d+\s*'    # REM COMMENT001
+)
+
+# Block comment openers; a comment token that starts with one but lacks its
+# closer was left open (it runs to the end of the text)
+UNCLOSED_COMMENT_OPENERS = ('/*', '<!--', '--[[')
+
+# Body that already is a placeholder (use fullmatch)
+BODY_PLACEHOLDER = re.compile(r'BODY\d+')
+
+# Identifier (also used to blur words inside comments and strings)
+IDENTIFIER = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b')
+
+# Identifiers inside a string literal: an escape (\n, \t, \\) is matched first and
+# kept, so its letter is never blurred (\n -> \NAME001 would be another escape)
+STRING_WORD = re.compile(r'\\[\\a-zA-Z_]|(?:\b|(?<=\\[a-zA-Z_]))[a-zA-Z_][a-zA-Z0-9_]*\b')
+
+# String prefixes of literals without escapes (C# verbatim strings)
+VERBATIM_PREFIXES = ('@', '$@')
+
+# camelCase / PascalCase parts: placeholders (PERSON002 in PERSON002Id), lowercase->uppercase transitions,
+# acronyms before a capitalized word, other uppercase runs, digits, separators (_) - every character
+# lands in a part, so joining the parts gives the word back. Uppercase runs stop where a placeholder
+# starts (HTTPENTITY001 -> HTTP, ENTITY001), so BLUR leaves its own output alone.
+_UPPER = r'(?:(?!' + PLACEHOLDER.pattern + r')[A-Z])+'
+CAMEL_CASE_PARTS = re.compile(
+    PLACEHOLDER.pattern + r'|[A-Z]?[a-z]+|' + _UPPER + r'(?=[A-Z][a-z])|' + _UPPER + r'|\d+|[^a-zA-Z\d]+')
+
+# Three or more line breaks with only whitespace between them
+EXCESS_BLANK_LINES = re.compile(r'\n\s*\n\s*\n+')
+
+# GUIDs: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx, optionally in braces
+GUID = re.compile(r'\{?[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\}?')
+
+# URLs (http, https, ftp, file, ws, wss)
+URL = re.compile(r'(?:https?|ftp|file|wss?)://[^\s\'"<>)}\]]+')
+
+# Windows absolute paths (C:\, D:\, etc.)
+WINDOWS_ABS_PATH = re.compile(r'[A-Za-z]:\\(?:[^\\/:*?"<>|\s\'"]|\\)+')
+
+# UNC paths (\\server\share)
+UNC_PATH = re.compile(r'\\\\[^\s\'"<>]+')
+
+# Unix absolute paths (/usr, /home, /var, etc.) - whole string contents
+# (one character class, no nested repeat: (?:[...]+)+ backtracks exponentially on a near miss)
+UNIX_ABS_PATH = re.compile(r'/[a-zA-Z0-9_\-./]+')
+
+# API routes and relative paths starting with / - whole string contents
+API_ROUTE = re.compile(r'/[a-zA-Z0-9_\-{}./:\[\]@]+')
+
+# Relative paths with ./ or ../
+RELATIVE_PATH = re.compile(r'\.\.?/[a-zA-Z0-9_\-./]+')
+
+# Generic path-like patterns (folder/file.ext) - whole string contents
+# (the part after the first / may hold more /, so no repeated group is needed)
+GENERIC_PATH = re.compile(r'[a-zA-Z0-9_\-]+/[a-zA-Z0-9_\-./]+')
+
+# Version numbers and ratios (not paths) - whole string contents
+VERSION_NUMBER = re.compile(r'[0-9.]+')
+
+# Type part of a C# declaration: up to 16 space-separated type words (Task<List<int>>,
+# Dictionary<string, int>). Each word must end at whitespace, so there is one way to
+# split a run, and the bound keeps a line of modifiers and words from being rescanned
+# from every modifier in it.
+_CS_TYPE = r'(?:[\w<>\[\],\?]+\s+){1,16}'
+
+# C# methods: public void MethodName(...), private async Task<T> MethodName(...),
+# protected override string MethodName(...), internal static int MethodName(...)
+CS_METHOD = re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:virtual\s+)?(?:override\s+)?(?:abstract\s+)?(?:sealed\s+)?(?:async\s+)?' + _CS_TYPE + r'(\w+)\s*(?:<[^>]+>)?\s*\(')
+
+# C# properties: public string PropertyName { get; set; }, private int PropertyName => value;
+CS_PROPERTY = re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:virtual\s+)?(?:override\s+)?(?:abstract\s+)?' + _CS_TYPE + r'(\w+)\s*(?:\{|=>)')
+
+# C# fields: private readonly string _fieldName;, public static int FieldName = 0;
+CS_FIELD = re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:readonly\s+)?(?:const\s+)?' + _CS_TYPE + r'(\w+)\s*[;=]')
+
+# TypeScript/JavaScript methods: async methodName(...) {, private static methodName(...): T {
+# Only the name is captured, so the modifiers before it are not matched: an optional
+# prefix could start at every space of a long blank run (a commented-out block in the
+# code view) and rescan it. Parameters hold no parentheses and a return type stops at
+# ; and after 256 characters - so a call or ternary in minified code (f(a):b) is not
+# scanned all the way to the next {. The return type is taken whole, never given
+# back char by char: (?=(x))\2 is an atomic group on any Python version.
+TS_METHOD = re.compile(r'\b(\w+)\s*\([^()]*\)\s*(?::(?=([^{;]{1,256}))\2)?\{')
+
+# Lines this long (minified bundles) are left out of the declaration regexes
+MAX_DECLARATION_LINE = 4096
+OVERSIZED_LINE = re.compile(r'[^\n]{%d,}' % MAX_DECLARATION_LINE)
+
+# Tokens / braces / names an action handles between progress reports (and cancel checks)
+PROGRESS_INTERVAL = 4096
+
+# Distinct words remembered by the per-word memos (names repeat throughout a file)
+WORD_MEMO_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=WORD_MEMO_SIZE)
+def _camel_case_parts(word):
+    """camelCase parts of a word as a tuple (memoized - depends on the word only)"""
+    return tuple(CAMEL_CASE_PARTS.findall(word)) or (word,)
+
+
+# What may sit between ) and { of a function signature
+TS_RETURN_TYPE = re.compile(r':\s*[\w<>\[\],\s\?|&]+')   # TypeScript return type (fullmatch)
+CS_CONSTRAINT = re.compile(r'where\s+')                   # C# generic constraint (match)
+
+
+def get_app_data_dir():
+    """Get cross-platform app data directory"""
+    import platform
+    system = platform.system()
+
+    if system == "Windows":
+        base = os.environ.get("APPDATA", os.path.expanduser("~"))
+    elif system == "Darwin":  # macOS
+        base = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    else:  # Linux and others
+        base = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+
+    return os.path.join(base, "codeblur")
+
+
+def load_known_words(word_files=None, user_words_file=None):
+    """Load and merge all known words from multiple files"""
+    all_words = set()
+
+    # Load from each word file in the array
+    for word_file in (word_files if word_files is not None else DEFAULT_WORD_FILES):
+        if os.path.exists(word_file):
+            try:
+                with open(word_file, 'r', encoding='utf-8') as f:
+                    words = json.load(f)
+                    all_words.update(words)
+            except:
+                pass
+
+    # Load user's custom words if exists
+    if user_words_file and os.path.exists(user_words_file):
+        try:
+            with open(user_words_file, 'r', encoding='utf-8') as f:
+                words = json.load(f)
+                all_words.update(words)
+        except:
+            pass
+
+    # If no words loaded, use hardcoded defaults
+    if not all_words:
+        all_words = get_default_known_words()
+
+    # Build the lookup index once - every identifier check hits it in O(1)
+    return KnownWords(all_words)
+
+
+class KnownWords(frozenset):
+    """Frozen known-words set with a precomputed case-folded index"""
+
+    def __new__(cls, words=()):
+        self = super().__new__(cls, (sys.intern(w) for w in words))
+        # Case-folded copy for case-insensitive checks (built once, not per lookup)
+        self.folded = frozenset(w.casefold() for w in self)
+        return self
+
+    def is_known(self, word):
+        """Check if word is known (exact or case-insensitive match)"""
+        return word in self or word.casefold() in self.folded
+
+
+class WordMemo:
+    """Bounded LRU memo of per-word results, tied to the state they were computed from
+
+    validate() is called with the change counter and the objects the
+    results depend on; when any of them changed since the last call, every
+    entry is dropped. It runs once per word, so it only compares three
+    references.
+    """
+
+    def __init__(self, size=WORD_MEMO_SIZE):
+        self.size = size
+        self._results = OrderedDict()   # word -> result, least recently used first
+        self._counter = None
+        self._first = None
+        self._second = None
+
+    def validate(self, counter, first, second=None):
+        """Drop every entry unless counter and the sources (compared by identity) are unchanged"""
+        if counter != self._counter or first is not self._first or second is not self._second:
+            self._results.clear()
+            self._counter = counter
+            self._first = first
+            self._second = second
+
+    def get(self, word):
+        """Memoized result for word (None if not memoized)"""
+        result = self._results.get(word)
+        if result is not None:
+            self._results.move_to_end(word)
+        return result
+
+    def put(self, word, result):
+        """Remember the result for word"""
+        self._results[word] = result
+        while len(self._results) > self.size:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        self._results.clear()
+
+
+def get_default_known_words():
+    """Return default set of known words (generic, language-agnostic)"""
+    return {
+        # Common programming verbs
+        "get", "set", "is", "has", "can", "should", "will", "did",
+        "on", "off", "add", "remove", "create", "delete", "update",
+        "find", "fetch", "load", "save", "send", "receive",
+        "start", "stop", "init", "reset", "clear", "close", "open",
+        "show", "hide", "toggle", "enable", "disable",
+        "click", "change", "submit", "focus", "blur",
+        "render", "mount", "unmount", "destroy",
+        "push", "pop", "shift", "slice", "splice", "concat",
+        "join", "split", "trim", "replace", "match", "test", "search",
+        "parse", "stringify", "encode", "decode",
+        "extend", "implement", "override",
+        # Common nouns
+        "data", "info", "list", "item", "items", "array", "object",
+        "error", "success", "fail", "complete", "pending",
+        "event", "handler", "listener", "callback",
+        "request", "response", "status", "message",
+        "id", "key", "value", "index", "length", "size", "count",
+        "name", "type", "state", "config", "options",
+        "result", "output", "input", "params", "args",
+        "url", "path", "route", "query", "body", "header",
+        "text", "font", "style", "display", "position",
+        "component", "module", "service", "controller", "model", "view",
+        "min", "max", "sum", "avg", "total", "current", "next", "prev",
+        "first", "last", "before", "after",
+        "timeout", "interval", "delay", "wait",
+        # Common prepositions/connectors
+        "to", "from", "by", "with", "in", "out", "up", "down",
+        "all", "any", "some", "none", "each", "every",
+        # Common suffixes/prefixes
+        "async", "sync", "Async", "Sync",
+        "local", "global", "public", "private", "static",
+        # Common keywords (multi-language)
+        "true", "false", "null", "new", "this", "self",
+        "if", "else", "for", "while", "do", "switch", "case",
+        "try", "catch", "finally", "throw", "return",
+        "function", "class", "const", "let", "var",
+        "import", "export", "default", "require",
+    }
+
+
+class Cancelled(Exception):
+    """Raised out of a run whose cancel event was set (the run's changes are incomplete)"""
+
+
+class ActionTimeout(Cancelled):
+    """Raised out of a run when one action takes longer than Engine.time_budget seconds"""
+
+    def __init__(self, action_name, budget):
+        super().__init__(f"{action_name} took longer than {budget:g} s")
+        self.action_name = action_name
+        self.budget = budget
+
+
+class Engine:
+    """Headless obfuscation engine - text in, text + mapping delta out
+
+    Holds the mappings and known words and implements every obfuscation pass
+    as a pure string transform. The Tk GUI and any batch caller share it.
+    """
+
+    # =========================================================================
+    # OBFUSCATION LEVELS CONFIGURATION
+    # =========================================================================
+    # Each level defines what actions to perform when AUTO-OBFUSCATE is clicked.
+    # Levels are cumulative - clicking again advances to the next level.
+    # After all levels are done, clicking again resets to level 0 (no action).
+    #
+    # To add a new level: add an entry here and implement the action method.
+    # Action methods must exist as instance methods (e.g., self._action_obfuscate_identifiers)
+    # taking the current text and returning the transformed text.
+    # =========================================================================
+    OBFUSCATION_LEVELS = {
+        1: {
+            "name": "BLUR",
+            "description": "Obfuscate unknown identifiers (variables, functions, classes)",
+            "actions": ["obfuscate_identifiers"],
+        },
+        2: {
+            "name": "STEALTH",
+            "description": "Replace comments with placeholders and collapse empty lines",
+            "actions": ["remove_comments", "remove_empty_lines"],
+        },
+        3: {
+            "name": "PHANTOM",
+            "description": "Obfuscate string contents, GUIDs, and paths",
+            "actions": ["obfuscate_strings", "obfuscate_guids", "obfuscate_paths"],
+        },
+        4: {
+            "name": "ANON",
+            "description": "Anonymize function names, property names, and field names",
+            "actions": ["anonymize_members"],
+        },
+        5: {
+            "name": "SKELETON",
+            "description": "Remove function/method bodies, keep only signatures",
+            "actions": ["remove_function_bodies"],
+        },
+    }
+
+    def __init__(self, mappings=None, known_words=None, language=None):
+        # original -> placeholder (with placeholder -> original reverse index)
+        self.mappings = mappings if mappings is not None else MappingStore()
+
+        # Known words dictionary (language-agnostic)
+        self.known_words = known_words if known_words is not None else get_default_known_words()
+
+        # Mappings added by the current run_* call (None when not recording)
+        self._delta = None
+
+        # Source of placeholder categories (a seeded random.Random makes runs reproducible)
+        self.rng = random
+
+        # Optional progress callback progress(action_name, fraction of the run done),
+        # and a threading.Event that stops the current run with Cancelled
+        self.progress = None
+        self.cancel_event = None
+        self._action = None
+
+        # Seconds one action may run before the run stops with ActionTimeout (None: no
+        # limit). Checked wherever progress is reported, so it bounds the passes' loops;
+        # the regexes themselves are kept linear so no single match call runs away.
+        self.time_budget = None
+        self._deadline = None
+        self._step = (0, 1)   # (index of the current action, number of actions)
+
+        # Language of the text (a LANGUAGES key, see languages.py); None = detect on each run
+        self.language = language
+        self._detected_language = None
+
+        # True: find C#/TypeScript declarations with tree-sitter when it is installed
+        # (see structure.py). Off by default: parsing costs about as much as the
+        # regexes it replaces (benchmarks/bench_structure.py)
+        self.use_tree_sitter = False
+
+        # One lexer per language; each tokenizes once per text and passes hand
+        # their rewritten tokens back to it
+        self._lexers = {}
+
+        # word -> auto_obfuscate_word / apply_mappings_to_word result, so each
+        # distinct identifier is worked out once instead of per occurrence
+        self._obfuscated_words = WordMemo()
+        self._mapped_words = WordMemo()
+
+    @property
+    def lexer(self):
+        """Lexer for the current language (set, or detected by the current run)"""
+        language = self.language or self._detected_language
+        lexer = self._lexers.get(language)
+        if lexer is None:
+            lexer = self._lexers[language] = create_lexer(language)
+        # Long scans stop on cancel/time budget too (lexers are shared with forks)
+        lexer.checkpoint = self._check
+        return lexer
+
+    def fork(self, mappings):
+        """Engine with the same words, language, RNG and lexers over other mappings
+
+        For running passes on a worker thread against a MappingOverlay; only
+        one engine of a family may run at a time (the lexer caches are shared).
+        """
+        engine = Engine(mappings, self.known_words, self.language)
+        engine.rng = self.rng
+        engine.use_tree_sitter = self.use_tree_sitter
+        engine.time_budget = self.time_budget
+        engine._lexers = self._lexers
+        return engine
+
+    @property
+    def mappings(self):
+        """Mapping store (original -> placeholder, with reverse index)"""
+        return self._mappings
+
+    @mappings.setter
+    def mappings(self, mappings):
+        # Plain dicts (e.g. undo snapshots) get wrapped in a store
+        self._mappings = mappings if isinstance(mappings, MappingStore) else MappingStore(mappings)
+
+    @property
+    def known_words(self):
+        """Known words index (exact + case-folded)"""
+        return self._known_words
+
+    @known_words.setter
+    def known_words(self, words):
+        # Plain sets/lists get indexed once here
+        self._known_words = words if isinstance(words, KnownWords) else KnownWords(words)
+
+    # =========================================================================
+    # PIPELINE
+    # =========================================================================
+
+    def run_level(self, level, text):
+        """Run every action of an obfuscation level, return (text, delta)"""
+        return self.run_actions(self.OBFUSCATION_LEVELS[level]["actions"], text)
+
+    def run_action(self, action_name, text):
+        """Run a single named action, return (text, delta)"""
+        return self.run_actions([action_name], text)
+
+    def run_actions(self, action_names, text):
+        """Run named actions in order on text, return (text, delta)
+
+        delta holds the original -> placeholder mappings created by this call.
+        Raises Cancelled when cancel_event gets set, ActionTimeout when an
+        action overruns time_budget; the mappings may then hold part of the
+        run's new entries (run against a MappingOverlay to throw them away).
+        """
+        self._delta = {}
+        if self.language is None:
+            self._detected_language = detect_language(text)
+        try:
+            for index, action_name in enumerate(action_names):
+                self._action = action_name
+                self._step = (index, len(action_names))
+                self._deadline = time.monotonic() + self.time_budget if self.time_budget else None
+                self._report(0, 1)
+                action_method = getattr(self, f"_action_{action_name}", None)
+                if action_method:
+                    text = action_method(text)
+            self._deadline = None
+            self._report(1, 1)
+            return text, self._delta
+        finally:
+            self._delta = None
+            self._action = None
+            self._deadline = None
+
+    def _report(self, done, total):
+        """Report progress of the current action (done of total units); raise Cancelled if asked to stop"""
+        self._check()
+        if self.progress is not None:
+            index, count = self._step
+            self.progress(self._action, (index + (done / total if total else 1)) / count)
+
+    def _check(self):
+        """Raise Cancelled if asked to stop, ActionTimeout if the action overran its budget"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise Cancelled(self._action)
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise ActionTimeout(self._action, self.time_budget)
+
+    def _join_tokens(self, tokens, source):
+        """Text of tokens rewritten one for one from source (cached, so the next pass needs no re-scan)
+
+        The tokens are only cached if every rewritten one still scans as a
+        token of its kind - a Rust char literal ')' turned into 'NAME001'
+        is no literal any more, and the next pass must see what a fresh
+        scan sees.
+        """
+        text = join_tokens(tokens)
+        lexer = self.lexer
+        if all(new == old or lexer.scans_as(*new) for new, old in zip(tokens, source)):
+            lexer.remember(text, tokens)
+        return text
+
+    def add_mapping(self, original, placeholder):
+        """Store a new mapping and record it in the current delta"""
+        self.mappings[original] = placeholder
+        if self._delta is not None:
+            self._delta[original] = placeholder
+
+    # =========================================================================
+    # IDENTIFIERS
+    # =========================================================================
+
+    def generate_ai_identifier(self, original_word):
+        """Generate AI-like identifier for anonymization"""
+        # Check if we already have a mapping
+        if original_word in self.mappings:
+            return self.mappings[original_word]
+
+        # Generate patterns like: PERSON001, ENTITY042, etc. (no underscores)
+        category = self.rng.choice(IDENTIFIER_CATEGORIES)
+
+        # Next available number for this category (O(1) counter lookup)
+        return self.mappings.next_placeholder(category)
+
+    def split_camel_case(self, word):
+        """Split camelCase or PascalCase word into parts"""
+        # Split on transitions: lowercase->uppercase, or before sequences of uppercase followed by lowercase
+        return list(_camel_case_parts(word))
+
+    def is_obfuscated_identifier(self, word):
+        """Check if word matches our obfuscated identifier pattern (e.g., ENTITY001, PERSON042, GUID001)"""
+        # Match pattern: CATEGORY + NUMBERS (e.g., PERSON001, ENTITY042, ORG003, GUID001, COMMENT001, BODY001, PATH001, FUNC001, PROP001, FIELD001)
+        return PLACEHOLDER.fullmatch(word) is not None
+
+    def auto_obfuscate_word(self, word):
+        """Obfuscate a single word for auto-obfuscate, preserving known parts"""
+        # Memoized per word. New mappings (including the ones made here) never
+        # change an earlier result, so only the generation counter matters
+        memo = self._obfuscated_words
+        memo.validate(self._mappings.generation, self._mappings, self._known_words)
+        result = memo.get(word)
+        if result is None:
+            result = self._auto_obfuscate_word(word)
+            memo.put(word, result)
+        return result
+
+    def _auto_obfuscate_word(self, word):
+        """auto_obfuscate_word without the memo"""
+        # Check if word matches our obfuscated identifier pattern (idempotent)
+        if self.is_obfuscated_identifier(word):
+            return word
+
+        # Check if word is already an obfuscated value (idempotent - don't re-obfuscate)
+        if self.mappings.has_placeholder(word):
+            return word
+
+        # Check if the whole word is known (case-insensitive check)
+        if self.known_words.is_known(word):
+            return word
+
+        # Split into camelCase parts
+        parts = self.split_camel_case(word)
+
+        if len(parts) <= 1:
+            # Single word, not in dictionary - obfuscate it
+            if word not in self.mappings:
+                identifier = self.generate_ai_identifier(word)
+                self.add_mapping(word, identifier)
+            return self.mappings[word]
+
+        # Process composite word - keep known parts, obfuscate unknown
+        result_parts = []
+        unknown_sequence = []
+
+        for part in parts:
+            # Check if this part is an obfuscated identifier (e.g., ENTITY001)
+            if self.is_obfuscated_identifier(part):
+                # Flush any unknown sequence first
+                if unknown_sequence:
+                    unknown_combined = ''.join(unknown_sequence)
+                    if unknown_combined not in self.mappings:
+                        identifier = self.generate_ai_identifier(unknown_combined)
+                        self.add_mapping(unknown_combined, identifier)
+                    result_parts.append(self.mappings[unknown_combined])
+                    unknown_sequence = []
+                result_parts.append(part)
+                continue
+
+            # Check if this part is pure digits (part of obfuscated identifier like "001" in "ID001")
+            # or a separator (snake_case underscores stay as they are)
+            if part.isdigit() or not part.isalnum():
+                # Flush any unknown sequence first
+                if unknown_sequence:
+                    unknown_combined = ''.join(unknown_sequence)
+                    if unknown_combined not in self.mappings:
+                        identifier = self.generate_ai_identifier(unknown_combined)
+                        self.add_mapping(unknown_combined, identifier)
+                    result_parts.append(self.mappings[unknown_combined])
+                    unknown_sequence = []
+                result_parts.append(part)
+                continue
+
+            # Check if this part is known (case-insensitive)
+            is_known = self.known_words.is_known(part)
+
+            if is_known:
+                # If we have accumulated unknown parts, obfuscate them as a group
+                if unknown_sequence:
+                    unknown_combined = ''.join(unknown_sequence)
+                    if unknown_combined not in self.mappings:
+                        identifier = self.generate_ai_identifier(unknown_combined)
+                        self.add_mapping(unknown_combined, identifier)
+                    result_parts.append(self.mappings[unknown_combined])
+                    unknown_sequence = []
+                result_parts.append(part)
+            else:
+                unknown_sequence.append(part)
+
+        # Handle any remaining unknown parts at the end
+        if unknown_sequence:
+            unknown_combined = ''.join(unknown_sequence)
+            if unknown_combined not in self.mappings:
+                identifier = self.generate_ai_identifier(unknown_combined)
+                self.add_mapping(unknown_combined, identifier)
+            result_parts.append(self.mappings[unknown_combined])
+
+        return ''.join(result_parts)
+
+    def apply_existing_mappings(self, text_content):
+        """Apply existing mappings to text (camelCase-aware, no new mappings created)"""
+        # Find all identifiers and apply mappings through camelCase splitting
+        def replace_with_mappings(match):
+            word = match.group(0)
+            return self.apply_mappings_to_word(word)
+
+        return IDENTIFIER.sub(replace_with_mappings, text_content)
+
+    def apply_mappings_to_word(self, word):
+        """Apply existing mappings to a word (camelCase-aware, no new mappings created)"""
+        # Memoized per word until the mappings change in any way
+        memo = self._mapped_words
+        memo.validate(self._mappings.version, self._mappings)
+        result = memo.get(word)
+        if result is None:
+            result = self._apply_mappings_to_word(word)
+            memo.put(word, result)
+        return result
+
+    def _apply_mappings_to_word(self, word):
+        """apply_mappings_to_word without the memo"""
+        # Check if whole word is already obfuscated
+        if self.mappings.has_placeholder(word):
+            return word
+
+        # Check if whole word has a mapping
+        if word in self.mappings:
+            return self.mappings[word]
+
+        # Check if it's an obfuscated identifier pattern
+        if self.is_obfuscated_identifier(word):
+            return word
+
+        # Split into camelCase parts
+        parts = self.split_camel_case(word)
+
+        if len(parts) <= 1:
+            # Single word - check if it has a mapping
+            if word in self.mappings:
+                return self.mappings[word]
+            return word
+
+        # Process composite word - apply existing mappings to parts
+        result_parts = []
+        for part in parts:
+            if self.is_obfuscated_identifier(part):
+                result_parts.append(part)
+            elif part.isdigit() or not part.isalnum():
+                result_parts.append(part)
+            elif part in self.mappings:
+                result_parts.append(self.mappings[part])
+            else:
+                result_parts.append(part)
+
+        return ''.join(result_parts)
+
+    # =========================================================================
+    # MANUAL OPERATIONS
+    # =========================================================================
+
+    def obfuscate_word(self, text_content, word):
+        """Map word to an identifier and replace every occurrence in text"""
+        # Generate identifier
+        identifier = self.generate_ai_identifier(word)
+
+        # Store mapping
+        self.add_mapping(word, identifier)
+
+        return text_content.replace(word, identifier)
+
+    def deobfuscate_word(self, text_content, obfuscated_word):
+        """Restore one obfuscated identifier in text and drop its mapping
+
+        Returns None if the identifier has no mapping.
+        """
+        # Find the original word for this obfuscated identifier
+        original_word = self.mappings.original_of(obfuscated_word)
+
+        if not original_word:
+            return None
+
+        # Replace obfuscated text back to original
+        text_content = text_content.replace(obfuscated_word, original_word)
+
+        # Remove from mappings
+        del self.mappings[original_word]
+
+        return text_content
+
+    def deobfuscate(self, text_content):
+        """Reverse all mappings to restore original text (single pass)"""
+        return self.mappings.restore(text_content)
+
+    def remove_all_comments(self, text_content):
+        """Remove all comments from code (supports multiple languages)"""
+        # Drop the comment tokens of the text's language (so # in C#, ' in
+        # Python strings and -- in TypeScript survive)
+        if self.language is None:
+            self._detected_language = detect_language(text_content)
+        text_content = join_tokens(token for token in self.lexer.tokenize(text_content) if token[0] != COMMENT)
+
+        # Remove lines that become empty after comment removal
+        lines = text_content.split('\n')
+        cleaned_lines = []
+        for line in lines:
+            stripped = line.rstrip()
+            # Keep the line if it has content or is an intentional blank line
+            if stripped or (not stripped and line == '\n'):
+                cleaned_lines.append(line)
+            elif not stripped and cleaned_lines and cleaned_lines[-1].strip():
+                # Preserve single blank lines between code blocks
+                cleaned_lines.append('')
+
+        text_content = '\n'.join(cleaned_lines)
+
+        # Remove excessive blank lines (more than 2 consecutive)
+        text_content = EXCESS_BLANK_LINES.sub('\n\n', text_content)
+
+        return text_content
+
+    # =========================================================================
+    # OBFUSCATION LEVEL ACTIONS
+    # =========================================================================
+    # Each action method must be named _action_<action_name> where action_name
+    # matches what's in OBFUSCATION_LEVELS config.
+    # =========================================================================
+
+    def _action_obfuscate_identifiers(self, text_content):
+        """Action: Obfuscate all unknown identifiers"""
+        # Keywords stay, so later levels can still parse the code (def, elif, None);
+        # never mapped, so applying the mappings to new text cannot rename them either
+        keywords = language_keywords(self.language or self._detected_language)
+
+        # Identifiers inside comments and strings are blurred too
+        def replace_identifier(match):
+            word = match.group(0)
+            if word in keywords or word[0] == '\\':
+                return word
+            return self.auto_obfuscate_word(word)
+
+        # Left to right over the tokens, so placeholders are allocated in text order
+        source = self.lexer.tokenize(text_content)
+        tokens = []
+        for i, (kind, value) in enumerate(source):
+            if not i % PROGRESS_INTERVAL:
+                self._report(i, len(source))
+            if kind == IDENT:
+                if value not in keywords:
+                    value = self.auto_obfuscate_word(value)
+            elif kind == COMMENT and value[:3].upper() == 'REM':
+                # Keep the VB REM marker itself
+                value = value[:3] + IDENTIFIER.sub(replace_identifier, value[3:])
+            elif kind == COMMENT:
+                value = IDENTIFIER.sub(replace_identifier, value)
+            elif kind == STRING:
+                # C# verbatim strings (@"C:\Users") have no escapes
+                value = (IDENTIFIER if value.startswith(VERBATIM_PREFIXES) else STRING_WORD).sub(replace_identifier, value)
+            tokens.append((kind, value))
+
+        return self._join_tokens(tokens, source)
+
+    def _action_remove_comments(self, text_content):
+        """Action: Replace all comments with placeholders (can be deobfuscated)"""
+        source = self.lexer.tokenize(text_content)
+        tokens = list(source)
+
+        # Comments come from the lexer, so // inside a string ("https://...") is not one
+        comment_indexes = [i for i, (kind, _) in enumerate(tokens) if kind == COMMENT]
+        if not comment_indexes:
+            return text_content
+
+        # Reverse order, so numbering runs from the end as before
+        for i in reversed(comment_indexes):
+            replacement = self._comment_placeholder(tokens[i][1])
+            if replacement is not None:
+                tokens[i] = (COMMENT, replacement)
+
+        return self._join_tokens(tokens, source)
+
+    def _comment_placeholder(self, comment_text):
+        """Placeholder comment for a comment token (None to keep it as is)"""
+        # Skip if already a placeholder (one match covers every comment style)
+        if COMMENT_PLACEHOLDER.fullmatch(comment_text):
+            return None
+
+        # Extract just the content (without comment markers)
+        # This way deobfuscate replaces COMMENT001 with just the content
+        if comment_text.startswith('/*') and comment_text.endswith('*/'):
+            comment_content = comment_text[2:-2]
+            comment_style = 'block'
+        elif comment_text.startswith('<!--') and comment_text.endswith('-->'):
+            comment_content = comment_text[4:-3]
+            comment_style = 'html'
+        elif comment_text.startswith('--[[') and comment_text.endswith(']]'):
+            comment_content = comment_text[4:-2]
+            comment_style = 'lua'
+        elif comment_text.startswith(UNCLOSED_COMMENT_OPENERS):
+            # Unclosed block comment (runs to the end of the text): stays unclosed
+            opener = next(opener for opener in UNCLOSED_COMMENT_OPENERS if comment_text.startswith(opener))
+            comment_content = comment_text[len(opener):]
+            comment_style = 'unclosed'
+        elif comment_text.startswith('///'):
+            comment_content = comment_text[3:]
+            comment_style = 'xmldoc'
+        elif comment_text.startswith('//'):
+            comment_content = comment_text[2:]
+            comment_style = 'line'
+        elif comment_text.startswith('#'):
+            comment_content = comment_text[1:]
+            comment_style = 'hash'
+        elif comment_text.startswith('--'):
+            comment_content = comment_text[2:]
+            comment_style = 'sql'
+        elif comment_text.startswith("'"):
+            comment_content = comment_text[1:]
+            comment_style = 'vb'
+        elif comment_text[:3].upper() == 'REM':
+            comment_content = comment_text[3:]
+            comment_style = 'rem'
+        else:
+            comment_content = comment_text
+            comment_style = 'block'
+
+        # Whitespace around the content stays in the comment (deobfuscate gives it back exactly)
+        lead = comment_content[:len(comment_content) - len(comment_content.lstrip())]
+        trail = comment_content[len(comment_content.rstrip()):]
+        comment_content = comment_content.strip()
+
+        # Skip empty comments
+        if not comment_content:
+            return None
+
+        # Skip if content already mapped
+        if self.mappings.has_placeholder(comment_content):
+            return None
+
+        # Generate or reuse mapping for the CONTENT only
+        if comment_content not in self.mappings:
+            placeholder = self.mappings.next_placeholder('COMMENT')
+            self.add_mapping(comment_content, placeholder)
+
+        placeholder = self.mappings[comment_content]
+
+        # Determine comment style for placeholder
+        if comment_style == 'block' and comment_text.startswith('/*'):
+            replacement = f"/*{lead}{placeholder}{trail}*/"
+        elif comment_style == 'html':
+            replacement = f"<!--{lead}{placeholder}{trail}-->"
+        elif comment_style == 'lua':
+            replacement = f"--[[{lead}{placeholder}{trail}]]"
+        elif comment_style == 'unclosed':
+            replacement = f"{opener}{lead}{placeholder}{trail}"
+        elif comment_style == 'xmldoc':
+            replacement = f"///{lead}{placeholder}{trail}"
+        elif comment_style == 'line':
+            replacement = f"//{lead}{placeholder}{trail}"
+        elif comment_style == 'hash':
+            replacement = f"#{lead}{placeholder}{trail}"
+        elif comment_style == 'sql':
+            replacement = f"--{lead}{placeholder}{trail}"
+        elif comment_style == 'vb':
+            replacement = f"'{lead}{placeholder}{trail}"
+        elif comment_style == 'rem':
+            replacement = f"{comment_text[:3]}{lead or ' '}{placeholder}{trail}"
+        else:
+            replacement = f"/* {placeholder} */"
+
+        return replacement
+
+    def _action_remove_empty_lines(self, text_content):
+        """Action: Remove excessive empty lines and whitespace-only lines"""
+        # Remove lines that are only whitespace
+        lines = text_content.split('\n')
+        cleaned_lines = []
+        for line in lines:
+            stripped = line.rstrip()
+            if stripped:
+                cleaned_lines.append(stripped)
+            elif cleaned_lines and cleaned_lines[-1]:
+                # Preserve single blank line between code blocks
+                cleaned_lines.append('')
+
+        text_content = '\n'.join(cleaned_lines)
+
+        # Remove excessive blank lines (more than 1 consecutive)
+        text_content = EXCESS_BLANK_LINES.sub('\n\n', text_content)
+
+        # Remove trailing empty lines
+        return text_content.rstrip('\n')
+
+    def _action_obfuscate_strings(self, text_content):
+        """Action: Obfuscate string contents"""
+        source = self.lexer.tokenize(text_content)
+        tokens = list(source)
+
+        def has_interpolation(content):
+            """Check if string has interpolation syntax like {variable}"""
+            return '{' in content and '}' in content
+
+        # String tokens never start inside a comment - the lexer already read those
+        # (template/raw backtick strings are left alone)
+        strings_to_replace = []
+        for i, (kind, value) in enumerate(tokens):
+            if kind != STRING:
+                continue
+            parts = split_string(value)
+            if not parts or parts[1] == '`':
+                continue
+            string_content = parts[2]  # Without prefix and quotes
+
+            # Skip empty strings, already obfuscated strings, and interpolated strings
+            if (string_content and
+                not self.mappings.has_placeholder(string_content) and
+                not has_interpolation(string_content)):
+                strings_to_replace.append((i, string_content, parts))
+
+        if not strings_to_replace:
+            return text_content
+
+        # Reverse order, so numbering runs from the end as before
+        for i, string_content, (prefix, quote, _, closing) in reversed(strings_to_replace):
+            # Check if this string content is already mapped
+            if string_content not in self.mappings:
+                identifier = self.generate_ai_identifier(string_content)
+                self.add_mapping(string_content, identifier)
+            else:
+                identifier = self.mappings[string_content]
+
+            # Replace the string content
+            tokens[i] = (STRING, f"{prefix}{quote}{identifier}{closing}")
+
+        return self._join_tokens(tokens, source)
+
+    def _action_obfuscate_guids(self, text_content):
+        """Action: Obfuscate GUIDs/UUIDs with placeholders"""
+        guids_found = list(GUID.finditer(text_content))
+
+        if not guids_found:
+            return text_content
+
+        # Process in reverse order (numbering runs from the end as before)
+        edits = Rewriter(text_content)
+        for match in reversed(guids_found):
+            guid = match.group(0)
+
+            # Skip if already obfuscated (is a placeholder)
+            if self.mappings.has_placeholder(guid):
+                continue
+
+            # Generate or reuse mapping
+            if guid not in self.mappings:
+                # Generate GUID placeholder like GUID001, GUID002
+                placeholder = self.mappings.next_placeholder('GUID')
+                self.add_mapping(guid, placeholder)
+
+            placeholder = self.mappings[guid]
+            edits.replace(match.start(), match.end(), placeholder)
+
+        return edits.apply()
+
+    def _action_obfuscate_paths(self, text_content):
+        """Action: Obfuscate file paths, URLs, and API routes"""
+        paths_to_replace = []
+
+        # Path formats (patterns compiled at module level):
+        # 1. Windows paths: C:\Users\..., \\server\share, ..\folder
+        # 2. Unix paths: /usr/local/..., ./folder, ../folder
+        # 3. URLs: http://, https://, ftp://, file://
+        # 4. API routes: /api/v1/users, /users/{id}
+        # 5. Relative paths: folder/subfolder, ./src/components
+
+        # Find URLs
+        for match in URL.finditer(text_content):
+            path = match.group(0)
+            if path and not path.startswith('PATH') and not self.mappings.has_placeholder(path):
+                paths_to_replace.append((match.start(), match.end(), path))
+
+        # Find Windows paths
+        for match in WINDOWS_ABS_PATH.finditer(text_content):
+            path = match.group(0)
+            if path and not path.startswith('PATH') and not self.mappings.has_placeholder(path):
+                paths_to_replace.append((match.start(), match.end(), path))
+
+        # Find UNC paths
+        for match in UNC_PATH.finditer(text_content):
+            path = match.group(0)
+            if path and not path.startswith('PATH') and not self.mappings.has_placeholder(path):
+                paths_to_replace.append((match.start(), match.end(), path))
+
+        # Find Unix paths, API routes and generic paths (string literal contents from the lexer)
+        pos = 0
+        tokens = self.lexer.tokenize(text_content)
+        for i, (kind, value) in enumerate(tokens):
+            if not i % PROGRESS_INTERVAL:
+                self._report(i, len(tokens))
+            parts = split_string(value) if kind == STRING else None
+            if parts and parts[1] != '`':
+                prefix, quote, path, closing = parts
+                start = pos + len(prefix) + len(quote)
+                end = start + len(path)
+                if path and not path.startswith('PATH') and not self.mappings.has_placeholder(path):
+                    if len(path) > 1 and (UNIX_ABS_PATH.fullmatch(path) or API_ROUTE.fullmatch(path)):
+                        paths_to_replace.append((start, end, path))
+                    elif len(path) > 3 and GENERIC_PATH.fullmatch(path):
+                        # Skip if looks like a version number or simple ratio
+                        if not VERSION_NUMBER.fullmatch(path):
+                            paths_to_replace.append((start, end, path))
+            pos += len(value)
+
+        # Find relative paths
+        for match in RELATIVE_PATH.finditer(text_content):
+            path = match.group(0)
+            if path and not path.startswith('PATH') and not self.mappings.has_placeholder(path):
+                paths_to_replace.append((match.start(), match.end(), path))
+
+        if not paths_to_replace:
+            return text_content
+
+        # Remove duplicates and sort by position (reverse)
+        seen = set()
+        unique_paths = []
+        for item in paths_to_replace:
+            key = (item[0], item[1])
+            if key not in seen:
+                seen.add(key)
+                unique_paths.append(item)
+
+        # Overlapping matches (a URL that is also a relative path): the first one wins
+        unique_paths.sort(key=lambda x: x[0])
+        non_overlapping = []
+        covered_to = 0
+        for item in unique_paths:
+            if item[0] >= covered_to:
+                non_overlapping.append(item)
+                covered_to = item[1]
+        unique_paths = non_overlapping[::-1]
+
+        # Replace paths with placeholders
+        edits = Rewriter(text_content)
+        for start, end, path in unique_paths:
+            # Skip if already obfuscated
+            if self.mappings.has_placeholder(path):
+                continue
+
+            # Generate or reuse mapping
+            if path not in self.mappings:
+                placeholder = self.mappings.next_placeholder('PATH')
+                self.add_mapping(path, placeholder)
+            else:
+                placeholder = self.mappings[path]
+
+            edits.replace(start, end, placeholder)
+
+        return edits.apply()
+
+    def _action_anonymize_members(self, text_content):
+        """Action: Anonymize function names, property names, and field names (C#, TS)"""
+        # Track replacements to do them all at once
+        replacements = {}  # name -> placeholder category (FUNC, PROP, FIELD)
+
+        # Skip these common names that shouldn't be anonymized
+        skip_names = {
+            'constructor', 'get', 'set', 'async', 'await', 'return', 'if', 'else',
+            'for', 'while', 'switch', 'case', 'break', 'continue', 'try', 'catch',
+            'finally', 'throw', 'new', 'this', 'super', 'class', 'interface',
+            'extends', 'implements', 'import', 'export', 'default', 'from',
+            'const', 'let', 'var', 'function', 'void', 'null', 'undefined',
+            'true', 'false', 'string', 'number', 'boolean', 'object', 'any',
+            'never', 'unknown', 'readonly', 'static', 'public', 'private',
+            'protected', 'abstract', 'override', 'virtual', 'sealed', 'partial',
+            'internal', 'extern', 'volatile', 'unsafe', 'fixed', 'sizeof',
+            'typeof', 'nameof', 'is', 'as', 'in', 'out', 'ref', 'params',
+            'Main', 'ToString', 'Equals', 'GetHashCode', 'Dispose', 'Configure',
+            'ConfigureServices', 'Build', 'Run', 'CreateBuilder', 'AddScoped',
+            'AddSingleton', 'AddTransient', 'UseRouting', 'UseEndpoints',
+            'MapControllers', 'MapGet', 'MapPost', 'MapPut', 'MapDelete',
+            'OnConnectedAsync', 'OnDisconnectedAsync', 'SendAsync', 'InvokeAsync',
+            'Task', 'Action', 'Func', 'ILogger', 'IConfiguration', 'IServiceCollection',
+            'DbContext', 'DbSet', 'Entity', 'Key', 'Required', 'MaxLength',
+            'length', 'push', 'pop', 'map', 'filter', 'reduce', 'forEach',
+            'find', 'findIndex', 'includes', 'indexOf', 'slice', 'splice',
+            'concat', 'join', 'split', 'trim', 'toLowerCase', 'toUpperCase',
+            'toString', 'valueOf', 'hasOwnProperty', 'prototype', 'apply',
+            'call', 'bind', 'then', 'catch', 'finally', 'resolve', 'reject',
+            'Promise', 'Observable', 'Subject', 'subscribe', 'unsubscribe',
+            'next', 'error', 'complete', 'pipe', 'tap', 'switchMap', 'mergeMap',
+            'useState', 'useEffect', 'useContext', 'useReducer', 'useCallback',
+            'useMemo', 'useRef', 'useLayoutEffect', 'render', 'componentDidMount',
+            'componentWillUnmount', 'componentDidUpdate', 'setState', 'props',
+            'state', 'context', 'children', 'key', 'ref', 'value', 'onChange',
+            'onClick', 'onSubmit', 'onError', 'onSuccess', 'onComplete',
+        }
+
+        # Keywords of the text's language are never members (Python's except, or)
+        keywords = language_keywords(self.language or self._detected_language)
+
+        # Also skip already obfuscated identifiers
+        def should_skip(name):
+            if name in skip_names or name in keywords:
+                return True
+            if self.is_obfuscated_identifier(name):
+                return True
+            if self.mappings.has_placeholder(name):
+                return True
+            # Skip names that are all uppercase (constants)
+            if name.isupper() and len(name) > 1:
+                return True
+            # Skip single character names
+            if len(name) <= 1:
+                return True
+            # Skip names starting with underscore followed by lowercase (private convention)
+            # but still anonymize them
+            return False
+
+        # Declarations from the syntax tree when tree-sitter can parse the text
+        members = find_members(text_content, self.language or self._detected_language) if self.use_tree_sitter else None
+        if members is not None:
+            for name, category in members:
+                if not should_skip(name) and name not in replacements:
+                    replacements[name] = category
+            return self._replace_members(text_content, replacements)
+
+        # Declarations are searched in code only (comment and string contents blanked);
+        # oversized lines (minified code) are left out, their names are BLUR's job
+        code = OVERSIZED_LINE.sub('', self.lexer.code_view(text_content))
+
+        # Find C# methods
+        for match in CS_METHOD.finditer(code):
+            name = match.group(1)
+            if not should_skip(name) and name not in replacements:
+                replacements[name] = 'FUNC'
+
+        # Find C# properties (but not methods - check no '(' after)
+        self._report(1, 5)
+        for match in CS_PROPERTY.finditer(code):
+            name = match.group(1)
+            # Make sure this isn't a method (no opening paren)
+            end_pos = match.end()
+            if end_pos < len(code) and code[end_pos-1] != '(':
+                if not should_skip(name) and name not in replacements:
+                    replacements[name] = 'PROP'
+
+        # Find C# fields
+        self._report(2, 5)
+        for match in CS_FIELD.finditer(code):
+            name = match.group(1)
+            # Skip if it looks like a property or method (already captured)
+            if not should_skip(name) and name not in replacements:
+                # Check if this is followed by { (property) or ( (method)
+                remaining = code[match.end()-1:match.end()+5]
+                if not remaining.startswith('{') and not remaining.startswith('('):
+                    replacements[name] = 'FIELD'
+
+        # Find TS methods (in class context - has { after )
+        self._report(3, 5)
+        for match in TS_METHOD.finditer(code):
+            name = match.group(1)
+            if not should_skip(name) and name not in replacements:
+                replacements[name] = 'FUNC'
+
+        return self._replace_members(text_content, replacements)
+
+    def _replace_members(self, text_content, replacements):
+        """Map each member name to a new placeholder of its category and replace it everywhere"""
+        if not replacements:
+            return text_content
+
+        # Create actual mappings (numbered per category in discovery order); a name
+        # an earlier pass mapped keeps its placeholder, so that one still restores
+        for name, prefix in replacements.items():
+            if name not in self.mappings:
+                self.add_mapping(name, self.mappings.next_placeholder(prefix))
+
+        # Replace all occurrences (whole word only) in one pass: a trie regex over
+        # every name finds them all, the placeholder comes from a dict lookup
+        self._report(4, 5)
+        placeholders = {name: self.mappings[name] for name in replacements}
+        member_pattern = re.compile(r'\b(?:' + trie_pattern(placeholders) + r')\b')
+        return member_pattern.sub(lambda match: placeholders[match.group(0)], text_content)
+
+    def _body_placeholder(self, body_content):
+        """BODY placeholder for a function body (the same body always gets the same one)"""
+        if body_content not in self.mappings:
+            placeholder = self.mappings.next_placeholder('BODY')
+            self.add_mapping(body_content, placeholder)
+            return placeholder
+        return self.mappings[body_content]
+
+    def _remove_python_bodies(self, text_content, spans):
+        """Replace Python function bodies (spans from one ast parse) with BODY placeholders"""
+        edits = Rewriter(text_content)
+        for count, (start, end) in enumerate(spans, 1):
+            if not count % PROGRESS_INTERVAL:
+                self._report(start, len(text_content))
+            body_content = text_content[start:end]
+            # Skip bodies that already are a placeholder
+            if not BODY_PLACEHOLDER.fullmatch(body_content):
+                edits.replace(start, end, self._body_placeholder(body_content))
+        return edits.apply()
+
+    def _replace_body(self, edits, text_content, open_pos, close_pos):
+        """Replace the body between two braces with { BODY001 }; return False if it is empty or a placeholder"""
+        inner = text_content[open_pos + 1:close_pos]
+        body_content = inner.strip()
+        if not body_content or BODY_PLACEHOLDER.fullmatch(body_content):
+            return False
+        # Whitespace inside the braces stays (like the indentation of a Python body),
+        # so deobfuscate gives the body back exactly
+        lead = inner[:len(inner) - len(inner.lstrip())]
+        trail = inner[len(inner.rstrip()):]
+        edits.replace(open_pos + 1 + len(lead), close_pos - len(trail), self._body_placeholder(body_content))
+        return True
+
+    def _action_remove_function_bodies(self, text_content):
+        """Action: Remove function/method bodies, keep only signatures (C#, JS, TS, Python)"""
+        # Python has no braces: its bodies come from one ast parse (the brace
+        # scan below only runs if the text does not parse)
+        language = self.language or self._detected_language
+        if language == "python":
+            spans = python_body_spans(text_content)
+            if spans is not None:
+                return self._remove_python_bodies(text_content, spans)
+
+        # Function bodies from the syntax tree when tree-sitter can parse the text
+        bodies = function_bodies(text_content, language) if self.use_tree_sitter else None
+        if bodies is not None:
+            edits = Rewriter(text_content)
+            for count, (open_pos, close_pos) in enumerate(bodies, 1):
+                if not count % PROGRESS_INTERVAL:
+                    self._report(open_pos, len(text_content))
+                self._replace_body(edits, text_content, open_pos, close_pos)
+            return edits.apply()
+
+        # Check every opening brace for a function signature before it: ")" followed
+        # by optional whitespace/type annotation then "{"
+
+        # Scan the original text; replaced bodies are collected as edits and skipped
+        result = text_content
+        edits = Rewriter(text_content)
+
+        # Every code brace and its closing brace, matched in one pass over the tokens
+        # (braces in comments and strings are not code)
+        open_braces, matching_brace = bracket_map(self.lexer.tokenize(result))
+
+        # Find all potential function signatures: pattern is )...{ where ... is whitespace or return type hints
+        i = 0
+        for braces, brace_pos in enumerate(open_braces, 1):
+            # Braces inside a body already replaced
+            if brace_pos < i:
+                continue
+
+            if not braces % PROGRESS_INTERVAL:
+                self._report(brace_pos, len(result))
+
+            # Look backwards from brace to find if there's a ) before it (function signature)
+            # Check up to 200 chars back for the closing paren of signature
+            search_start = max(0, brace_pos - 200)
+            segment = result[search_start:brace_pos]
+
+            # Find the last ) in this segment
+            paren_pos = segment.rfind(')')
+
+            if paren_pos != -1:
+                # Check what's between ) and { - should be whitespace, type annotations, or keywords
+                between = segment[paren_pos + 1:]
+                # Allow: whitespace, :, type names, async, =>, where clauses
+                between_stripped = between.strip()
+
+                # Valid patterns between ) and {:
+                # - empty or whitespace only
+                # - : ReturnType (TypeScript)
+                # - where T : constraint (C#)
+                # - => (but not arrow function expression - those start with = before ()
+                is_valid_function = False
+
+                if not between_stripped:
+                    is_valid_function = True
+                elif TS_RETURN_TYPE.fullmatch(between_stripped):
+                    # TypeScript return type
+                    is_valid_function = True
+                elif CS_CONSTRAINT.match(between_stripped):
+                    # C# generic constraint
+                    is_valid_function = True
+
+                if is_valid_function:
+                    # Now find the start of the signature (go back to find the line start or previous statement)
+                    # Find the start of this line
+                    line_start = result.rfind('\n', 0, search_start + paren_pos)
+                    if line_start == -1:
+                        line_start = 0
+                    else:
+                        line_start += 1
+
+                    # Get the full signature
+                    signature = result[line_start:brace_pos].rstrip()
+
+                    # Skip if this looks like a control structure (if, while, for, etc.)
+                    sig_stripped = signature.strip()
+                    control_keywords = ['if', 'else', 'while', 'for', 'foreach', 'switch', 'catch', 'finally', 'lock', 'using', 'try']
+                    is_control = False
+                    for kw in control_keywords:
+                        if sig_stripped == kw or sig_stripped.startswith(kw + ' ') or sig_stripped.startswith(kw + '('):
+                            is_control = True
+                            break
+
+                    # Also skip class/interface/struct/namespace/enum declarations
+                    declaration_keywords = ['class', 'interface', 'struct', 'namespace', 'enum', 'record']
+                    for kw in declaration_keywords:
+                        if kw + ' ' in sig_stripped or sig_stripped.endswith(kw):
+                            is_control = True
+                            break
+
+                    if not is_control:
+                        # Matching closing brace (-1: never closed)
+                        close_pos = matching_brace.get(brace_pos, -1)
+
+                        # Replace the body (unless empty or already a placeholder) and continue after it
+                        if close_pos != -1 and self._replace_body(edits, result, brace_pos, close_pos):
+                            i = close_pos + 1
+
+        return edits.apply()
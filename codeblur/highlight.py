@@ -0,0 +1,100 @@
+import tkinter as tk
+
+from .engine import PLACEHOLDER
+
+
+class Highlighter:
+    """Viewport-aware placeholder highlighting for a Tk Text widget
+
+    Placeholder spans are found with one pass of the static placeholder
+    shape regex (CATEGORY + digits) over the visible lines only, keeping
+    the longest prefix of each match the mapping store knows (digits may
+    be glued on: PERSON0012 is PERSON001 + "2", as restore reads it), and
+    tagged with a single bulk tag_add call. Nothing is rebuilt when the
+    mappings grow. Lines already tagged are remembered, so scrolling only
+    tags the newly exposed lines and edits only re-tag dirty lines.
+    """
+
+    def __init__(self, text_area, is_placeholder, tag="obfuscated", margin=50):
+        self.text_area = text_area
+        self.is_placeholder = is_placeholder  # checks a placeholder-shaped word against the mappings (O(1))
+        self.tag = tag
+        self.margin = margin                  # extra lines tagged above/below the viewport
+        self.tagged_lines = set()
+        self._refresh_pending = False
+
+    def clear(self):
+        """Remove all tags without re-tagging"""
+        self.text_area.tag_remove(self.tag, "1.0", tk.END)
+        self.tagged_lines.clear()
+
+    def invalidate(self):
+        """Forget all tags (text or mappings changed) and re-tag the viewport"""
+        self.clear()
+        self.refresh()
+
+    def mark_dirty(self, first_line, last_line=None):
+        """Re-tag a range of lines after an edit"""
+        if last_line is None:
+            last_line = first_line
+        self.text_area.tag_remove(self.tag, f"{first_line}.0", f"{last_line}.end")
+        self.tagged_lines.difference_update(range(first_line, last_line + 1))
+        self.refresh()
+
+    def schedule_refresh(self):
+        """Refresh once the event loop is idle (coalesces scroll events)"""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.text_area.after_idle(self.refresh)
+
+    def visible_lines(self):
+        """Return (first, last) line numbers of the viewport plus margin"""
+        first = int(self.text_area.index("@0,0").split('.')[0])
+        last = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split('.')[0])
+        line_count = int(self.text_area.index("end-1c").split('.')[0])
+        return max(1, first - self.margin), min(line_count, last + self.margin)
+
+    def refresh(self):
+        """Tag placeholders on visible lines that are not tagged yet"""
+        self._refresh_pending = False
+        first, last = self.visible_lines()
+
+        # Group untagged lines into contiguous runs, one text fetch per run
+        spans = []
+        run_start = None
+        for line in range(first, last + 2):
+            untagged = line <= last and line not in self.tagged_lines
+            if untagged and run_start is None:
+                run_start = line
+            elif not untagged and run_start is not None:
+                spans.extend(self._find_spans(run_start, line - 1))
+                self.tagged_lines.update(range(run_start, line))
+                run_start = None
+
+        # One Tcl call for every span instead of one per match
+        if spans:
+            self.text_area.tag_add(self.tag, *spans)
+
+    def _find_spans(self, first_line, last_line):
+        """Flat list of (start, end) text indexes for placeholders in a line range"""
+        base = f"{first_line}.0"
+        text = self.text_area.get(base, f"{last_line}.end")
+        spans = []
+        for match in PLACEHOLDER.finditer(text):
+            # Shaped like a placeholder is not enough (ID3 may be code): it must be mapped
+            end = self._mapped_end(match)
+            if end is None:
+                continue
+            spans.append(f"{base}+{match.start()}c")
+            spans.append(f"{base}+{end}c")
+        return spans
+
+    def _mapped_end(self, match):
+        """End of the longest mapped placeholder a shape match starts with (None if there is none)"""
+        word = match.group(0)
+        # \d+ is greedy: try shorter digit runs until one is mapped
+        digits_start = len(word.rstrip('0123456789'))
+        for end in range(len(word), digits_start, -1):
+            if self.is_placeholder(word[:end]):
+                return match.start() + end
+        return None
@@ -0,0 +1,173 @@
+import zlib
+
+
+# Undo entries kept at most, and their total size cap (compressed text + mapping deltas)
+MAX_UNDO_LEVELS = 20
+MAX_UNDO_BYTES = 32 * 1024 * 1024
+
+# Rough per-mapping cost of a delta entry (dict slot + two string headers)
+_MAPPING_OVERHEAD = 150
+
+
+def _common_prefix_length(a, b):
+    """Length of the common prefix of two strings (binary search over C-level slice compares)"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _common_suffix_length(a, b, limit):
+    """Length of the common suffix of two strings, at most limit"""
+    low, high = 0, min(len(a), len(b), limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class TextDiff:
+    """The one span that differs between two texts, both versions zlib-compressed
+
+    Everything before and after the span is shared, so only the changed
+    middle is stored - in both directions, for undo and redo.
+    """
+
+    def __init__(self, before, after):
+        self.start = _common_prefix_length(before, after)
+        suffix = _common_suffix_length(before, after, min(len(before), len(after)) - self.start)
+        self.before_end = len(before) - suffix
+        self.after_end = len(after) - suffix
+        self._before = zlib.compress(before[self.start:self.before_end].encode('utf-8'))
+        self._after = zlib.compress(after[self.start:self.after_end].encode('utf-8'))
+
+    def __len__(self):
+        return len(self._before) + len(self._after)
+
+    def is_empty(self):
+        """Check if both texts were the same"""
+        return self.before_end == self.start and self.after_end == self.start
+
+    def revert(self, after):
+        """before, given after"""
+        return after[:self.start] + zlib.decompress(self._before).decode('utf-8') + after[self.after_end:]
+
+    def apply(self, before):
+        """after, given before"""
+        return before[:self.start] + zlib.decompress(self._after).decode('utf-8') + before[self.before_end:]
+
+
+class UndoStep:
+    """One undoable action: its text diff and the mappings it changed (values before and after)"""
+
+    def __init__(self, text_diff, mappings_before, mappings_after):
+        self.text_diff = text_diff
+        self.mappings_before = mappings_before   # original -> placeholder (None: absent)
+        self.mappings_after = mappings_after
+        self.size = len(text_diff) + sum(
+            len(original) + len(placeholder or '') + _MAPPING_OVERHEAD
+            for original, placeholder in mappings_before.items()) * 2
+
+    def is_empty(self):
+        """Check if the action changed nothing"""
+        return self.text_diff.is_empty() and self.mappings_before == self.mappings_after
+
+
+def _set_mappings(mappings, values):
+    """Put originals back to the given placeholders (None: remove)"""
+    for original, placeholder in values.items():
+        if placeholder is None:
+            if original in mappings:
+                del mappings[original]
+        else:
+            mappings[original] = placeholder
+
+
+class UndoHistory:
+    """Undo/redo as diffs instead of full text and mapping copies
+
+    begin() is called before each action with the current text. The
+    action's step is finished at the next begin()/undo()/redo() by
+    diffing that text against the text then, while the mapping store
+    logs the values the action overwrote - so the only full text held is
+    the last one the history saw. Typing after an action is folded into
+    that action's step; typing after an undo or redo becomes a step of
+    its own. Steps are capped by count and by bytes, oldest dropped
+    first.
+    """
+
+    def __init__(self, max_levels=MAX_UNDO_LEVELS, max_bytes=MAX_UNDO_BYTES):
+        self.max_levels = max_levels
+        self.max_bytes = max_bytes
+        self.undo_steps = []
+        self.redo_steps = []
+        self.size = 0          # bytes held by undo_steps
+        self._text = None      # text as of the last begin/undo/redo
+        self._open = None      # mapping store logging for the action in progress
+
+    def begin(self, text, mappings):
+        """Start an undo step for an action about to change text and/or mappings"""
+        self._sync(text)
+        self.redo_steps.clear()
+        mappings.start_undo_log()
+        self._open = mappings
+
+    def discard(self):
+        """Abandon the open step: put its mapping changes back, return the text it started from"""
+        if self._open is not None:
+            mappings, self._open = self._open, None
+            _set_mappings(mappings, mappings.stop_undo_log())
+        return self._text
+
+    def undo(self, text, mappings):
+        """Revert the last step: restore its mappings, return the previous text (None: nothing to undo)"""
+        self._sync(text)
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.size -= step.size
+        _set_mappings(mappings, step.mappings_before)
+        self.redo_steps.append(step)
+        self._text = step.text_diff.revert(text)
+        return self._text
+
+    def redo(self, text, mappings):
+        """Re-apply the last undone step: restore its mappings, return the next text (None: nothing to redo)"""
+        self._sync(text)
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        _set_mappings(mappings, step.mappings_after)
+        self._push(step)
+        self._text = step.text_diff.apply(text)
+        return self._text
+
+    def _sync(self, text):
+        """Record what changed since the history last saw the text (the open action, or edits)"""
+        mappings_before = mappings_after = {}
+        if self._open is not None:
+            mappings, self._open = self._open, None
+            mappings_before = mappings.stop_undo_log()
+            mappings_after = {original: mappings.get(original) for original in mappings_before}
+
+        if self._text is not None:
+            step = UndoStep(TextDiff(self._text, text), mappings_before, mappings_after)
+            if not step.is_empty():
+                self._push(step)
+                # Redo steps were diffed against the text before this change
+                self.redo_steps.clear()
+        self._text = text
+
+    def _push(self, step):
+        """Add a step, dropping the oldest ones past the level and byte caps"""
+        self.undo_steps.append(step)
+        self.size += step.size
+        while len(self.undo_steps) > 1 and (len(self.undo_steps) > self.max_levels or self.size > self.max_bytes):
+            self.size -= self.undo_steps.pop(0).size
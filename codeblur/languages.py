@@ -0,0 +1,207 @@
+import itertools
+import keyword
+import os
+import re
+
+from .lexer import BLOCK_COMMENT, COMMENT_PATTERNS, HTML_COMMENT, STRING_PATTERNS, Lexer
+
+
+# =========================================================================
+# LANGUAGE LEXER PLUGINS
+# =========================================================================
+# Each language lists only the comment and string syntaxes it really has,
+# so its lexer never mistakes # in C#, -- in TypeScript or ' in Python for
+# a comment, and the master regex has fewer branches to try.
+#
+# To add a language: add an entry here (extensions, comments, strings and
+# hints - a regex whose matches in the first few KB count as evidence).
+# "comments_first" is for comment syntaxes that start with a word (REM).
+# "keywords" are never renamed by the identifier passes, so the text still
+# parses for the passes that read its structure (SKELETON, ANON).
+# "multiline" maps the openers of comments and strings that may span lines
+# to their closers; the stream scanner uses it to know when a line ends
+# inside one.
+# =========================================================================
+
+# Shared syntaxes
+_BLOCK = BLOCK_COMMENT
+_LINE = r'//[^\n]*'
+_HASH = r'(?!\A\#!)\#[^\n]*'     # a shebang line is not a comment
+_DOUBLE = r'"(?:[^"\\\n\r]|\\[^\n\r])*"'
+_SINGLE = r"'(?:[^'\\\n\r]|\\[^\n\r])*'"
+_TEMPLATE = r'`(?:[^`\\]|\\.)*`'
+
+# Python string prefixes in every letter case (f"...", Rb'...'): the lexer reads
+# them as identifiers, and renaming one would break the literal
+_PYTHON_STRING_PREFIXES = [
+    ''.join(letters)
+    for prefix in ('r', 'u', 'f', 'b', 'rb', 'br', 'fr', 'rf')
+    for letters in itertools.product(*[(char, char.upper()) for char in prefix])
+]
+
+LANGUAGES = {
+    "csharp": {
+        "extensions": [".cs", ".csx", ".cshtml"],
+        "comments": [_BLOCK, _LINE],   # # is a preprocessor directive
+        "strings": [
+            r'@"(?:[^"]|"")*"',         # verbatim (no escapes, may span lines)
+            r'\$?' + _DOUBLE,           # regular and interpolated
+            r"'(?:[^'\\\n\r]|\\[^\n\r]{1,9})'",   # char literal
+        ],
+        "multiline": {'/*': '*/', '@"': '"'},
+        "hints": r'^\s*using\s+[\w.]+;|^\s*namespace\s+[\w.]+|\{\s*get;|\b(?:public|private|internal)\s+(?:sealed\s+|static\s+|partial\s+)*class\s',
+
+        "keywords": (
+            "abstract as base bool break byte case catch char checked class const continue decimal default "
+            "delegate do double else enum event explicit extern false finally fixed float for foreach goto if "
+            "implicit in int interface internal is lock long namespace new null object operator out override "
+            "params private protected public readonly ref return sbyte sealed short sizeof stackalloc static "
+            "string struct switch this throw true try typeof uint ulong unchecked unsafe ushort using virtual "
+            "void volatile while add and alias ascending async await by descending dynamic equals file from get "
+            "global group init into join let managed nameof nint not notnull nuint on or orderby partial record "
+            "remove required scoped select set unmanaged value var when where with yield"
+        ).split(),
+    },
+    "typescript": {
+        "extensions": [".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs"],
+        "comments": [_BLOCK, _LINE],
+        "strings": [_DOUBLE, _SINGLE, _TEMPLATE],
+        "multiline": {'/*': '*/', '`': '`'},
+        "hints": r'^\s*import\s.+\sfrom\s+[\'"]|^\s*export\s+(?:default\s+)?(?:const|function|class|interface)\b|\b(?:const|let)\s+\w+\s*[:=]|=>|\bconsole\.\w+\(',
+
+        "keywords": (
+            "break case catch class const continue debugger default delete do else enum export extends false "
+            "finally for function if import in instanceof new null return super switch this throw true try "
+            "typeof var void while with as implements interface let package private protected public static "
+            "yield abstract accessor any asserts async await boolean constructor declare get infer is keyof "
+            "module namespace never number object of override readonly require satisfies set string symbol "
+            "type undefined unique unknown"
+        ).split(),
+    },
+    "python": {
+        "extensions": [".py", ".pyw", ".pyi"],
+        "comments": [_HASH],
+        "strings": [r'"""(?:[^\\]|\\.)*?"""', r"'''(?:[^\\]|\\.)*?'''", _DOUBLE, _SINGLE],
+        "multiline": {'"""': '"""', "'''": "'''"},
+        "hints": r'^\s*def\s+\w+\(.*\)\s*(?:->.*)?:\s*$|^\s*from\s+[\w.]+\s+import\s|^\s*import\s+[\w.]+\s*$|^\s*class\s+\w+(?:\(.*\))?:\s*$|\bself\.\w+|^\s*elif\b',
+
+        "keywords": keyword.kwlist + getattr(keyword, 'softkwlist', []) + _PYTHON_STRING_PREFIXES,
+    },
+    "sql": {
+        "extensions": [".sql"],
+        "comments": [_BLOCK, r'--[^\n]*'],
+        "strings": [r"'(?:[^']|'')*'", r'"(?:[^"]|"")*"'],   # '' escapes, may span lines
+        "multiline": {'/*': '*/', "'": "'", '"': '"'},
+        "hints": r'(?i)\bselect\b.+\bfrom\b|\binsert\s+into\b|\bcreate\s+(?:table|view|index|procedure)\b|\bupdate\s+\w+\s+set\b|\bdelete\s+from\b|\bwhere\b.+=',
+    },
+    "go": {
+        "extensions": [".go"],
+        "comments": [_BLOCK, _LINE],
+        "strings": [_DOUBLE, r'`[^`]*`', r"'(?:[^'\\\n\r]|\\[^\n\r]{1,9})'"],   # raw strings, runes
+        "multiline": {'/*': '*/', '`': '`'},
+        "hints": r'^package\s+\w+\s*$|^\s*func\s+(?:\(.*\)\s*)?\w+\(|:=|^import\s+\(',
+    },
+    "rust": {
+        "extensions": [".rs"],
+        "comments": [_BLOCK, _LINE],
+        # Strings may span lines; char literals are a single (escaped) char so lifetimes ('a) are not strings
+        "strings": [r'"(?:[^"\\]|\\.)*"', r"'(?:[^'\\\n\r]|\\(?:[nrt0\\'\"]|x[0-9a-fA-F]{2}|u\{[0-9a-fA-F]{1,6}\}))'"],
+        "multiline": {'/*': '*/', '"': '"'},
+        "hints": r'\bfn\s+\w+\s*[<(]|\blet\s+mut\b|^\s*impl\b|^\s*use\s+\w+::|\bpub\s+(?:fn|struct|enum)\b|->\s*Result<',
+    },
+    "shell": {
+        "extensions": [".sh", ".bash", ".zsh"],
+        "comments": [r'(?<![^\s;])' + _HASH],   # only at a word start ($#, ${#x} are not comments)
+        "strings": [r'"(?:[^"\\]|\\.)*"', r"'[^']*'"],
+        "multiline": {'"': '"', "'": "'"},
+        "hints": r'^\s*(?:echo|export|source|local)\s|^\s*(?:el)?if\s+\[|^\s*(?:fi|done|esac)\s*$|;\s*then\s*$|^\s*\w+=\S',
+    },
+    "html": {
+        "extensions": [".html", ".htm", ".xml", ".xaml", ".svg", ".vue"],
+        "comments": [HTML_COMMENT],
+        "strings": [r'"[^"]*"', r"'[^']*'"],   # attribute values
+        "multiline": {'<!--': '-->', '"': '"', "'": "'"},
+        "hints": r'(?i)<!doctype|<html\b|<(?:div|span|head|body|script|p|a)\b[^>]*>|</\w+>',
+    },
+    "vb": {
+        "extensions": [".vb", ".vbs", ".bas"],
+        "comments": [r"'[^\n]*", r'\b(?i:REM)\b[^\n]*'],
+        "strings": [r'"(?:[^"\n]|"")*"'],
+        "comments_first": True,
+        "hints": r'(?i)^\s*(?:dim\s+\w+\s+as\b|end\s+(?:sub|function|if|class)\b|imports\s+[\w.]+|(?:public|private)\s+(?:sub|function)\b)',
+    },
+}
+
+# Unknown languages get every syntax (the behaviour before languages existed)
+GENERIC = {
+    "extensions": [],
+    "comments": COMMENT_PATTERNS,
+    "strings": STRING_PATTERNS,
+    "multiline": {'/*': '*/', '<!--': '-->', '--[[': ']]', '`': '`'},
+}
+
+# Extension -> language, built once
+EXTENSIONS = {ext: name for name, config in LANGUAGES.items() for ext in config["extensions"]}
+
+# Words the identifier passes keep, per language, built once
+_KEYWORDS = {name: frozenset(config.get("keywords", ())) for name, config in LANGUAGES.items()}
+
+# Compiled sniffing hints, built once
+_HINTS = {name: re.compile(config["hints"], re.MULTILINE) for name, config in LANGUAGES.items()}
+
+# How much of the text detection looks at, and the evidence needed to trust it
+SNIFF_CHARS = 4096
+MIN_HINTS = 2
+
+# Shell interpreters on a shebang line
+_SHELL_SHEBANG = re.compile(r'\b(?:ba|z|da|k)?sh\b')
+
+
+def language_config(name):
+    """Lexer config for a language name (None or unknown -> generic)"""
+    return LANGUAGES.get(name, GENERIC)
+
+
+def language_keywords(name):
+    """Reserved words of a language that are never renamed (None or unknown -> none)"""
+    return _KEYWORDS.get(name, frozenset())
+
+
+def create_lexer(name):
+    """New Lexer with only the syntaxes of a language (None -> generic)"""
+    config = language_config(name)
+    return Lexer(config["comments"], config["strings"], config.get("comments_first", False))
+
+
+def detect_language(text=None, filename=None):
+    """Guess the language from the file extension, else from the first few KB
+
+    Returns a LANGUAGES key, or None when nothing is convincing (the
+    generic lexer is used then).
+    """
+    if filename:
+        language = EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if language:
+            return language
+
+    if not text:
+        return None
+
+    sample = text[:SNIFF_CHARS]
+
+    # A shebang settles it
+    if sample.startswith('#!'):
+        first_line = sample.split('\n', 1)[0]
+        if 'python' in first_line:
+            return "python"
+        if _SHELL_SHEBANG.search(first_line):
+            return "shell"
+        if 'node' in first_line:
+            return "typescript"
+
+    best, best_score = None, 0
+    for name, hints in _HINTS.items():
+        score = len(hints.findall(sample))
+        if score > best_score:
+            best, best_score = name, score
+    return best if best_score >= MIN_HINTS else None
@@ -0,0 +1,182 @@
+import re
+from collections import OrderedDict
+from itertools import islice
+
+
+# Token kinds
+COMMENT = 'comment'
+STRING = 'string'
+IDENT = 'ident'      # ASCII identifier (what the passes obfuscate)
+NUMBER = 'number'    # word starting with a digit (42, 0x1F, 3px)
+WORD = 'word'        # any other run of word characters (e.g. starting with a non-ASCII letter)
+SPACE = 'space'
+PUNCT = 'punct'
+
+# Block comments. An unclosed one runs to the end of the text (as compilers read
+# it), and the body is matched in runs of non-closer characters: a lazy .*? that
+# had to find the closer rescanned to the end from every unclosed opener.
+BLOCK_COMMENT = r'/\*[^*]*(?:\*(?!/)[^*]*)*(?:\*/|\Z)'
+HTML_COMMENT = r'<!--[^-]*(?:-(?!->)[^-]*)*(?:-->|\Z)'
+LUA_COMMENT = r'--\[\[[^\]]*(?:\](?!\])[^\]]*)*(?:\]\]|\Z)'
+
+# Comment syntaxes (block comments before the line comments sharing their prefix)
+COMMENT_PATTERNS = [
+    BLOCK_COMMENT,        # C, C++, C#, Java, JS, Go, Rust, etc.
+    HTML_COMMENT,         # XML/HTML
+    LUA_COMMENT,          # Lua multi-line
+    r'//[^\n]*',          # C-family line comments (and /// doc comments)
+    r'\#[^\n]*',          # Python, Shell, Ruby
+    r'--[^\n]*',          # SQL, Lua
+]
+
+# String literal syntaxes ("..." and '...' never span lines, `...` can)
+STRING_PATTERNS = [
+    r'"(?:[^"\\\n\r]|\\[^\n\r])*"',
+    r"'(?:[^'\\\n\r]|\\[^\n\r])*'",
+    r'`(?:[^`\\]|\\.)*`',
+]
+
+# Tokens scanned between two calls of Lexer.checkpoint
+CHECKPOINT_TOKENS = 65536
+
+# Comment/string contents blanked out by code_view (newlines kept)
+_NOT_NEWLINE = re.compile(r'[^\n]')
+
+
+# String literal: prefix (C# @ and $), opening quote, content, closing quote
+_STRING_PARTS = re.compile(r'([@$]*)("""|\'\'\'|["\'`])(.*)(\2)', re.DOTALL)
+
+
+def build_pattern(comment_patterns, string_patterns, comments_first=False):
+    """Master regex: one named group per token kind, tried in order at each position
+
+    Group names are the token kinds, so match.lastgroup is the kind. Words
+    and whitespace go first: they are most tokens, and no comment or
+    string syntax starts with a word or space character (languages with
+    word comments like REM pass comments_first).
+    """
+    comments = '(?P<comment>' + '|'.join(comment_patterns) + ')'
+    words = (
+        r'(?P<ident>[A-Za-z_][A-Za-z0-9_]*(?!\w))'
+        r'|(?P<space>\s+)'
+        r'|(?P<number>\d\w*)'
+        r'|(?P<word>\w+)'
+    )
+    return re.compile(
+        (comments + '|' + words if comments_first else words + '|' + comments)
+        + '|(?P<string>' + '|'.join(string_patterns) + ')'
+        + r'|(?P<punct>.)',
+        re.DOTALL,
+    )
+
+
+def split_string(value):
+    """Split a string token into (prefix, quote, content, closing quote)
+
+    Returns None for tokens that do not look like a quoted literal.
+    """
+    parts = _STRING_PARTS.fullmatch(value)
+    return parts.groups() if parts else None
+
+
+class Lexer:
+    """Splits text into (kind, value) tokens in one regex pass
+
+    Every character belongs to exactly one token, so ''.join of the values
+    gives the text back. Token lists are cached per text: passes that
+    rewrite tokens hand the new list back with remember(), so the next
+    pass (and the next level) starts from tokens instead of re-scanning.
+    Cached lists are shared - treat them as read-only.
+    """
+
+    def __init__(self, comment_patterns=COMMENT_PATTERNS, string_patterns=STRING_PATTERNS,
+                 comments_first=False, cache_size=2):
+        self.pattern = build_pattern(comment_patterns, string_patterns, comments_first)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # text -> tokens, least recently used first
+
+        # Optional callable run every CHECKPOINT_TOKENS tokens of a scan; it may
+        # raise to stop a long scan (the engine checks cancel and its time budget)
+        self.checkpoint = None
+
+    def tokenize(self, text):
+        """Return the token list for text (cached)"""
+        tokens = self._cache.get(text)
+        if tokens is not None:
+            self._cache.move_to_end(text)
+            return tokens
+
+        matches = self.pattern.finditer(text)
+        tokens = []
+        while True:
+            batch = [(match.lastgroup, match.group()) for match in islice(matches, CHECKPOINT_TOKENS)]
+            tokens.extend(batch)
+            if len(batch) < CHECKPOINT_TOKENS:
+                break
+            if self.checkpoint is not None:
+                self.checkpoint()
+        self.remember(text, tokens)
+        return tokens
+
+    def scans_as(self, kind, value):
+        """Check if value on its own scans as one token of kind (a rewritten token kept its kind)"""
+        match = self.pattern.match(value)
+        return match is not None and match.end() == len(value) and match.lastgroup == kind
+
+    def remember(self, text, tokens):
+        """Cache the tokens of a text built by rewriting token values
+
+        Only valid if joining them gives the same tokens back, i.e. every
+        rewritten value scans as one token of its kind (see scans_as).
+        """
+        self._cache[text] = tokens
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached token list"""
+        self._cache.clear()
+
+    def code_view(self, text):
+        """Text with comment and string contents blanked (same length, same line breaks)
+
+        Lets declaration regexes run over code only - nothing inside a
+        comment or a string literal can match them.
+        """
+        parts = []
+        for kind, value in self.tokenize(text):
+            if kind == COMMENT:
+                value = _NOT_NEWLINE.sub(' ', value)
+            elif kind == STRING:
+                value = value[0] + _NOT_NEWLINE.sub(' ', value[1:-1]) + value[-1]
+            parts.append(value)
+        return ''.join(parts)
+
+
+def join_tokens(tokens):
+    """Text of a token list"""
+    return ''.join([value for _, value in tokens])
+
+
+def bracket_map(tokens, opener='{', closer='}'):
+    """Positions of the code brackets in a token list, in one pass
+
+    Returns (opens, matches): every opener's position in text order, and
+    opener position -> position of its closer. Brackets inside comments
+    and strings are separate tokens, so they never count. Unclosed openers
+    have no entry; a closer with nothing open is ignored.
+    """
+    opens = []
+    matches = {}
+    stack = []
+    pos = 0
+    for kind, value in tokens:
+        if kind == PUNCT:
+            if value == opener:
+                opens.append(pos)
+                stack.append(pos)
+            elif value == closer and stack:
+                matches[stack.pop()] = pos
+        pos += len(value)
+    return opens, matches
@@ -0,0 +1,653 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections.abc import MutableMapping
+
+from .trie import compile_trie
+
+
+# Splits a placeholder into category and number (e.g. PERSON042 -> PERSON, 042)
+PLACEHOLDER_PARTS = re.compile(r'([A-Z]+)(\d+)')
+
+# Mappings files with these extensions are SQLite databases (anything else is JSON)
+DATABASE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# Seconds MappingSaver waits after the first unsaved change before writing
+SAVE_DELAY = 0.5
+
+# Placeholder numbers a database store reserves per category at a time
+RESERVE_BLOCK = 64
+
+
+class MappingConflict(Exception):
+    """Raised after a save that left out rows whose placeholder the database already uses for another original"""
+
+    def __init__(self, mappings_file, conflicts):
+        self.mappings_file = mappings_file
+        self.conflicts = conflicts   # [(original, placeholder, original already stored)]
+        shown = ", ".join(f"{placeholder} ({original!r}, stored: {stored!r})"
+                          for original, placeholder, stored in conflicts[:5])
+        more = f" and {len(conflicts) - 5} more" if len(conflicts) > 5 else ""
+        super().__init__(f"{len(conflicts)} placeholder(s) already used in {mappings_file} "
+                         f"for other names, not saved: {shown}{more}")
+
+
+class MappingStore(MutableMapping):
+    """original -> placeholder mappings with a placeholder -> original reverse index
+
+    Both indexes are updated in lockstep, so "is this a placeholder?" and
+    "what was this placeholder?" are O(1) instead of a scan over all values.
+
+    A per-category high-water mark (PERSON -> 42) is kept alongside, so the
+    next placeholder number is allocated in O(1) and never reused. A store
+    loaded from a database reserves its numbers there (see allocator), so
+    processes sharing the file never hand out the same placeholder.
+
+    restore() undoes every placeholder in one pass using a trie regex that
+    is cached until the mappings change.
+
+    version changes on every change; generation only on changes that can
+    alter an earlier lookup result (removals, remaps, clear, placeholders
+    that do not look like CATEGORY123), so caches of per-word results
+    survive the steady stream of new mappings.
+
+    Changes since the last save to a database are journaled, so it only
+    gets the rows that changed (see save_mappings). Until such a save
+    (JSON files, stores never saved) nothing is journaled - the next save
+    writes every row anyway.
+    """
+
+    def __init__(self, mappings=None, counters=None):
+        self._forward = {}   # original -> placeholder
+        self._reverse = {}   # placeholder -> original
+        self._counters = dict(counters) if counters else {}  # category -> highest number used
+
+        # Bumped on every change; invalidates the cached placeholder pattern
+        self._version = 0
+        self._generation = 0
+        self._placeholder_pattern = None
+        self._pattern_version = -1
+
+        # original -> placeholder (None: removed) since the last save to _saved_to
+        # (database only; empty and unused while _saved_to is None)
+        self._changes = {}
+        self._saved_to = None
+        # Set by clear(): the next database save empties the table first
+        self._cleared = False
+
+        # DatabaseAllocator reserving placeholder numbers (None: numbered locally)
+        self.allocator = None
+
+        # original -> placeholder before its first change (None: absent) while an undo step records
+        self._undo_log = None
+
+        if mappings:
+            self.update(mappings)
+
+    def __getitem__(self, original):
+        return self._forward[original]
+
+    def __setitem__(self, original, placeholder):
+        # Drop the stale reverse entry if the original is being remapped
+        old_placeholder = self._forward.get(original)
+        if self._undo_log is not None and original not in self._undo_log:
+            self._undo_log[original] = old_placeholder
+        if old_placeholder is not None:
+            if self._reverse.get(old_placeholder) == original:
+                del self._reverse[old_placeholder]
+            self._generation += 1
+
+        self._forward[original] = placeholder
+        self._reverse[placeholder] = original
+        if self._saved_to is not None:
+            self._changes[original] = placeholder
+        self._version += 1
+
+        # Keep the category high-water mark ahead of every stored placeholder
+        parts = PLACEHOLDER_PARTS.fullmatch(placeholder)
+        if parts:
+            category, num = parts.group(1), int(parts.group(2))
+            if num > self._counters.get(category, 0):
+                self._counters[category] = num
+        else:
+            self._generation += 1
+
+    def __delitem__(self, original):
+        placeholder = self._forward.pop(original)
+        if self._undo_log is not None and original not in self._undo_log:
+            self._undo_log[original] = placeholder
+        if self._reverse.get(placeholder) == original:
+            del self._reverse[placeholder]
+        if self._saved_to is not None:
+            self._changes[original] = None
+        self._version += 1
+        self._generation += 1
+
+    def __contains__(self, original):
+        return original in self._forward
+
+    def __iter__(self):
+        return iter(self._forward)
+
+    def __len__(self):
+        return len(self._forward)
+
+    def __repr__(self):
+        return f"MappingStore({self._forward!r})"
+
+    def keys(self):
+        return self._forward.keys()
+
+    def values(self):
+        return self._forward.values()
+
+    def items(self):
+        return self._forward.items()
+
+    def clear(self):
+        """Remove all mappings (numbering starts over, except from the database's counters)"""
+        if self._undo_log is not None:
+            for original, placeholder in self._forward.items():
+                self._undo_log.setdefault(original, placeholder)
+        self._forward.clear()
+        self._reverse.clear()
+        self._counters.clear()
+        self._version += 1
+        self._generation += 1
+        # Rewritten whole on the next save
+        self._changes.clear()
+        self._saved_to = None
+        self._cleared = True
+
+    @property
+    def version(self):
+        """Change counter, bumped by every change"""
+        return self._version
+
+    @property
+    def generation(self):
+        """Change counter, bumped by changes other than adding a new original"""
+        return self._generation
+
+    @property
+    def counters(self):
+        """Per-category high-water marks (category -> highest number used)"""
+        return self._counters
+
+    def next_placeholder(self, category):
+        """Allocate the next placeholder for a category (e.g. GUID -> GUID004)"""
+        next_num = self._counters.get(category, 0) + 1
+        # Another process may have used numbers since we loaded
+        if self.allocator is not None:
+            next_num = self.allocator.reserve(category, next_num)
+        self._counters[category] = next_num
+        return f"{category}{next_num:03d}"
+
+    def has_placeholder(self, placeholder):
+        """Check if a value is one of our placeholders"""
+        return placeholder in self._reverse
+
+    def original_of(self, placeholder):
+        """Return the original for a placeholder (None if unknown)"""
+        return self._reverse.get(placeholder)
+
+    def placeholders(self):
+        """View of all placeholders"""
+        return self._reverse.keys()
+
+    def placeholder_pattern(self):
+        """Compiled longest-match regex over all placeholders (cached per version)"""
+        if self._pattern_version != self._version:
+            self._placeholder_pattern = compile_trie(self._reverse)
+            self._pattern_version = self._version
+        return self._placeholder_pattern
+
+    def restore(self, text):
+        """Replace every placeholder in text with its original in one pass
+
+        Longest placeholder wins (ID0012 is never read as ID001 + "2"), and
+        originals that themselves contain older placeholders (comment and
+        body contents) are restored recursively.
+        """
+        pattern = self.placeholder_pattern()
+        if pattern is None:
+            return text
+
+        restored = {}   # placeholder -> fully restored original
+        expanding = set()
+
+        def replace(match):
+            placeholder = match.group(0)
+            if placeholder in restored:
+                return restored[placeholder]
+            original = self._reverse[placeholder]
+            # Guard against cycles (an original containing its own placeholder)
+            if placeholder in expanding:
+                return original
+            expanding.add(placeholder)
+            original = pattern.sub(replace, original)
+            expanding.discard(placeholder)
+            restored[placeholder] = original
+            return original
+
+        return pattern.sub(replace, text)
+
+    def start_undo_log(self):
+        """Start recording the value each original had before its first change"""
+        self._undo_log = {}
+
+    def stop_undo_log(self):
+        """Stop recording; return {original: placeholder before (None: absent)}"""
+        log, self._undo_log = self._undo_log, None
+        return log or {}
+
+    def load_rows(self, rows):
+        """Bulk-load (original, placeholder) rows read from storage
+
+        Skips the per-row bookkeeping of __setitem__: counters come from
+        storage, and the rows are not changes.
+        """
+        self._forward.update(rows)
+        self._reverse.update((placeholder, original) for original, placeholder in self._forward.items())
+        self._version += 1
+        self._generation += 1
+
+    def take_changes(self, mappings_file):
+        """Hand over the changes since the last save to mappings_file (None: save everything)
+
+        The journal starts over, so a change made while the caller writes
+        goes into the next save.
+        """
+        changes = self._changes if self._saved_to == mappings_file else None
+        self._changes = {}
+        self._saved_to = mappings_file
+        return changes
+
+    def mark_saved(self, mappings_file):
+        """Record that mappings_file holds exactly these mappings"""
+        self._changes = {}
+        self._saved_to = mappings_file
+
+    def take_cleared(self):
+        """Check (and reset) whether the mappings were cleared since the last save"""
+        cleared, self._cleared = self._cleared, False
+        return cleared
+
+    def mark_unsaved(self, cleared=False):
+        """Forget the saved state (the next save writes everything, after emptying the table if cleared)"""
+        self._changes = {}
+        self._saved_to = None
+        self._cleared = self._cleared or cleared
+
+    def copy(self):
+        """Return a plain dict snapshot of the mappings"""
+        return dict(self._forward)
+
+    def to_dict(self):
+        """Return the underlying original -> placeholder dict (not a copy)"""
+        return self._forward
+
+
+class MappingOverlay(MappingStore):
+    """Writable layer over a read-only base store (new mappings stay local)
+
+    Lookups see the base and the layer; writes only touch the layer, so
+    a worker can run passes against a store another thread reads. New
+    placeholders continue from the base counters at creation time (and
+    go through the base's allocator, if any).
+    Iteration, len() and items() only cover the local (new) mappings -
+    the delta to merge back into the base.
+    """
+
+    def __init__(self, base):
+        super().__init__(counters=base.counters)
+        self.base = base
+        self.allocator = base.allocator
+
+    def __getitem__(self, original):
+        if original in self._forward:
+            return self._forward[original]
+        return self.base[original]
+
+    def __contains__(self, original):
+        return original in self._forward or original in self.base
+
+    def has_placeholder(self, placeholder):
+        return placeholder in self._reverse or self.base.has_placeholder(placeholder)
+
+    def original_of(self, placeholder):
+        original = self._reverse.get(placeholder)
+        return original if original is not None else self.base.original_of(placeholder)
+
+
+def counters_file_for(mappings_file):
+    """Path of the counters table stored next to a mappings file"""
+    base, _ = os.path.splitext(mappings_file)
+    return base + ".counters.json"
+
+
+def is_database_file(mappings_file):
+    """Check if a mappings file is an SQLite database (by extension)"""
+    return os.path.splitext(mappings_file)[1].lower() in DATABASE_EXTENSIONS
+
+
+def load_mappings(mappings_file):
+    """Load existing mappings (and their category counters) from JSON files or a database"""
+    if is_database_file(mappings_file):
+        return load_database(mappings_file)
+
+    counters = {}
+    counters_file = counters_file_for(mappings_file)
+    if os.path.exists(counters_file):
+        try:
+            with open(counters_file, 'r', encoding='utf-8') as f:
+                counters = json.load(f)
+        except:
+            counters = {}
+
+    if os.path.exists(mappings_file):
+        try:
+            with open(mappings_file, 'r', encoding='utf-8') as f:
+                return MappingStore(json.load(f), counters)
+        except:
+            return MappingStore(counters=counters)
+    return MappingStore(counters=counters)
+
+
+def save_mappings(mappings_file, mappings):
+    """Save mappings (and their category counters) to JSON files or a database"""
+    PendingSave(mappings_file, mappings).write()
+
+
+def _replace_file(path, data):
+    """Write a file atomically: temp file in the same directory, then rename
+
+    A crash mid-write leaves the old file in place, never a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except:
+        os.unlink(temp_path)
+        raise
+
+
+class PendingSave:
+    """What one save writes, copied out of the store when the save is requested
+
+    Taken on the thread that changes the mappings, so writing can happen
+    on another thread without touching the live store. rows is a full
+    copy when the whole file is written (always for JSON), else None and
+    changes holds the originals changed since the last save (placeholder
+    None: removed). cleared: the database table is emptied first (only
+    after clear() - other rows may come from other processes).
+    """
+
+    def __init__(self, mappings_file, mappings):
+        if not isinstance(mappings, MappingStore):
+            mappings = MappingStore(mappings)
+        self.mappings_file = mappings_file
+        self.mappings = mappings
+        self.changes = mappings.take_changes(mappings_file) if is_database_file(mappings_file) else None
+        self.rows = dict(mappings.items()) if self.changes is None else None
+        self.cleared = mappings.take_cleared()
+        self.counters = dict(mappings.counters)
+
+    def merge(self, newer):
+        """Fold a later save of the same file into this one (one write for both)"""
+        if newer.rows is not None:
+            self.rows, self.changes = newer.rows, None
+            self.cleared = self.cleared or newer.cleared
+        elif self.rows is not None:
+            for original, placeholder in newer.changes.items():
+                if placeholder is None:
+                    self.rows.pop(original, None)
+                else:
+                    self.rows[original] = placeholder
+        else:
+            self.changes.update(newer.changes)
+        self.counters = newer.counters
+        self.mappings = newer.mappings
+
+    def write(self):
+        """Write to the mappings file (JSON: temp file + rename; database: one transaction)"""
+        try:
+            if is_database_file(self.mappings_file):
+                _write_database(self.mappings_file, self.rows, self.changes, self.counters, self.cleared)
+                # Numbers reserved but not used go back (if nobody reserved after them)
+                if self.mappings.allocator is not None:
+                    self.mappings.allocator.release()
+            else:
+                _replace_file(self.mappings_file, json.dumps(self.rows, indent=2, ensure_ascii=False))
+                _replace_file(counters_file_for(self.mappings_file), json.dumps(self.counters, indent=2))
+        except MappingConflict:
+            # Everything else was written; rewriting would only hit the same rows again
+            raise
+        except:
+            # Nothing (or not everything) was written - the next save rewrites everything
+            self.mappings.mark_unsaved(self.cleared)
+            raise
+
+
+class MappingSaver:
+    """Saves mappings on a background thread, coalescing saves in quick succession
+
+    save() copies what changed and returns at once. The write happens
+    delay seconds after the first unsaved change - one write however
+    many saves came in meanwhile. Writes run one at a time, in order.
+    Call flush() before exiting.
+    """
+
+    def __init__(self, mappings_file, delay=SAVE_DELAY):
+        self.mappings_file = mappings_file
+        self.delay = delay
+        self._lock = threading.Lock()         # guards _pending and _timer
+        self._write_lock = threading.Lock()   # one write at a time
+        self._pending = None
+        self._timer = None
+
+    def save(self, mappings):
+        """Queue a save of the mappings (written within delay seconds)"""
+        pending = PendingSave(self.mappings_file, mappings)
+        with self._lock:
+            if self._pending is None:
+                self._pending = pending
+            else:
+                self._pending.merge(pending)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._write_pending)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write any queued save now and wait for it"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._write_pending()
+
+    def _write_pending(self):
+        """Write the queued save (timer thread, or flush)"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                self._timer = None
+            if pending is None:
+                return
+            try:
+                pending.write()
+            except Exception as error:
+                print(f"codeblur: could not save mappings to {pending.mappings_file}: {error}", file=sys.stderr)
+
+
+# =========================================================================
+# SQLITE STORAGE
+# =========================================================================
+# One row per mapping plus a small counters table. Saves write only the
+# rows that changed since the last save (MappingStore journals them), in
+# one transaction, so a save costs the same whether the table holds a
+# hundred mappings or a million. WAL mode keeps a save from blocking a
+# concurrent load (GUI and CLI share the file).
+#
+# Several processes may hold the same file open, each with its own copy
+# of the mappings. So a store reserves placeholder numbers in the counters
+# table as it goes (never from its own copy alone), saves only ever raise
+# the counters, rows other processes wrote are kept, and a row whose
+# placeholder the table already uses for another original is refused.
+# =========================================================================
+
+def _connect(database_file):
+    """Open a mappings database (tables created on first use)"""
+    connection = sqlite3.connect(database_file)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('CREATE TABLE IF NOT EXISTS mappings (original TEXT PRIMARY KEY, placeholder TEXT NOT NULL)')
+    connection.execute('CREATE TABLE IF NOT EXISTS counters (category TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+    connection.execute('CREATE INDEX IF NOT EXISTS mappings_placeholder ON mappings (placeholder)')
+    return connection
+
+
+class DatabaseAllocator:
+    """Reserves placeholder numbers in a database's counters table
+
+    Numbers are taken RESERVE_BLOCK at a time in one short transaction,
+    so allocating stays O(1) while two processes can never get the same
+    number. release() hands back the unused end of each block (unless
+    someone reserved after it), so numbering stays contiguous for a
+    single user. Thread-safe (a GUI worker allocates through an overlay).
+    """
+
+    def __init__(self, database_file):
+        self.database_file = database_file
+        self._lock = threading.Lock()
+        self._connection = None
+        self._blocks = {}   # category -> [next number to hand out, last number reserved]
+
+    def reserve(self, category, at_least):
+        """Return a number no other store has for category, at least at_least"""
+        with self._lock:
+            block = self._blocks.get(category)
+            if block is None or max(block[0], at_least) > block[1]:
+                block = self._blocks[category] = self._reserve_block(category, at_least)
+            number = max(block[0], at_least)
+            block[0] = number + 1
+            return number
+
+    def release(self):
+        """Give back the reserved numbers not handed out yet and close the connection"""
+        with self._lock:
+            if self._connection is None:
+                return
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        'UPDATE counters SET value = ? WHERE category = ? AND value = ?',
+                        [(next_num - 1, category, last) for category, (next_num, last) in self._blocks.items()])
+            finally:
+                self._blocks.clear()
+                self._connection.close()
+                self._connection = None
+
+    def _reserve_block(self, category, at_least):
+        """Reserve the next RESERVE_BLOCK numbers (from at_least up) in one transaction"""
+        if self._connection is None:
+            self._connection = _connect(self.database_file)
+        with self._connection:
+            # IMMEDIATE: the read and the update below cannot interleave with another process
+            self._connection.execute('BEGIN IMMEDIATE')
+            self._connection.execute('INSERT OR IGNORE INTO counters VALUES (?, 0)', (category,))
+            value, = self._connection.execute('SELECT value FROM counters WHERE category = ?', (category,)).fetchone()
+            first = max(value + 1, at_least)
+            last = first + RESERVE_BLOCK - 1
+            self._connection.execute('UPDATE counters SET value = ? WHERE category = ?', (last, category))
+        return [first, last]
+
+
+def load_database(database_file):
+    """Load mappings and counters from an SQLite database
+
+    Without a database yet, the JSON mappings file of the same name is
+    imported (the first save then writes it into the database). Either
+    way the store reserves new placeholder numbers in the database.
+    """
+    if not os.path.exists(database_file):
+        json_file = os.path.splitext(database_file)[0] + ".json"
+        mappings = load_mappings(json_file) if os.path.exists(json_file) else MappingStore()
+        mappings.allocator = DatabaseAllocator(database_file)
+        return mappings
+
+    try:
+        connection = _connect(database_file)
+        try:
+            counters = dict(connection.execute('SELECT category, value FROM counters'))
+            rows = connection.execute('SELECT original, placeholder FROM mappings')
+            if counters:
+                mappings = MappingStore(counters=counters)
+                mappings.load_rows(rows)
+            else:
+                # No counters saved: rebuild them from the placeholders
+                mappings = MappingStore(dict(rows))
+        finally:
+            connection.close()
+    except:
+        return MappingStore()
+
+    mappings.mark_saved(database_file)
+    mappings.allocator = DatabaseAllocator(database_file)
+    return mappings
+
+
+def _write_database(database_file, rows, changes, counters, cleared=False):
+    """Write all rows (rows given) or just the changed ones, plus the counters, in one transaction
+
+    Rows other processes saved stay (the table is only emptied when
+    cleared), counters only go up, and a row whose placeholder is already
+    stored for another original is left out - MappingConflict lists them
+    once the rest is committed.
+    """
+    if rows is None:
+        removed = [(original,) for original, placeholder in changes.items() if placeholder is None]
+        rows = {original: placeholder for original, placeholder in changes.items() if placeholder is not None}
+    else:
+        removed = []
+
+    connection = _connect(database_file)
+    try:
+        with connection:   # one transaction
+            # IMMEDIATE: nobody writes between the conflict check and the insert
+            connection.execute('BEGIN IMMEDIATE')
+            if cleared:
+                connection.execute('DELETE FROM mappings')
+            connection.executemany('DELETE FROM mappings WHERE original = ?', removed)
+
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS incoming (original TEXT PRIMARY KEY, placeholder TEXT NOT NULL)')
+            connection.execute('DELETE FROM incoming')
+            connection.executemany('INSERT INTO incoming VALUES (?, ?)', rows.items())
+            # Placeholders stored for an original this save does not remap
+            conflicts = connection.execute(
+                'SELECT incoming.original, incoming.placeholder, mappings.original FROM incoming '
+                'JOIN mappings ON mappings.placeholder = incoming.placeholder '
+                'WHERE mappings.original != incoming.original '
+                'AND mappings.original NOT IN (SELECT original FROM incoming)').fetchall()
+            connection.executemany('DELETE FROM incoming WHERE original = ?', [(original,) for original, _, _ in conflicts])
+            connection.execute('INSERT OR REPLACE INTO mappings SELECT original, placeholder FROM incoming')
+            connection.execute('DELETE FROM incoming')
+
+            connection.executemany('INSERT OR IGNORE INTO counters VALUES (?, 0)', [(category,) for category in counters])
+            connection.executemany('UPDATE counters SET value = MAX(value, ?) WHERE category = ?',
+                                   [(value, category) for category, value in counters.items()])
+    finally:
+        connection.close()
+
+    if conflicts:
+        raise MappingConflict(database_file, conflicts)
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import random
+import time
+
+from .cli import iter_input_files, read_text, write_text
+from .engine import Engine, KnownWords
+from .languages import detect_language
+from .mappings import MappingOverlay, MappingStore
+from .trie import compile_trie
+
+
+# Provisional placeholders use numbers far above any real counter, one band
+# per file: file 0 -> PERSON1000001, file 1 -> PERSON2000001, ...
+# (kept short - longer tokens slow down the member/body regexes)
+PROVISIONAL_STRIDE = 10 ** 6
+
+
+class _OverlayStore(MappingOverlay):
+    """Overlay that numbers new placeholders in a provisional band of its own"""
+
+    def __init__(self, base, provisional_base):
+        super().__init__(base)
+        self._counters = {}
+        self.provisional_base = provisional_base
+
+    def next_placeholder(self, category):
+        next_num = self._counters.get(category, self.provisional_base) + 1
+        self._counters[category] = next_num
+        return f"{category}{next_num:03d}"
+
+
+# Per-process state set up once by the pool initializer
+_worker_base = None
+_worker_known_words = None
+_worker_use_tree_sitter = False
+
+
+def _init_worker(mappings, counters, known_words, use_tree_sitter=False):
+    """Pool initializer: build the shared snapshot once per process"""
+    global _worker_base, _worker_known_words, _worker_use_tree_sitter
+    _worker_base = MappingStore(mappings, counters)
+    _worker_known_words = KnownWords(known_words)
+    _worker_use_tree_sitter = use_tree_sitter
+
+
+def _obfuscate_file(task):
+    """Worker: run levels 1..level on one file against the snapshot
+
+    Returns (index, text, delta) where delta lists (original, provisional
+    placeholder) in allocation order, or text None for binary files.
+    """
+    index, path, relative_path, level, language = task
+    text = read_text(path)
+    if text is None:
+        return index, None, []
+
+    engine = Engine(_OverlayStore(_worker_base, (index + 1) * PROVISIONAL_STRIDE), _worker_known_words)
+    # Categories depend only on the file, never on which worker ran it
+    engine.rng = random.Random(relative_path)
+    engine.language = language or detect_language(text, path)
+    engine.use_tree_sitter = _worker_use_tree_sitter
+
+    original = text
+    for current_level in range(1, level + 1):
+        text, _ = engine.run_level(current_level, text)
+    if original.endswith('\n') and not text.endswith('\n'):
+        text += '\n'
+
+    return index, text, list(engine.mappings.items())
+
+
+def _merge_delta(store, text, delta):
+    """Allocate final placeholders for a worker delta and rewrite its text
+
+    Runs in the parent only, in file order, so numbering is deterministic.
+    """
+    if not delta:
+        return text
+
+    provisional_pattern = compile_trie(provisional for _, provisional in delta)
+    translation = {}   # provisional -> final placeholder
+
+    def translate(match):
+        token = match.group(0)
+        return translation.get(token, token)
+
+    for original, provisional in delta:
+        # Originals captured late (comments, bodies) contain earlier provisional tokens
+        original = provisional_pattern.sub(translate, original)
+        if original in store:
+            final = store[original]
+        else:
+            category = provisional.rstrip('0123456789')
+            final = store.next_placeholder(category)
+            store[original] = final
+        translation[provisional] = final
+
+    return provisional_pattern.sub(translate, text)
+
+
+def _run_tasks(tasks, jobs, initargs):
+    """Yield worker results in file order: from a process pool, or in this process for one job"""
+    if jobs == 1:
+        # Same per-file pipeline without a pool, so -j 1 numbers like any worker count
+        _init_worker(*initargs)
+        yield from map(_obfuscate_file, tasks)
+        return
+    with multiprocessing.Pool(jobs or os.cpu_count(), _init_worker, initargs) as pool:
+        # imap keeps results in file order while later files are still running
+        yield from pool.imap(_obfuscate_file, tasks, chunksize=4)
+
+
+def obfuscate_parallel(engine, paths, output_dir, level, jobs=None, log=None, language=None):
+    """Obfuscate files/trees across a process pool with one shared mapping
+
+    New originals found by the workers are merged through engine.mappings
+    in file order, so the same original always gets the same placeholder
+    and numbering does not depend on scheduling. Returns a stats dict with
+    files, bytes, seconds, files_per_second and mb_per_second. language
+    forces one lexer for every file (None: detect per file).
+    """
+    files = list(iter_input_files(paths))
+    tasks = [(index, path, relative_path, level, language) for index, (path, relative_path) in enumerate(files)]
+    initargs = (engine.mappings.copy(), dict(engine.mappings.counters), set(engine.known_words),
+                engine.use_tree_sitter)
+
+    started = time.perf_counter()
+    total_bytes = 0
+    processed = 0
+
+    for index, text, delta in _run_tasks(tasks, jobs, initargs):
+        path, relative_path = files[index]
+        if text is None:
+            if log:
+                log(f"codeblur: skipping binary file {path}")
+            continue
+        total_bytes += os.path.getsize(path)
+        processed += 1
+        write_text(os.path.join(output_dir, relative_path), _merge_delta(engine.mappings, text, delta))
+
+    seconds = max(time.perf_counter() - started, 1e-9)
+    return {
+        "files": processed,
+        "bytes": total_bytes,
+        "seconds": seconds,
+        "files_per_second": processed / seconds,
+        "mb_per_second": total_bytes / seconds / (1024 * 1024),
+    }
@@ -0,0 +1,37 @@
+class Rewriter:
+    """Edit list over one text - collect span replacements, build the result once
+
+    Every span refers to the original text, so edits can be added in any
+    order without offsets shifting, and apply() copies each character once
+    (one ''.join) instead of once per replacement. When spans overlap, the
+    one starting first wins (ties: the one added first).
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.edits = []   # (start, end, replacement)
+
+    def __len__(self):
+        return len(self.edits)
+
+    def replace(self, start, end, replacement):
+        """Replace text[start:end] with replacement"""
+        self.edits.append((start, end, replacement))
+
+    def apply(self):
+        """Return the text with every non-overlapping edit applied"""
+        if not self.edits:
+            return self.text
+
+        text = self.text
+        parts = []
+        pos = 0
+        # Stable sort: equal starts keep insertion order
+        for start, end, replacement in sorted(self.edits, key=lambda edit: edit[0]):
+            if start < pos:
+                continue  # overlaps an edit already applied
+            parts.append(text[pos:start])
+            parts.append(replacement)
+            pos = end
+        parts.append(text[pos:])
+        return ''.join(parts)
@@ -0,0 +1,68 @@
+import ast
+import re
+import sys
+
+
+# Line breaks as the Python tokenizer counts them
+_LINE_BREAK = re.compile(r'\r\n?|\n')
+
+# Function definitions whose bodies SKELETON replaces
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class _Positions:
+    """Turns ast (line, UTF-8 byte column) positions into string offsets"""
+
+    def __init__(self, text):
+        self.text = text
+        self.line_starts = [0] + [match.end() for match in _LINE_BREAK.finditer(text)]
+
+    def offset(self, lineno, col_offset):
+        """String offset of a node position"""
+        start = self.line_starts[lineno - 1]
+        end = self.line_starts[lineno] if lineno < len(self.line_starts) else len(self.text)
+        line = self.text[start:end]
+        # Columns count UTF-8 bytes; only non-ASCII lines need converting
+        if any(ord(char) > 127 for char in line[:col_offset]):
+            col_offset = len(line.encode('utf-8')[:col_offset].decode('utf-8', 'replace'))
+        return start + col_offset
+
+    def statement_start(self, node):
+        """Offset where a statement starts (its first decorator's @, if any)"""
+        start = self.offset(node.lineno, node.col_offset)
+        for decorator in getattr(node, 'decorator_list', ()):
+            at = self.text.rfind('@', 0, self.offset(decorator.lineno, decorator.col_offset))
+            start = min(start, at)
+        return start
+
+
+def python_body_spans(text):
+    """(start, end) of every outermost function body in Python source, in text order
+
+    One ast parse; a body runs from its first statement (or decorator) to
+    the end of its last one, so the def line, the indentation before the
+    body and comments after it stay in place. Nested functions go with
+    the body they are in. Returns None when the text does not parse (or
+    this Python has no end positions, before 3.8).
+    """
+    if sys.version_info < (3, 8):
+        return None
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+
+    positions = _Positions(text)
+    spans = []
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, _FUNCTIONS):
+            first, last = node.body[0], node.body[-1]
+            spans.append((positions.statement_start(first),
+                          positions.offset(last.end_lineno, last.end_col_offset)))
+        else:
+            # Classes, if/try blocks etc. may hold functions; expressions cannot
+            pending.extend(child for child in ast.iter_child_nodes(node) if not isinstance(child, ast.expr))
+    spans.sort()
+    return spans
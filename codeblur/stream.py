@@ -0,0 +1,293 @@
+import itertools
+import re
+
+from .languages import SNIFF_CHARS, create_lexer, detect_language, language_config
+from .lexer import COMMENT, PUNCT, STRING
+from .mappings import PLACEHOLDER_PARTS
+from .trie import trie_pattern
+
+
+# Default chunk size, and the hard limit when no good boundary shows up
+CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Placeholder categories created by anonymize_members (carried across chunks)
+MEMBER_CATEGORIES = {'FUNC', 'PROP', 'FIELD'}
+
+# Languages whose bodies are indentation, not braces: cut only before column-0 lines
+INDENTED_LANGUAGES = {'python'}
+
+# Column-0 Python lines that continue the statement above
+_PYTHON_CONTINUATION = re.compile(r'(?:else|elif|except|finally)\b')
+
+# Identifier characters at the very end of a piece of text
+_TRAILING_WORD = re.compile(r'\w*$')
+
+
+class BoundaryScanner:
+    """Tracks open comments/strings and bracket depth line by line
+
+    Lines are read with the lexer of the input's language, so -- in C#, #
+    in TypeScript or a Rust lifetime ('a) open nothing, and Python
+    triple-quoted strings, C# verbatim strings and SQL strings that span
+    lines are followed. A comment or string still open at the end of a
+    line is resumed on the next one by lexing its opener plus that line.
+
+    Knows whether the position between two lines is inside a construct
+    that the actions need to see whole (block comment, multi-line string,
+    call arguments, brace or indented body), so the stream is only cut
+    where every action sees the same text as it would in one piece.
+    """
+
+    def __init__(self, language=None):
+        self.pattern = create_lexer(language).pattern
+        self.multiline = language_config(language).get("multiline", {})
+        self._opener_chars = {opener[0] for opener in self.multiline}
+        self.indented = language in INDENTED_LANGUAGES
+        self.opener = None    # opener of the comment/string still open at the end of the last line
+        self.braces = 0
+        self.brackets = 0     # ( and [
+        self.blank = True     # last line was blank
+        self.joined = False   # last line continues on the next (backslash, or a Python decorator)
+
+    def feed(self, line):
+        """Advance the state over one line"""
+        self.blank = not line.strip()
+        if not self.blank:
+            self.joined = line.rstrip('\r\n').endswith('\\') or (self.indented and line.startswith('@'))
+
+        resumed = self.opener
+        text = line if resumed is None else resumed + line
+        for match in self.pattern.finditer(text):
+            kind, value = match.lastgroup, match.group()
+            if resumed is not None:
+                # The construct left open on the line above
+                if not self._closes(kind, value, resumed):
+                    return
+                self.opener = resumed = None
+                continue
+
+            if kind == PUNCT:
+                if value == '{':
+                    self.braces += 1
+                elif value == '}':
+                    self.braces = max(0, self.braces - 1)
+                elif value in '([':
+                    self.brackets += 1
+                elif value in ')]':
+                    self.brackets = max(0, self.brackets - 1)
+            if value[0] in self._opener_chars:
+                opener = self._opener_at(text, match.start())
+                if opener is not None and not self._closes(kind, value, opener):
+                    # Opened here, not closed on this line
+                    self.opener = opener
+                    return
+
+    def _opener_at(self, text, pos):
+        """Longest multi-line comment/string opener at pos (None if there is none)"""
+        found = None
+        for opener in self.multiline:
+            if text.startswith(opener, pos) and (found is None or len(opener) > len(found)):
+                found = opener
+        return found
+
+    def _closes(self, kind, value, opener):
+        """Check if a token that starts with opener is a whole comment/string"""
+        closer = self.multiline[opener]
+        return (kind in (COMMENT, STRING) and len(value) >= len(opener) + len(closer)
+                and value.endswith(closer))
+
+    def cut_depth(self, line):
+        """How deep a cut before this line would be: None for never, (0, 0) for a clean cut
+
+        Never inside a comment or string, after a continued line, before a
+        blank line or before a line that opens the body of the signature
+        above it (Allman-style braces). Otherwise (open brackets, nesting):
+        brace depth, or for Python the indentation - only column-0 lines
+        that start a statement (not else:, except:, a comment) are clean.
+        """
+        stripped = line.strip()
+        if self.opener is not None or self.joined or not stripped or stripped.startswith('{'):
+            return None
+        if not self.indented:
+            return (self.brackets, self.braces)
+        if line[0] in ' \t' or line[0] == '#' or _PYTHON_CONTINUATION.match(line):
+            return (self.brackets, 1 + len(line) - len(line.lstrip(' \t')))
+        return (self.brackets, 0)
+
+
+def iter_lines(source, limit=MAX_CHUNK_SIZE):
+    """Yield lines from a text file object (overlong lines in limit-sized pieces)"""
+    return iter(lambda: source.readline(limit), '')
+
+
+def iter_chunks(lines, chunk_size=CHUNK_SIZE, max_chunk_size=MAX_CHUNK_SIZE, language=None):
+    """Group lines into chunks that end on safe boundaries
+
+    A chunk is emitted at the first clean boundary (outside any comment,
+    string, bracket and body) once chunk_size is reached. If none shows
+    up (e.g. a C# namespace block), the shallowest boundary seen is used
+    once max_chunk_size is reached, so memory stays bounded either way.
+    """
+    scanner = BoundaryScanner(language)
+    buffer = []
+    size = 0
+    best = None   # (depth, line index, size before it) of the shallowest boundary
+
+    for line in lines:
+        depth = scanner.cut_depth(line) if buffer else None
+        if depth is not None:
+            if depth == (0, 0) and size >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+                best = None
+            elif best is None or depth <= best[0]:
+                best = (depth, len(buffer), size)
+
+        buffer.append(line)
+        size += len(line)
+        scanner.feed(line)
+
+        if size >= max_chunk_size:
+            if best is not None:
+                _, index, cut_size = best
+                yield ''.join(buffer[:index])
+                buffer = buffer[index:]
+                size -= cut_size
+            else:
+                # Nothing safe in the whole window - cut here rather than grow
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+            best = None
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _ends_with_blank_line(text):
+    """Check if the last line of a text (ending in a newline) is blank"""
+    return text.endswith('\n') and not text[:-1].rsplit('\n', 1)[-1].strip()
+
+
+class StreamObfuscator:
+    """Runs obfuscation levels over a stream chunk by chunk
+
+    Mappings live in the engine, so a name gets the same placeholder in
+    every chunk. Member names anonymized in earlier chunks are replaced
+    up front in later ones, because anonymize_members only rewrites the
+    names it discovers in the text it is given.
+    """
+
+    def __init__(self, engine, level, chunk_size=CHUNK_SIZE, max_chunk_size=MAX_CHUNK_SIZE, language=None):
+        self.engine = engine
+        self.level = level
+        self.language = language    # None: detect from the file name or the first few KB
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.members = set()        # member names anonymized so far
+        self._member_pattern = None
+        self.bytes_in = 0
+        self.chunks = 0
+
+    def obfuscate_chunk(self, chunk):
+        """Run levels 1..level on one chunk"""
+        text = chunk
+        for level in range(1, self.level + 1):
+            actions = self.engine.OBFUSCATION_LEVELS[level]["actions"]
+            if "anonymize_members" in actions:
+                text = self._apply_members(text)
+            text, delta = self.engine.run_level(level, text)
+            if "anonymize_members" in actions:
+                self._add_members(delta)
+
+        # Chunks end on a newline; STEALTH strips it
+        if chunk.endswith('\n') and text and not text.endswith('\n'):
+            text += '\n'
+        return text
+
+    def run(self, source, write, filename=None):
+        """Obfuscate a text file object, passing each output chunk to write"""
+        lines = iter_lines(source, self.max_chunk_size)
+
+        # Every chunk uses the same lexer (later chunks may not look like the
+        # language), known before the first cut so the scanner reads it too
+        language = self.language or detect_language(None, filename)
+        if language is None:
+            head = []
+            head_size = 0
+            for line in lines:
+                head.append(line)
+                head_size += len(line)
+                if head_size >= SNIFF_CHARS:
+                    break
+            language = detect_language(''.join(head), filename)
+            lines = itertools.chain(head, lines)
+        self.engine.language = language
+
+        blank_dropped = False
+        for chunk in iter_chunks(lines, self.chunk_size, self.max_chunk_size, language):
+            self.bytes_in += len(chunk)
+            self.chunks += 1
+            text = self.obfuscate_chunk(chunk)
+            if not text.strip():
+                write(text)
+                continue
+            # STEALTH drops the blank lines a chunk ends with; in one piece they
+            # collapse to one blank line before the next chunk's first line
+            if blank_dropped:
+                text = '\n' + text
+            blank_dropped = _ends_with_blank_line(chunk) and not _ends_with_blank_line(text)
+            write(text)
+
+    def _add_members(self, delta):
+        """Remember member names anonymized in this chunk"""
+        for original, placeholder in delta.items():
+            parts = PLACEHOLDER_PARTS.fullmatch(placeholder)
+            if parts and parts.group(1) in MEMBER_CATEGORIES:
+                self.members.add(original)
+                self._member_pattern = None
+
+    def _apply_members(self, text):
+        """Replace member names anonymized in earlier chunks (whole words)"""
+        if not self.members:
+            return text
+        if self._member_pattern is None:
+            self._member_pattern = re.compile(r'\b(?:' + trie_pattern(self.members) + r')\b')
+        mappings = self.engine.mappings
+        return self._member_pattern.sub(lambda match: mappings.get(match.group(0), match.group(0)), text)
+
+
+def restore_stream(engine, source, write, limit=CHUNK_SIZE):
+    """Deobfuscate a text file object in chunks (placeholders never span lines)"""
+    # A placeholder cut by a piece boundary starts within its length of the end
+    longest = max(map(len, engine.mappings.placeholders()), default=1)
+    buffer = []
+    size = 0
+    for line in iter_lines(source, limit):
+        buffer.append(line)
+        size += len(line)
+        if size >= limit:
+            text = ''.join(buffer)
+            # Piece of an overlong line: hold back a trailing word that may be half a
+            # placeholder (no more of it than a placeholder can span, so one long word
+            # cannot grow the buffer)
+            if text.endswith('\n'):
+                keep = len(text)
+            else:
+                keep = max(_TRAILING_WORD.search(text).start(), len(text) - longest + 1)
+                # ... and never cut through a placeholder that starts before that
+                # (matched from the start of the piece, as deobfuscate would)
+                pattern = engine.mappings.placeholder_pattern()
+                for match in pattern.finditer(text) if pattern is not None else ():
+                    if match.start() >= keep:
+                        break
+                    if match.end() > keep:
+                        keep = match.start()
+                        break
+            write(engine.deobfuscate(text[:keep]))
+            buffer = [text[keep:]] if keep < len(text) else []
+            size = len(text) - keep
+    if buffer:
+        write(engine.deobfuscate(''.join(buffer)))
@@ -0,0 +1,151 @@
+import importlib
+
+# Optional: tree-sitter finds declarations from a real syntax tree, in linear
+# time. Without it (or without a language's grammar) the regexes are used.
+try:
+    import tree_sitter
+except ImportError:
+    tree_sitter = None
+
+
+# Language -> (grammar package, function returning its language pointer)
+GRAMMARS = {
+    "csharp": ("tree_sitter_c_sharp", "language"),
+    "typescript": ("tree_sitter_typescript", "language_typescript"),
+}
+
+# Declarations anonymize_members renames; capture names are the placeholder
+# categories (TypeScript: methods and functions only, like the regexes)
+MEMBER_QUERIES = {
+    "csharp": '''
+        (method_declaration name: (identifier) @FUNC)
+        (local_function_statement name: (identifier) @FUNC)
+        (property_declaration name: (identifier) @PROP)
+        (field_declaration (variable_declaration (variable_declarator name: (identifier) @FIELD)))
+    ''',
+    "typescript": '''
+        (method_definition name: (property_identifier) @FUNC)
+        (function_declaration name: (identifier) @FUNC)
+        (generator_function_declaration name: (identifier) @FUNC)
+    ''',
+}
+
+# Function bodies SKELETON replaces
+BODY_QUERIES = {
+    "csharp": '''
+        (method_declaration body: (block) @body)
+        (constructor_declaration body: (block) @body)
+        (destructor_declaration body: (block) @body)
+        (operator_declaration body: (block) @body)
+        (conversion_operator_declaration body: (block) @body)
+        (local_function_statement body: (block) @body)
+    ''',
+    "typescript": '''
+        (function_declaration body: (statement_block) @body)
+        (generator_function_declaration body: (statement_block) @body)
+        (method_definition body: (statement_block) @body)
+        (function_expression body: (statement_block) @body)
+        (generator_function body: (statement_block) @body)
+    ''',
+}
+
+# Language -> (parser, member query, body query), or None when not available
+_backends = {}
+
+
+def get_backend(language):
+    """Parser and compiled queries for a language (None if tree-sitter or the grammar is not installed)"""
+    if language in _backends:
+        return _backends[language]
+
+    backend = None
+    if tree_sitter is not None and language in GRAMMARS:
+        module_name, function_name = GRAMMARS[language]
+        try:
+            grammar = tree_sitter.Language(getattr(importlib.import_module(module_name), function_name)())
+            backend = (tree_sitter.Parser(grammar),
+                       tree_sitter.Query(grammar, MEMBER_QUERIES[language]),
+                       tree_sitter.Query(grammar, BODY_QUERIES[language]))
+        except:
+            # Grammar missing, or a tree-sitter too old for this API
+            backend = None
+    _backends[language] = backend
+    return backend
+
+
+def available(language):
+    """Check if declarations of a language can come from tree-sitter"""
+    return get_backend(language) is not None
+
+
+def _captures(query, node):
+    """capture name -> matched nodes (tree-sitter 0.25 moved matching to QueryCursor)"""
+    if hasattr(tree_sitter, 'QueryCursor'):
+        return tree_sitter.QueryCursor(query).captures(node)
+    return query.captures(node)
+
+
+def _parse(text, language):
+    """Backend, root node of a clean parse and the UTF-8 source (None if unavailable or the text has errors)"""
+    backend = get_backend(language)
+    if backend is None:
+        return None, None, None
+    data = text.encode('utf-8')
+    root = backend[0].parse(data).root_node
+    # Fragments the grammar cannot place are left to the regexes
+    if root.has_error:
+        return None, None, None
+    return backend, root, data
+
+
+def _char_offsets(text, data, byte_offsets):
+    """byte offset -> string offset for the given offsets, in one sweep over the text"""
+    if len(data) == len(text):
+        return {offset: offset for offset in byte_offsets}
+    offsets = {}
+    chars = 0
+    previous = 0
+    for offset in sorted(set(byte_offsets)):
+        chars += len(data[previous:offset].decode('utf-8', 'replace'))
+        offsets[offset] = chars
+        previous = offset
+    return offsets
+
+
+def find_members(text, language):
+    """(name, category) of every method, property and field declared in text, in text order
+
+    Returns None when tree-sitter cannot be used for this text (not
+    installed, no grammar, or syntax errors) - the caller falls back to
+    the regexes then.
+    """
+    backend, root, _ = _parse(text, language)
+    if backend is None:
+        return None
+
+    found = sorted((node.start_byte, node.text.decode('utf-8'), category)
+                   for category, nodes in _captures(backend[1], root).items() for node in nodes)
+    # Names a whole-word replace cannot handle (#private, [computed]) are left out
+    return [(name, category) for _, name, category in found if name.isidentifier()]
+
+
+def function_bodies(text, language):
+    """(open brace, close brace) string offsets of every outermost function body, in text order
+
+    Bodies inside a body are not listed (they go with it). Returns None
+    when tree-sitter cannot be used for this text, like find_members.
+    """
+    backend, root, data = _parse(text, language)
+    if backend is None:
+        return None
+
+    bodies = []
+    end = -1
+    for start, stop in sorted((node.start_byte, node.end_byte) for nodes in _captures(backend[2], root).values()
+                              for node in nodes):
+        if start >= end:
+            bodies.append((start, stop - 1))
+            end = stop
+
+    offsets = _char_offsets(text, data, [offset for body in bodies for offset in body])
+    return [(offsets[start], offsets[stop]) for start, stop in bodies]
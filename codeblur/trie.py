@@ -0,0 +1,57 @@
+import re
+
+
+def build_trie(words):
+    """Build a character trie (nested dicts, '' marks the end of a word)"""
+    root = {}
+    for word in words:
+        if not word:
+            continue
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return root
+
+
+def _node_pattern(node):
+    """Regex source for everything below a trie node (None for a bare leaf)"""
+    branches = []
+    leaves = []
+    for char in sorted(key for key in node if key):
+        rest = _node_pattern(node[char])
+        if rest is None:
+            leaves.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + rest)
+
+    if not branches and not leaves:
+        return None
+
+    # Single-character leaves collapse into one character class
+    if leaves:
+        branches.append(leaves[0] if len(leaves) == 1 else '[' + ''.join(leaves) + ']')
+
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    # A word ends here too: the longer continuation is optional (greedy = longest match wins)
+    if '' in node:
+        body = '(?:' + body + ')?'
+    return body
+
+
+def trie_pattern(words):
+    """Regex source matching any of the words, preferring the longest match
+
+    Words sharing a prefix share a branch, so the regex engine picks the
+    right branch by looking at one character instead of trying every word.
+    """
+    return _node_pattern(build_trie(words))
+
+
+def compile_trie(words, flags=0):
+    """Compile a longest-match-wins regex for words (None if words is empty)"""
+    pattern = trie_pattern(words)
+    if pattern is None:
+        return None
+    return re.compile(pattern, flags)
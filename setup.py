@@ -34,9 +34,16 @@ setup(
     install_requires=[
         "pyperclip>=1.8.0",
     ],
+    extras_require={
+        "tree-sitter": [
+            "tree-sitter>=0.23",
+            "tree-sitter-c-sharp",
+            "tree-sitter-typescript",
+        ],
+    },
     entry_points={
         "console_scripts": [
-            "codeblur=codeblur.codeblur:main",
+            "codeblur=codeblur.cli:main",
         ],
     },
 )
@@ -0,0 +1,206 @@
+import os
+import random
+import sys
+
+import pytest
+
+# Tests run against the source tree, like the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codeblur.engine import Engine, load_known_words  # noqa: E402
+
+
+# Loaded once for the whole session
+KNOWN_WORDS = load_known_words()
+
+
+# One small source per supported language: comments of every style, strings with
+# escapes and paths, snake_case and camelCase names, keywords, nested bodies
+SAMPLES = {
+    "csharp": '''using System;
+using System.Collections.Generic;
+
+namespace Acme.Billing
+{
+    /// <summary>Invoice lookups</summary>
+    public class InvoiceService : IInvoiceService
+    {
+        private readonly IInvoiceRepo _invoiceRepo;
+        public string RegionName { get; set; }
+
+        #region Queries
+        public async Task<List<Invoice>> GetInvoicesAsync(Guid customerId, string region)
+        {
+            // Fetch from the primary store
+            var url = "https://api.acme.com/v1/invoices";
+            var path = @"C:\\Shares\\Invoices\\export.csv";
+            var id = "3f2504e0-4f89-11d3-9a0c-0305e82c3301";
+            /* retry once
+               on failure */
+            if (customerId == Guid.Empty) { return new List<Invoice>(); }
+            return await _invoiceRepo.FindByCustomer(customerId, $"/api/users/{region}\\n");
+        }
+        #endregion
+    }
+}
+''',
+    "typescript": '''import { Injectable } from '@angular/core';
+
+// Caches user profiles
+export class ProfileCache<T> {
+  private readonly entries = new Map<string, T>();
+
+  /* Look up a profile,
+     loading it on a miss */
+  async getProfile(userId: string): Promise<T | undefined> {
+    const key = `profile:${userId}`;
+    if (!this.entries.has(key)) {
+      const response = await fetch("/api/profiles/" + userId + '\\t');
+      this.entries.set(key, (await response.json()) as T);
+    }
+    return this.entries.get(key);
+  }
+}
+
+function max_retry_count(base_delay: number): number {
+  let counter = 0; counter--; return base_delay * 2 / 3;
+}
+''',
+    "python": '''"""Order export helpers"""
+import os
+
+
+# Where exports go
+EXPORT_DIR = "/var/lib/acme/exports"
+
+
+class OrderExporter:
+    """Writes orders as CSV"""
+
+    def __init__(self, target_dir=EXPORT_DIR):
+        self.target_dir = target_dir   # created lazily
+
+    @property
+    def file_name(self):
+        return os.path.join(self.target_dir, f"orders_{os.getpid()}.csv")
+
+    def export(self, orders, *, max_rows=None):
+        """Write orders, one row each"""
+        with open(self.file_name, "w") as handle:
+            for order in orders[:max_rows]:
+                handle.write(rb"raw\\n" .decode() + "%s;%s\\n" % (order.order_id, order.total_amount))
+        return self.file_name
+
+
+def _round_05up(value):
+    return round(value + 0.05, 1) if value is not None else None
+''',
+    "sql": '''-- Monthly revenue per customer
+/* Excludes test accounts
+   and refunds */
+SELECT c.customer_name, SUM(o.total_amount) AS revenue
+FROM customers c
+JOIN orders o ON o.customer_id = c.customer_id
+WHERE c.email NOT LIKE '%@example.com' -- test accounts
+  AND o.status <> 'it''s refunded'
+GROUP BY c.customer_name;
+''',
+    "go": '''package billing
+
+import "fmt"
+
+// InvoiceTotal sums the invoice lines
+func InvoiceTotal(lines []Line, taxRate float64) (float64, error) {
+	total := 0.0
+	/* lines with a zero
+	   quantity are skipped */
+	for _, line := range lines {
+		if line.Quantity == 0 {
+			continue
+		}
+		total += line.UnitPrice * float64(line.Quantity)
+	}
+	query := `SELECT * FROM invoice_lines
+WHERE invoice_id = ?`
+	fmt.Println("total:\\t", total, query)
+	return total * (1 + taxRate), nil
+}
+''',
+    "rust": '''use std::collections::HashMap;
+
+/// Counts words per document
+pub fn count_words(documents: &[String]) -> HashMap<String, usize> {
+    let mut word_counts = HashMap::new();
+    // Split on whitespace only
+    for document in documents {
+        for word in document.split_whitespace() {
+            *word_counts.entry(word.to_lowercase()).or_insert(0) += 1;
+        }
+    }
+    println!("counted {} words\\n", word_counts.len());
+    word_counts
+}
+''',
+    "shell": '''#!/bin/sh
+# Nightly backup of the billing database
+BACKUP_DIR="/srv/backups/billing"
+
+backup_database() {
+    target_file="$BACKUP_DIR/billing_$(date +%F).sql.gz"
+    pg_dump billing | gzip > "$target_file"   # compressed dump
+    echo 'backup written to' "$target_file"
+}
+
+backup_database
+''',
+    "html": '''<!DOCTYPE html>
+<html>
+<head>
+  <!-- Dashboard shell -->
+  <title>Acme Dashboard</title>
+</head>
+<body>
+  <div id="revenue-chart" class="chart-panel" data-source="/api/revenue"></div>
+  <script>
+    function drawChart(panelId) {
+      const panel = document.getElementById(panelId);
+      panel.textContent = "loading";
+    }
+  </script>
+</body>
+</html>
+''',
+    "vb": '''Module InvoiceModule
+    ' Prints the invoice total
+    Sub PrintTotal(invoiceTotal As Decimal)
+        REM shown in the console
+        Console.WriteLine("Total: " & invoiceTotal)
+    End Sub
+End Module
+''',
+}
+
+
+@pytest.fixture
+def engine():
+    """Engine with an empty store and a fixed RNG (same categories every run)"""
+    return create_engine()
+
+
+def create_engine(language=None):
+    """Engine with an empty store and a fixed RNG"""
+    engine = Engine({}, KNOWN_WORDS, language=language)
+    engine.rng = random.Random(1)
+    return engine
+
+
+def run_levels(engine, text, levels):
+    """Run levels 1..levels in turn, like clicking the button that many times"""
+    for level in range(1, levels + 1):
+        text, _ = engine.run_level(level, text)
+    return text
+
+
+def non_blank_lines(text):
+    """Lines with content, trailing whitespace cut (STEALTH's cleanup, which nothing restores)"""
+    return [line.rstrip() for line in text.splitlines() if line.strip()]
@@ -0,0 +1,66 @@
+import argparse
+import io
+import sys
+
+import pytest
+
+from codeblur.cli import main, parse_level
+
+from conftest import SAMPLES
+
+
+@pytest.mark.parametrize("value, level", [("1", 1), ("phantom", 3), ("SKELETON", 5)])
+def test_parse_level(value, level):
+    """Levels are given by number or by name in any case"""
+    assert parse_level(value) == level
+
+
+@pytest.mark.parametrize("value", ["0", "6", "blurry"])
+def test_parse_level_rejects_unknown(value):
+    """Unknown levels are an argument error that lists the choices"""
+    with pytest.raises(argparse.ArgumentTypeError, match="BLUR"):
+        parse_level(value)
+
+
+def test_stdin_round_trip(tmp_path, monkeypatch, capsys):
+    """stdin goes to stdout, and deobfuscate with the same mappings gives it back"""
+    mappings = str(tmp_path / "mappings.json")
+    monkeypatch.setattr(sys, "stdin", io.StringIO(SAMPLES["csharp"]))
+    assert main(["obfuscate", "--level", "BLUR", "--mappings", mappings]) == 0
+    obfuscated = capsys.readouterr().out
+    assert obfuscated != SAMPLES["csharp"]
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO(obfuscated))
+    assert main(["deobfuscate", "--mappings", mappings]) == 0
+    assert capsys.readouterr().out == SAMPLES["csharp"]
+
+
+def test_file_to_file(tmp_path):
+    """A single file is written to the output path; later runs reuse the saved mappings"""
+    source = tmp_path / "query.sql"
+    source.write_text(SAMPLES["sql"], encoding="utf-8", newline="")
+    mappings = str(tmp_path / "mappings.db")
+    for output in ("first.sql", "second.sql"):
+        assert main(["obfuscate", "--mappings", mappings, str(source), "-o", str(tmp_path / output)]) == 0
+    assert (tmp_path / "first.sql").read_bytes() == (tmp_path / "second.sql").read_bytes()
+
+
+def test_several_inputs_need_an_output_directory(tmp_path, capsys):
+    """Several files without -o exit with status 2 and say why"""
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text(SAMPLES["python"], encoding="utf-8")
+    status = main(["obfuscate", "--mappings", str(tmp_path / "mappings.json"),
+                   str(tmp_path / "a.py"), str(tmp_path / "b.py")])
+    assert status == 2 and "-o" in capsys.readouterr().err
+
+
+def test_binary_files_are_skipped(tmp_path, capsys):
+    """Undecodable files in a tree are reported and left out of the output"""
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "blob.bin").write_bytes(b"\xff\xfe\x00binary")
+    (source / "app.py").write_text(SAMPLES["python"], encoding="utf-8")
+    output = tmp_path / "out"
+    assert main(["obfuscate", "--mappings", str(tmp_path / "mappings.json"), str(source), "-o", str(output)]) == 0
+    assert sorted(path.name for path in output.iterdir()) == ["app.py"]
+    assert "blob.bin" in capsys.readouterr().err
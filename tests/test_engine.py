@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import codeblur
+from codeblur.engine import Cancelled, Engine, WordMemo
+from codeblur.mappings import MappingOverlay
+
+from conftest import SAMPLES, create_engine
+
+
+def test_engine_runs_without_tk():
+    """Importing and running the engine never loads tkinter"""
+    script = ("import sys; from codeblur import Engine; Engine().run_level(1, 'fooBar = 1'); "
+              "sys.exit('tkinter' in sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(codeblur.__file__)))
+    assert subprocess.run([sys.executable, "-c", script], cwd=root).returncode == 0
+
+
+def test_delta_holds_only_new_mappings(engine):
+    """run_level returns the mappings it created; a second run over new text only the new ones"""
+    text, delta = engine.run_level(1, "customerTotal = invoiceLedger\n")
+    assert delta and delta == {original: engine.mappings[original] for original in delta}
+    assert dict(engine.mappings.items()) == delta
+
+    before = set(engine.mappings)
+    _, again = engine.run_level(1, "customerTotal = paymentLedger\n")
+    assert again and set(again) == set(engine.mappings) - before
+    assert engine.deobfuscate(text) == "customerTotal = invoiceLedger\n"
+
+
+def test_engines_share_no_state():
+    """Two engines over their own stores number independently"""
+    first, second = create_engine("csharp"), create_engine("csharp")
+    assert first.run_level(1, SAMPLES["csharp"]) == second.run_level(1, SAMPLES["csharp"])
+
+
+def test_known_words_match_any_case():
+    """Known words are found whatever their case; unknown parts still get placeholders"""
+    engine = create_engine()
+    engine.known_words = {"invoice", "Total"}
+    assert engine.known_words.is_known("INVOICE") and engine.known_words.is_known("total")
+    text, delta = engine.run_level(1, "InvoiceTOTAL = invoiceZorblax\n")
+    assert text.startswith("InvoiceTOTAL = invoice") and list(delta) == ["Zorblax"]
+
+
+def test_strings_in_comments_are_not_obfuscated():
+    """obfuscate_strings skips quotes inside comments; remove_comments skips markers inside strings"""
+    engine = create_engine("csharp")
+    source = '// call "secretHost" first\nvar url = "https://acme.test/a"; /* "inner" */\n'
+    text, delta = engine.run_action("obfuscate_strings", source)
+    assert list(delta) == ["https://acme.test/a"]
+    assert '"secretHost"' in text and '"inner"' in text
+
+    text, delta = engine.run_action("remove_comments", text)
+    assert sorted(delta) == sorted(['call "secretHost" first', '"inner"'])
+    assert engine.deobfuscate(text) == source
+
+
+def test_word_memos_follow_mapping_changes():
+    """Memoized word results are dropped when a mapping is removed or the known words change"""
+    engine = create_engine()
+    first = engine.auto_obfuscate_word("zorblaxHandler")
+    assert engine.auto_obfuscate_word("zorblaxHandler") == first
+    assert engine.apply_mappings_to_word("quuxHandler") == "quuxHandler"
+
+    # A new mapping shows up in apply_mappings_to_word at once
+    engine.add_mapping("quux", "ITEM009")
+    assert engine.apply_mappings_to_word("quuxHandler") == "ITEM009Handler"
+
+    # A removed mapping is not handed out from the memo again
+    del engine.mappings["zorblax"]
+    again = engine.auto_obfuscate_word("zorblaxHandler")
+    assert again != first and again == engine.mappings["zorblax"] + "Handler"
+
+    engine.known_words = {"zorblax", "handler"}
+    assert engine.auto_obfuscate_word("zorblaxHandler") == "zorblaxHandler"
+
+
+def test_word_memo_is_bounded():
+    """The memo keeps the most recently used words only"""
+    memo = WordMemo(size=2)
+    memo.validate(0, None)
+    for word in ("a", "b", "c"):
+        memo.put(word, word.upper())
+    assert memo.get("a") is None and memo.get("c") == "C"
+    memo.validate(1, None)
+    assert memo.get("c") is None
+
+
+def test_fork_runs_against_an_overlay():
+    """A forked engine over an overlay leaves the base store alone until the delta is merged"""
+    engine = create_engine("csharp")
+    text, _ = engine.run_level(1, "var total = zorblaxLedger;\n")
+    base = dict(engine.mappings.items())
+
+    overlay = MappingOverlay(engine.mappings)
+    worker = engine.fork(overlay)
+    result, delta = worker.run_level(1, "var sum = zorblaxLedger + quuxCounter;\n")
+    assert dict(engine.mappings.items()) == base
+    assert dict(overlay.items()) == delta and "zorblaxLedger" not in delta
+    assert all(placeholder not in base.values() for placeholder in delta.values())
+
+    engine.mappings.update(overlay.items())
+    assert engine.deobfuscate(result) == "var sum = zorblaxLedger + quuxCounter;\n"
+
+
+def test_progress_is_reported_per_action():
+    """Progress goes from 0 to 1 across a level's actions, never backwards"""
+    engine = create_engine("csharp")
+    reports = []
+    engine.progress = lambda action, fraction: reports.append((action, fraction))
+    engine.run_level(2, SAMPLES["csharp"])
+
+    fractions = [fraction for _, fraction in reports]
+    assert fractions[0] == 0 and fractions[-1] == 1 and fractions == sorted(fractions)
+    assert {action for action, _ in reports} >= set(Engine.OBFUSCATION_LEVELS[2]["actions"])
+
+
+def test_cancel_stops_a_run():
+    """Setting the cancel event makes the run raise Cancelled"""
+    engine = create_engine("csharp")
+    engine.cancel_event = threading.Event()
+    engine.progress = lambda action, fraction: engine.cancel_event.set()
+    with pytest.raises(Cancelled):
+        engine.run_level(1, SAMPLES["csharp"])
@@ -0,0 +1,34 @@
+import re
+
+import pytest
+
+from codeblur.highlight import Highlighter
+from codeblur.mappings import MappingStore
+
+
+class TextStub:
+    """The one Text widget call _find_spans makes, over a plain string"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def get(self, start, end):
+        return self.text
+
+
+def highlighted(mappings, text):
+    """Words the highlighter tags on one line"""
+    spans = Highlighter(TextStub(text), mappings.has_placeholder)._find_spans(1, 1)
+    offsets = [int(re.search(r'\+(\d+)c$', index).group(1)) for index in spans]
+    return [text[start:end] for start, end in zip(offsets[::2], offsets[1::2])]
+
+
+@pytest.mark.parametrize("text", [
+    "PERSON001 + PERSON0012 + xPERSON001y",
+    "ID0012ID001 ID3 PERSON00 NAME0010",
+])
+def test_highlights_what_restore_replaces(text):
+    """Tagged words are the placeholders restore() reads, digits glued on or not"""
+    mappings = MappingStore({"alice": "PERSON001", "bob": "ID001", "carol": "ID0012", "dave": "NAME001"})
+    expected = [match.group(0) for match in mappings.placeholder_pattern().finditer(text)]
+    assert highlighted(mappings, text) == expected
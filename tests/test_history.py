@@ -0,0 +1,69 @@
+from codeblur.history import TextDiff, UndoHistory
+
+from conftest import SAMPLES, create_engine
+
+
+def run_action(history, engine, text, level):
+    """One GUI action: open a step, run the level"""
+    history.begin(text, engine.mappings)
+    return engine.run_level(level, text)[0]
+
+
+def test_text_diff_both_ways():
+    """A diff turns either text into the other"""
+    before, after = "alpha beta gamma", "alpha BETA! gamma"
+    diff = TextDiff(before, after)
+    assert diff.apply(before) == after and diff.revert(after) == before
+    assert TextDiff(before, before).is_empty()
+
+
+def test_undo_and_redo_restore_text_and_mappings():
+    """Undo puts back the text and the mappings of each action; redo re-applies them"""
+    engine = create_engine("csharp")
+    history = UndoHistory()
+    texts = [SAMPLES["csharp"]]
+    mappings = [dict(engine.mappings.items())]
+    for level in (1, 2, 3):
+        texts.append(run_action(history, engine, texts[-1], level))
+        mappings.append(dict(engine.mappings.items()))
+
+    text = texts[-1]
+    for step in (2, 1, 0):
+        text = history.undo(text, engine.mappings)
+        assert text == texts[step] and dict(engine.mappings.items()) == mappings[step]
+    assert history.undo(text, engine.mappings) is None
+
+    for step in (1, 2):
+        text = history.redo(text, engine.mappings)
+        assert text == texts[step] and dict(engine.mappings.items()) == mappings[step]
+
+
+def test_typing_after_undo_drops_redo():
+    """An edit after an undo becomes a step of its own and clears the redo list"""
+    engine = create_engine("python")
+    history = UndoHistory()
+    text = run_action(history, engine, SAMPLES["python"], 1)
+    text = history.undo(text, engine.mappings)
+    edited = text + "# typed\n"
+    assert history.undo(edited, engine.mappings) == text
+    assert history.redo(text, engine.mappings) == edited
+    assert history.redo(edited, engine.mappings) is None
+
+
+def test_steps_are_capped():
+    """Only max_levels steps are kept, and the byte cap drops the oldest first"""
+    engine = create_engine()
+    history = UndoHistory(max_levels=3)
+    text = "start\n"
+    for count in range(6):
+        history.begin(text, engine.mappings)
+        text += f"line {count}\n"
+    history.begin(text, engine.mappings)
+    assert len(history.undo_steps) == 3
+
+    history = UndoHistory(max_bytes=1)
+    for count in range(3):
+        history.begin(text, engine.mappings)
+        text += f"more {count}\n"
+    history.begin(text, engine.mappings)
+    assert len(history.undo_steps) == 1 and history.size == history.undo_steps[0].size
@@ -0,0 +1,44 @@
+import pytest
+
+from codeblur.languages import create_lexer, detect_language
+from codeblur.lexer import COMMENT
+
+from conftest import SAMPLES
+
+
+@pytest.mark.parametrize("filename, language", [
+    ("Program.cs", "csharp"), ("app.TSX", "typescript"), ("tool.py", "python"), ("dump.sql", "sql"),
+    ("main.go", "go"), ("lib.rs", "rust"), ("run.sh", "shell"), ("page.html", "html"), ("Module.vb", "vb"),
+])
+def test_detect_by_extension(filename, language):
+    """The extension decides, whatever the content"""
+    assert detect_language("def main():\n    pass\n", filename) == language
+
+
+@pytest.mark.parametrize("language", ["csharp", "typescript", "python", "go", "rust", "shell", "html"])
+def test_detect_by_content(language):
+    """Without a known extension the first few KB are sniffed"""
+    assert detect_language(SAMPLES[language], "notes.txt") == language
+
+
+@pytest.mark.parametrize("text, language", [
+    ("#!/usr/bin/env python3\nprint(1)\n", "python"),
+    ("#!/bin/bash\necho hi\n", "shell"),
+    ("#!/usr/bin/env node\nconsole.log(1)\n", "typescript"),
+    ("Shopping list: eggs, milk\n", None),
+])
+def test_detect_by_shebang_or_nothing(text, language):
+    """A shebang settles it; text without enough hints gets the generic lexer"""
+    assert detect_language(text) == language
+
+
+@pytest.mark.parametrize("language, text, comments", [
+    ("csharp", "#region Queries\nx--; // note\n", ["// note"]),
+    ("typescript", "x--; # not a comment\n", []),
+    ("python", "s = \"it's\" # note\n", ["# note"]),
+    ("sql", "SELECT '--' -- note\n", ["-- note"]),
+    ("vb", "x = \"a\" ' note\n", ["' note"]),
+])
+def test_comment_syntax_per_language(language, text, comments):
+    """Each language's lexer only takes its own comment markers"""
+    assert [value for kind, value in create_lexer(language).tokenize(text) if kind == COMMENT] == comments
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from codeblur.engine import Engine
+from codeblur.languages import LANGUAGES, create_lexer, detect_language
+from codeblur.lexer import COMMENT, STRING, join_tokens
+
+from conftest import SAMPLES, create_engine
+
+
+# Inputs the patterns must not choke on: unclosed constructs, lone markers
+EDGE_CASES = [
+    "",
+    "x",
+    "/* never closed",
+    "<!-- never closed",
+    "--[[ never closed",
+    "s = 'never closed",
+    's = "never closed\nnext line',
+    "a /* b */ c // d\n# e\n-- f\n",
+    "\r\n\t \\ \" ' ` @\"\" $@\"\"",
+]
+
+
+@pytest.mark.parametrize("language", sorted(LANGUAGES) + [None])
+@pytest.mark.parametrize("text", list(SAMPLES.values()) + EDGE_CASES)
+def test_tokens_join_to_text(language, text):
+    """Every character lands in exactly one token"""
+    tokens = create_lexer(language).tokenize(text)
+    assert join_tokens(tokens) == text
+    assert all(value for _, value in tokens)
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_sample_has_comments_and_strings(language):
+    """The samples exercise the comment and string patterns of their language"""
+    kinds = {kind for kind, _ in create_lexer(language).tokenize(SAMPLES[language])}
+    assert COMMENT in kinds
+    assert STRING in kinds
+
+
+# Rewrites that change how the text scans: a Rust/Go char literal whose
+# content becomes a placeholder is no literal any more
+RELEX_CASES = [(language, SAMPLES[language]) for language in sorted(SAMPLES)] + [
+    ("rust", "let c = ')';\n"),
+    ("go", "c := '`'\n"),
+    (None, "=>=><!--"),
+    (None, "=>=>#"),
+]
+
+# Pieces the fuzz test strings together (comment/string markers, prefixes, placeholders)
+FUZZ_TOKENS = [
+    "a", "Name", "x1", "_", "0", "'", '"', "`", "/*", "*/", "//", "#", "--", "<!--", "-->", "--[[", "]]",
+    "\n", " ", "(", ")", "{", "}", ";", "=>", "@", "$", "\\", "r", "b", "f", "REM ", "=", "'a'", '"s"',
+    "'''", '"""', '@"', "ID001", "PERSON002",
+]
+
+
+def assert_remembered_tokens_match_relex(language, text):
+    """Run every level; after each, the cached tokens must equal a fresh scan"""
+    engine = create_engine(language)
+    for level in sorted(Engine.OBFUSCATION_LEVELS):
+        # Without a language the engine lexes with the one detected for the input
+        used = language or detect_language(text)
+        text, _ = engine.run_level(level, text)
+        assert engine.lexer.tokenize(text) == create_lexer(used).tokenize(text), (level, text)
+
+
+@pytest.mark.parametrize("language, text", RELEX_CASES)
+def test_remembered_tokens_match_relex(language, text):
+    """Tokens a pass hands to the next one are what a fresh scan would give"""
+    assert_remembered_tokens_match_relex(language, text)
+
+
+def test_remembered_tokens_match_relex_fuzz():
+    """Same, over seeded random strings of markers in every language"""
+    rng = random.Random(1)
+    languages = sorted(LANGUAGES) + [None]
+    for _ in range(500):
+        text = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 30)))
+        assert_remembered_tokens_match_relex(rng.choice(languages), text)
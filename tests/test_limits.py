@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from codeblur.engine import ActionTimeout, Engine
+from codeblur.languages import create_lexer
+from codeblur.lexer import COMMENT
+
+from conftest import SAMPLES, create_engine, non_blank_lines, run_levels
+
+
+def test_unclosed_comment_runs_to_end():
+    """An unclosed block comment is one token up to the end of the text"""
+    text = "x = 1 /* " + "a * b / c " * 1000
+    tokens = create_lexer("csharp").tokenize(text)
+    assert tokens[-1] == (COMMENT, text[text.index("/*"):])
+
+
+@pytest.mark.parametrize("opener", ["/* x ", "<!-- x ", "--[[ x "])
+def test_unclosed_comments_run_in_linear_time(opener):
+    """Many unclosed comment openers do not make the lexer backtrack"""
+    engine = create_engine()
+    engine.time_budget = 10
+    text = opener * 40000
+    start = time.perf_counter()
+    restored = engine.deobfuscate(run_levels(engine, text, len(Engine.OBFUSCATION_LEVELS)))
+    assert time.perf_counter() - start < 10
+    assert non_blank_lines(restored) == non_blank_lines(text)
+
+
+@pytest.mark.parametrize("line", [
+    "public " + "Map<string, " * 40000,
+    "x".join(["public static int Total(int a, int b) where T : class"] * 5000),
+])
+def test_long_lines_do_not_backtrack(line):
+    """Declaration regexes stay fast on one huge line (minified code)"""
+    engine = create_engine("csharp")
+    engine.time_budget = 10
+    start = time.perf_counter()
+    text, _ = engine.run_level(4, line + "\n")
+    assert time.perf_counter() - start < 10
+    assert engine.deobfuscate(text) == line + "\n"
+
+
+def test_action_over_budget_raises():
+    """An action that overruns time_budget stops with ActionTimeout naming it"""
+    engine = create_engine("csharp")
+    engine.time_budget = 1e-6
+    with pytest.raises(ActionTimeout) as error:
+        engine.run_level(1, SAMPLES["csharp"] * 200)
+    assert error.value.action_name == "obfuscate_identifiers" and error.value.budget == 1e-6
@@ -0,0 +1,34 @@
+from codeblur.mappings import MappingStore
+
+
+def test_reverse_index_follows_changes():
+    """Placeholder lookups see remaps and removals at once"""
+    mappings = MappingStore({"alpha": "PERSON001", "beta": "PERSON002"})
+    assert mappings.original_of("PERSON001") == "alpha" and mappings.has_placeholder("PERSON002")
+
+    mappings["alpha"] = "ORG001"
+    del mappings["beta"]
+    assert mappings.original_of("ORG001") == "alpha"
+    assert not mappings.has_placeholder("PERSON001") and not mappings.has_placeholder("PERSON002")
+    assert sorted(mappings.placeholders()) == ["ORG001"]
+
+
+def test_counters_never_reuse_numbers():
+    """Numbers continue from the highest placeholder of each category, even after removals"""
+    mappings = MappingStore({"alpha": "PERSON007", "beta": "ORG002"})
+    assert mappings.next_placeholder("PERSON") == "PERSON008"
+    del mappings["beta"]
+    assert mappings.next_placeholder("ORG") == "ORG003"
+    assert mappings.next_placeholder("GUID") == "GUID001"
+    assert MappingStore(counters={"PERSON": 41}).next_placeholder("PERSON") == "PERSON042"
+
+
+def test_restore_takes_longest_placeholder():
+    """One pass restores every placeholder, longest first and nested ones inside originals"""
+    mappings = MappingStore({"alpha": "ID001", "beta": "ID0012", "// note on ID001": "COMMENT001"})
+    assert mappings.restore("ID0012 ID001 ID0013 COMMENT001") == "beta alpha alpha3 // note on alpha"
+    assert MappingStore().restore("ID001") == "ID001"
+
+    # An original holding its own placeholder does not recurse forever
+    mappings["x = COMMENT002"] = "COMMENT002"
+    assert mappings.restore("COMMENT002").startswith("x = ")
@@ -0,0 +1,41 @@
+import re
+
+from conftest import SAMPLES, create_engine
+
+
+SOURCE = '''public class Cart
+{
+    private int count;
+    private int countMax;
+    public string Label { get; set; }
+
+    public void Add(int amount) { count += amount; countMax = Math.Max(count, countMax); }
+    public string Describe() { return Label + count + "count"; }
+}
+'''
+
+
+def test_members_replaced_as_whole_words():
+    """Every declared member is replaced everywhere it occurs, prefixes of longer names included"""
+    engine = create_engine("csharp")
+    text, delta = engine.run_action("anonymize_members", SOURCE)
+    assert set(delta) >= {"count", "countMax", "Label", "Add", "Describe"}
+    assert re.search(r'\b(?:count|countMax|Label|Add|Describe)\b', text) is None
+    assert "amount" in text and "Math.Max" in text
+    assert engine.deobfuscate(text) == SOURCE
+
+
+def test_mapped_members_keep_their_placeholders():
+    """A member mapped by an earlier run keeps its placeholder, so both texts still restore"""
+    engine = create_engine("csharp")
+    first, _ = engine.run_action("anonymize_members", SOURCE)
+    second, delta = engine.run_action("anonymize_members", SOURCE.replace("amount", "step"))
+    assert delta == {} and second == first.replace("amount", "step")
+
+
+def test_members_of_every_sample_restore():
+    """ANON over the C# and TypeScript samples deobfuscates exactly"""
+    for language in ("csharp", "typescript"):
+        engine = create_engine(language)
+        text, delta = engine.run_action("anonymize_members", SAMPLES[language])
+        assert delta and engine.deobfuscate(text) == SAMPLES[language]
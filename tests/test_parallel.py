@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from codeblur.cli import main
+
+from conftest import SAMPLES
+
+
+EXTENSIONS = {"csharp": ".cs", "typescript": ".ts", "python": ".py", "sql": ".sql", "go": ".go",
+              "rust": ".rs", "shell": ".sh", "html": ".html", "vb": ".vb"}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A source tree of every sample, twice (names repeat across files)"""
+    root = tmp_path / "src"
+    for copy in ("a", "b"):
+        for language, text in SAMPLES.items():
+            path = root / copy / (language + EXTENSIONS[language])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8", newline="")
+    return str(root)
+
+
+def read_tree(root):
+    """relative path -> contents of every file under root"""
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path, encoding="utf-8", newline="") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def obfuscate_tree(tree, tmp_path, jobs, level=5):
+    """Output tree of a CLI run with its own mappings file"""
+    output = str(tmp_path / f"out-j{jobs}")
+    mappings = str(tmp_path / f"mappings-j{jobs}.db")
+    assert main(["obfuscate", "--level", str(level), "-j", str(jobs), "--mappings", mappings, tree, "-o", output]) == 0
+    return output, mappings
+
+
+@pytest.mark.parametrize("level", [1, 5])
+def test_numbering_does_not_depend_on_jobs(tree, tmp_path, level):
+    """-j 1 and -j 2 write the same files"""
+    serial, _ = obfuscate_tree(tree, tmp_path, 1, level)
+    parallel, _ = obfuscate_tree(tree, tmp_path, 2, level)
+    assert read_tree(serial) == read_tree(parallel)
+
+
+def test_parallel_output_restores(tree, tmp_path):
+    """Deobfuscating a parallel run with its mappings gives the tree back (blank lines aside)"""
+    output, mappings = obfuscate_tree(tree, tmp_path, 2)
+    restored = str(tmp_path / "restored")
+    assert main(["deobfuscate", "--mappings", mappings, output, "-o", restored]) == 0
+
+    originals = read_tree(tree)
+    for relative_path, text in read_tree(restored).items():
+        assert ([line.rstrip() for line in text.splitlines() if line.strip()] ==
+                [line.rstrip() for line in originals[relative_path].splitlines() if line.strip()]), relative_path
+
+
+def test_names_share_placeholders_across_files(tree, tmp_path):
+    """A name found by several workers gets one placeholder, so both copies come out the same"""
+    output, _ = obfuscate_tree(tree, tmp_path, 2)
+    files = read_tree(output)
+    for language in SAMPLES:
+        name = language + EXTENSIONS[language]
+        assert files[os.path.join("a", name)] == files[os.path.join("b", name)], name
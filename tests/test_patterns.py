@@ -0,0 +1,30 @@
+import pytest
+
+from codeblur.engine import COMMENT_PLACEHOLDER, PLACEHOLDER, PLACEHOLDER_CATEGORIES
+
+from conftest import create_engine
+
+
+@pytest.mark.parametrize("category", PLACEHOLDER_CATEGORIES)
+def test_every_category_is_recognized(category):
+    """The compiled recognizer knows each category a pass can create"""
+    engine = create_engine()
+    assert engine.is_obfuscated_identifier(category + "001")
+    assert not engine.is_obfuscated_identifier(category)
+    assert not engine.is_obfuscated_identifier(category.lower() + "001")
+
+
+@pytest.mark.parametrize("word", ["ID3x", "PERSONA001", "USER001", "001"])
+def test_other_words_are_not_placeholders(word):
+    """Words merely close to a placeholder are not recognized"""
+    assert PLACEHOLDER.fullmatch(word) is None
+
+
+@pytest.mark.parametrize("comment, is_placeholder", [
+    ("/* COMMENT001 */", True), ("// COMMENT002", True), ("/// COMMENT003", True), ("# COMMENT004", True),
+    ("-- COMMENT005", True), ("<!-- COMMENT006 -->", True), ("' COMMENT007", True), ("rem COMMENT008", True),
+    ("// COMMENT009 and more", False), ("/* COMMENT */", False), ("# PERSON001", False),
+])
+def test_comment_placeholders_in_every_style(comment, is_placeholder):
+    """One compiled pattern tells placeholder comments of every style from real ones"""
+    assert (COMMENT_PLACEHOLDER.fullmatch(comment) is not None) == is_placeholder
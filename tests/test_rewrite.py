@@ -0,0 +1,26 @@
+from codeblur.rewrite import Rewriter
+
+
+def test_edits_refer_to_the_original_text():
+    """Edits added in any order apply at their original offsets"""
+    edits = Rewriter("alpha beta gamma")
+    edits.replace(11, 16, "G")
+    edits.replace(0, 5, "A")
+    edits.replace(6, 6, "+")
+    assert len(edits) == 3
+    assert edits.apply() == "A +beta G"
+
+
+def test_first_overlapping_edit_wins():
+    """Of overlapping spans the one starting first (then the one added first) is applied"""
+    edits = Rewriter("0123456789")
+    edits.replace(2, 6, "x")
+    edits.replace(4, 8, "y")
+    edits.replace(2, 3, "z")
+    assert edits.apply() == "01x6789"
+
+
+def test_no_edits_returns_the_text():
+    """Without edits the text comes back untouched"""
+    text = "unchanged"
+    assert Rewriter(text).apply() is text
@@ -0,0 +1,70 @@
+import pytest
+
+from codeblur.engine import Engine, PLACEHOLDER
+
+from conftest import SAMPLES, create_engine, non_blank_lines, run_levels
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_blur_round_trip(language):
+    """BLUR then deobfuscate gives the original back exactly"""
+    engine = create_engine(language)
+    text = run_levels(engine, SAMPLES[language], 1)
+    assert text != SAMPLES[language]
+    assert engine.deobfuscate(text) == SAMPLES[language]
+
+
+@pytest.mark.parametrize("levels", range(2, len(Engine.OBFUSCATION_LEVELS) + 1))
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_all_levels_round_trip(language, levels):
+    """Levels 1..N then deobfuscate give the original back, blank lines aside"""
+    engine = create_engine(language)
+    text = run_levels(engine, SAMPLES[language], levels)
+    assert non_blank_lines(engine.deobfuscate(text)) == non_blank_lines(SAMPLES[language])
+
+
+# Words BLUR glues a placeholder into (HTTPServer -> HTTPENTITY001): the
+# uppercase run before it must not swallow the placeholder on the next run
+IDEMPOTENCE_CASES = [(language, SAMPLES[language]) for language in sorted(SAMPLES)] + [
+    (None, "HTTPServerclass "),
+    ("python", "HTTPServerx1"),
+    ("csharp", "var a = XMLHttpRequest + PERSON002Id + getID001Value;\n"),
+]
+
+
+@pytest.mark.parametrize("language, source", IDEMPOTENCE_CASES)
+def test_levels_are_idempotent(language, source):
+    """Running a level again over its own output changes nothing"""
+    engine = create_engine(language)
+    text = source
+    for level in sorted(Engine.OBFUSCATION_LEVELS):
+        text, _ = engine.run_level(level, text)
+        again, delta = engine.run_level(level, text)
+        assert (again, delta) == (text, {}), level
+    for level in sorted(Engine.OBFUSCATION_LEVELS):
+        assert engine.run_level(level, text)[0] == text, level
+
+
+def test_round_trip_keeps_separators():
+    """snake_case underscores and uppercase runs survive camelCase splitting"""
+    engine = create_engine("python")
+    source = "ROUND_05UP = qux_zed + handler_0 + HTTPServer + getURL\n"
+    text = run_levels(engine, source, 1)
+    assert text.count("_") == source.count("_")
+    assert engine.deobfuscate(text) == source
+
+
+def test_comment_whitespace_kept():
+    """Comment placeholders keep the whitespace around the comment text"""
+    engine = create_engine("python")
+    source = "x = 1  #     indented note\r\ny = 2 #tight\r\n"
+    text, _ = engine.run_action("remove_comments", source)
+    assert "#     COMMENT" in text and "#COMMENT" in text and text.endswith("\r\n")
+    assert engine.deobfuscate(text) == source
+
+
+def test_placeholders_are_recognized():
+    """Every placeholder a run creates matches the placeholder pattern"""
+    engine = create_engine("typescript")
+    run_levels(engine, SAMPLES["typescript"], len(Engine.OBFUSCATION_LEVELS))
+    assert all(PLACEHOLDER.fullmatch(placeholder) for placeholder in engine.mappings.values())
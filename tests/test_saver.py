@@ -0,0 +1,53 @@
+import pytest
+
+from codeblur.mappings import MappingSaver, load_mappings
+
+
+@pytest.fixture(params=["mappings.db", "mappings.json"])
+def mappings_file(request, tmp_path):
+    """Path of a mappings file in either storage format"""
+    return str(tmp_path / request.param)
+
+
+def test_saver_coalesces(mappings_file):
+    """Queued saves are written on flush"""
+    mappings = load_mappings(mappings_file)
+    saver = MappingSaver(mappings_file, delay=60)
+    for name in ("alpha", "beta", "gamma"):
+        mappings[name] = mappings.next_placeholder("NAME")
+        saver.save(mappings)
+    saver.flush()
+
+    assert len(load_mappings(mappings_file)) == 3
+
+
+def test_save_copies_the_mappings_when_called(mappings_file):
+    """A change made after save() waits for the next save"""
+    mappings = load_mappings(mappings_file)
+    saver = MappingSaver(mappings_file, delay=60)
+    mappings["alpha"] = mappings.next_placeholder("NAME")
+    saver.save(mappings)
+    mappings["beta"] = mappings.next_placeholder("NAME")
+    saver.flush()
+    assert sorted(load_mappings(mappings_file)) == ["alpha"]
+
+    saver.save(mappings)
+    saver.flush()
+    assert sorted(load_mappings(mappings_file)) == ["alpha", "beta"]
+
+
+def test_failed_write_is_retried_in_full(tmp_path, capsys):
+    """A write that fails is reported, and the next save writes every mapping"""
+    mappings_file = str(tmp_path / "missing" / "mappings.db")
+    mappings = load_mappings(mappings_file)
+    saver = MappingSaver(mappings_file, delay=60)
+    mappings["alpha"] = "NAME001"
+    saver.save(mappings)
+    saver.flush()
+    assert "could not save" in capsys.readouterr().err
+
+    (tmp_path / "missing").mkdir()
+    mappings["beta"] = "NAME002"
+    saver.save(mappings)
+    saver.flush()
+    assert sorted(load_mappings(mappings_file)) == ["alpha", "beta"]
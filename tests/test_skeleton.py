@@ -0,0 +1,69 @@
+import ast
+
+from codeblur.languages import create_lexer
+from codeblur.lexer import bracket_map
+from codeblur.skeleton import python_body_spans
+
+from conftest import SAMPLES, create_engine, run_levels
+
+
+def test_bracket_map_skips_comments_and_strings():
+    """Only code braces are matched; unclosed openers and stray closers are left out"""
+    text = 'f() { s = "}"; /* { */ g() { } } h() { }'
+    opens, matches = bracket_map(create_lexer("csharp").tokenize(text))
+    f, g, h = text.index("{"), text.index("g() {") + 4, text.index("h() {") + 4
+    assert opens == [f, g, h]
+    assert matches == {f: text.index("} h()"), g: g + 2, h: h + 2}
+    opens, matches = bracket_map(create_lexer("csharp").tokenize("} { {"))
+    assert opens == [2, 4] and matches == {}
+
+
+def test_skeleton_keeps_signatures():
+    """SKELETON replaces brace bodies but keeps the signatures and braces"""
+    engine = create_engine("csharp")
+    text, delta = engine.run_level(5, SAMPLES["csharp"])
+    assert "GetInvoicesAsync(Guid customerId, string region)" in text
+    assert [placeholder for placeholder in delta.values() if placeholder.startswith("BODY")]
+    assert engine.deobfuscate(text) == SAMPLES["csharp"]
+
+
+def test_braces_in_strings_stay_in_the_body():
+    """A brace inside a string or comment in a body does not end it early"""
+    engine = create_engine("typescript")
+    source = 'function render(): string {\n    const close = "}"; // }\n    return close + "{";\n}\n'
+    text, delta = engine.run_action("remove_function_bodies", source)
+    assert text.startswith("function render(): string {") and "return" not in text
+    assert len(delta) == 1 and engine.deobfuscate(text) == source
+
+
+PYTHON_SOURCE = '''class Greeter:
+    @property
+    def name(self):  # kept with the signature
+        """Docstring goes with the body"""
+        def inner():
+            return "é"
+        return inner()
+
+
+async def fetch(url): return await get(url)
+'''
+
+
+def test_python_body_spans():
+    """Outermost bodies run from the first statement to the end of the last; nested defs go with them"""
+    spans = python_body_spans(PYTHON_SOURCE)
+    assert [PYTHON_SOURCE[start:end] for start, end in spans] == [
+        '"""Docstring goes with the body"""\n        def inner():\n            return "é"\n        return inner()',
+        "return await get(url)",
+    ]
+    assert python_body_spans("def broken(:\n") is None
+
+
+def test_python_keywords_survive_blur():
+    """BLUR leaves keywords and escapes alone, so SKELETON can still parse the result"""
+    engine = create_engine("python")
+    text = run_levels(engine, SAMPLES["python"], 4)
+    ast.parse(text)
+    text, delta = engine.run_level(5, text)
+    assert any(placeholder.startswith("BODY") for placeholder in delta.values())
+    assert "\\n" in SAMPLES["python"] and "\\n" in engine.deobfuscate(text)
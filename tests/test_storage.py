@@ -0,0 +1,121 @@
+import pytest
+
+from codeblur.mappings import MappingConflict, MappingStore, load_mappings, save_mappings
+
+from conftest import SAMPLES, create_engine
+
+
+@pytest.fixture(params=["mappings.db", "mappings.json"])
+def mappings_file(request, tmp_path):
+    """Path of a mappings file in either storage format"""
+    return str(tmp_path / request.param)
+
+
+def test_save_and_load(mappings_file):
+    """Mappings and counters come back as saved"""
+    engine = create_engine("csharp")
+    text, _ = engine.run_level(1, SAMPLES["csharp"])
+    save_mappings(mappings_file, engine.mappings)
+
+    loaded = load_mappings(mappings_file)
+    assert dict(loaded.items()) == dict(engine.mappings.items())
+    assert loaded.counters == engine.mappings.counters
+    assert loaded.restore(text) == SAMPLES["csharp"]
+
+
+def test_incremental_saves(mappings_file):
+    """Later saves write additions and removals"""
+    mappings = load_mappings(mappings_file)
+    mappings["alpha"] = mappings.next_placeholder("PERSON")
+    mappings["beta"] = mappings.next_placeholder("PERSON")
+    save_mappings(mappings_file, mappings)
+    del mappings["alpha"]
+    mappings["gamma"] = mappings.next_placeholder("ORG")
+    save_mappings(mappings_file, mappings)
+
+    assert dict(load_mappings(mappings_file).items()) == {"beta": "PERSON002", "gamma": "ORG001"}
+
+
+def test_journal_only_between_database_saves(mappings_file):
+    """Only a store saved to a database keeps a journal, and each save drains it"""
+    mappings = load_mappings(mappings_file)
+    for name in ("alpha", "beta"):
+        mappings[name] = mappings.next_placeholder("PERSON")
+        save_mappings(mappings_file, mappings)
+        assert mappings._changes == {}
+    mappings["gamma"] = mappings.next_placeholder("PERSON")
+    assert len(mappings._changes) == mappings_file.endswith(".db")
+
+    # Headless stores never saved keep no second copy of their mappings
+    store = MappingStore({"delta": "ORG001"})
+    store["epsilon"] = store.next_placeholder("ORG")
+    assert store._changes == {}
+
+
+def test_stores_sharing_a_database_never_collide(tmp_path):
+    """Two stores loaded from one database hand out different placeholders and both are kept"""
+    mappings_file = str(tmp_path / "mappings.db")
+    first = load_mappings(mappings_file)
+    second = load_mappings(mappings_file)
+    first["alpha"] = first.next_placeholder("PERSON")
+    second["beta"] = second.next_placeholder("PERSON")
+    assert first["alpha"] != second["beta"]
+
+    save_mappings(mappings_file, first)
+    save_mappings(mappings_file, second)
+    loaded = load_mappings(mappings_file)
+    assert loaded.original_of(first["alpha"]) == "alpha"
+    assert loaded.original_of(second["beta"]) == "beta"
+
+    # Counters only go up, and the next store continues after both
+    assert loaded.next_placeholder("PERSON") not in (first["alpha"], second["beta"])
+
+
+def test_numbering_stays_contiguous_for_one_store(tmp_path):
+    """Numbers reserved but not used are handed back on save"""
+    mappings_file = str(tmp_path / "mappings.db")
+    mappings = load_mappings(mappings_file)
+    mappings["alpha"] = mappings.next_placeholder("PERSON")
+    save_mappings(mappings_file, mappings)
+
+    assert load_mappings(mappings_file).next_placeholder("PERSON") == "PERSON002"
+
+
+def test_conflicting_placeholder_is_refused(tmp_path):
+    """A placeholder already stored for another original is not overwritten"""
+    mappings_file = str(tmp_path / "mappings.db")
+    save_mappings(mappings_file, MappingStore({"alpha": "PERSON001"}))
+
+    with pytest.raises(MappingConflict) as error:
+        save_mappings(mappings_file, MappingStore({"beta": "PERSON001", "gamma": "ORG001"}))
+    assert error.value.conflicts == [("beta", "PERSON001", "alpha")]
+
+    loaded = load_mappings(mappings_file)
+    assert loaded.original_of("PERSON001") == "alpha"
+    assert loaded.original_of("ORG001") == "gamma"
+
+
+def test_clear_empties_the_database(tmp_path):
+    """Only clear() removes rows another save did not touch"""
+    mappings_file = str(tmp_path / "mappings.db")
+    mappings = load_mappings(mappings_file)
+    mappings["alpha"] = mappings.next_placeholder("PERSON")
+    save_mappings(mappings_file, mappings)
+    mappings.clear()
+    save_mappings(mappings_file, mappings)
+
+    assert len(load_mappings(mappings_file)) == 0
+
+
+def test_json_mappings_are_imported(tmp_path):
+    """Without a database yet, the JSON file of the same name is loaded and the first save writes the database"""
+    json_file = str(tmp_path / "mappings.json")
+    save_mappings(json_file, MappingStore({"alpha": "PERSON004"}))
+
+    database_file = str(tmp_path / "mappings.db")
+    mappings = load_mappings(database_file)
+    assert dict(mappings.items()) == {"alpha": "PERSON004"}
+    assert mappings.next_placeholder("PERSON") == "PERSON005"
+    mappings["beta"] = "PERSON005"
+    save_mappings(database_file, mappings)
+    assert dict(load_mappings(database_file).items()) == {"alpha": "PERSON004", "beta": "PERSON005"}
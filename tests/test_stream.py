@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from codeblur.engine import PLACEHOLDER
+from codeblur.stream import StreamObfuscator, iter_chunks, restore_stream
+
+from conftest import SAMPLES, create_engine
+
+
+def canonical(engine, text):
+    """Text with each placeholder replaced by what it stands for (numbering aside)"""
+    return PLACEHOLDER.sub(lambda match: f"<{engine.mappings.restore(match.group(0))}>", text)
+
+
+def whole_file(language, level):
+    """Engine and output of levels 1..level over the whole sample"""
+    engine = create_engine(language)
+    text = SAMPLES[language]
+    for current in range(1, level + 1):
+        text, _ = engine.run_level(current, text)
+    if not text.endswith("\n"):
+        text += "\n"
+    return engine, text
+
+
+def streamed(language, level, chunk_size):
+    """Engine and output of a StreamObfuscator run in small chunks"""
+    engine = create_engine(language)
+    output = []
+    StreamObfuscator(engine, level, chunk_size=chunk_size, language=language).run(
+        io.StringIO(SAMPLES[language]), output.append)
+    return engine, "".join(output)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 256])
+@pytest.mark.parametrize("level", [1, 2, 5])
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_stream_matches_whole_file(language, level, chunk_size):
+    """Chunked output equals whole-file output (placeholder numbering aside)"""
+    whole_engine, whole_text = whole_file(language, level)
+    stream_engine, stream_text = streamed(language, level, chunk_size)
+    assert canonical(stream_engine, stream_text) == canonical(whole_engine, whole_text)
+
+
+@pytest.mark.parametrize("limit", [1, 7, 4096])
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_restore_stream_matches_deobfuscate(language, limit):
+    """Deobfuscating a stream in pieces gives the same text as in one go"""
+    engine, text = whole_file(language, 3)
+    output = []
+    restore_stream(engine, io.StringIO(text), output.append, limit=limit)
+    assert "".join(output) == engine.deobfuscate(text)
+
+
+def test_chunks_stay_bounded_without_clean_cuts():
+    """One body too long for a chunk is cut at its shallowest line, never left to grow"""
+    lines = ["namespace Acme\n", "{\n"] + ["    int value%d = %d;\n" % (i, i) for i in range(2000)] + ["}\n"]
+    chunks = list(iter_chunks(iter(lines), chunk_size=256, max_chunk_size=4096, language="csharp"))
+    assert "".join(chunks) == "".join(lines)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 4096 + max(map(len, lines)) for chunk in chunks)
+    assert all(chunk.endswith("\n") for chunk in chunks)
+
+
+def test_python_chunks_cut_between_statements():
+    """Python chunks start at an unindented line and never split a triple-quoted string"""
+    text = SAMPLES["python"] * 20
+    for chunk in iter_chunks(io.StringIO(text), chunk_size=64, language="python"):
+        assert chunk.count('"""') % 2 == 0
+        assert not chunk[0].isspace()
@@ -0,0 +1,42 @@
+import pytest
+
+from codeblur.structure import available, find_members, function_bodies
+
+from conftest import SAMPLES, create_engine
+
+
+CONSTRAINED = '''public class Totals
+{
+    private static decimal Compute<T>(IEnumerable<T> orders) where T : class
+    {
+        return orders.Count();
+    }
+}
+'''
+
+
+@pytest.mark.parametrize("language", ["csharp", "typescript"])
+def test_backend_is_opt_in(language):
+    """Engines use the regexes unless tree-sitter is asked for"""
+    assert create_engine(language).use_tree_sitter is False
+
+
+@pytest.mark.skipif(not available("csharp"), reason="tree-sitter C# grammar not installed")
+def test_tree_sitter_finds_constrained_bodies():
+    """The syntax tree finds the body after a where clause that ends in 'class'"""
+    assert find_members(CONSTRAINED, "csharp") == [("Compute", "FUNC")]
+    engine = create_engine("csharp")
+    engine.use_tree_sitter = True
+    text, delta = engine.run_level(5, CONSTRAINED)
+    assert "return" not in text and engine.deobfuscate(text) == CONSTRAINED
+
+
+@pytest.mark.parametrize("language", ["csharp", "typescript"])
+def test_tree_sitter_falls_back_on_fragments(language):
+    """Text with syntax errors goes to the regexes"""
+    fragment = SAMPLES[language].split("{", 1)[1]
+    assert find_members(fragment, language) is None and function_bodies(fragment, language) is None
+    engine = create_engine(language)
+    engine.use_tree_sitter = True
+    text, _ = engine.run_level(5, fragment)
+    assert engine.deobfuscate(text) == fragment